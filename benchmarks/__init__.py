@@ -0,0 +1 @@
+"""基准测试与压测工具（不随程序打包）。"""
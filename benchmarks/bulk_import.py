@@ -0,0 +1,141 @@
+"""批量导入基准：把一份 N 个单词的 CSV 词库导入夹具数据库，记录耗时、行/秒与 Python 内存峰值。
+
+用法（在工程根目录执行）：
+    python -m benchmarks.bulk_import                       # 20 万词，批量模式与逐行维护索引各一次
+    python -m benchmarks.bulk_import --deck-words 50000 --modes bulk
+
+词库 CSV 按固定种子生成在系统临时目录（与夹具同一套字表），每次导入都使用夹具数据库的新副本。
+耗时与内存分两次测量（tracemalloc 会拖慢导入），只测导入本身，不含之后的干扰项池构建。
+结果打印为表格并写入 benchmarks/results/bulk_import.json。
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.fixture import DEFAULT_SEED, DEFAULT_WORDS, SOURCE_DB, _kana_rows, ensure_fixture, generate_words
+from src.core.vocabulary_import import import_vocabulary
+
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+DEFAULT_DECK_WORDS = 200000
+MODES = {"bulk": True, "no-bulk": False}
+
+
+def ensure_deck(words: int, seed: int) -> str:
+    """返回词库 CSV 路径；不存在时生成（带表头，课次写成「3」这类需要规范化的形式）。"""
+    path = os.path.join(tempfile.gettempdir(), f"japanese_learning_deck_{words}_{seed}.csv")
+    if os.path.exists(path):
+        return path
+    conn = sqlite3.connect(f"file:{SOURCE_DB}?mode=ro", uri=True)
+    try:
+        kana = _kana_rows(conn)
+    finally:
+        conn.close()
+    with open(path + ".tmp", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["word", "hiragana", "meaning", "lesson"])
+        for word, reading, meaning, lesson in generate_words(random.Random(seed + 1), kana, words):
+            writer.writerow([word, reading, meaning, lesson[1:-1]])
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _import(fixture: str, deck: str, bulk: bool, trace_memory: bool) -> Dict:
+    scratch = os.path.join(os.path.dirname(fixture), "japanese_learning_bulk_import.db")
+    for ext in ("", "-wal", "-shm"):
+        if os.path.exists(scratch + ext):
+            os.remove(scratch + ext)
+    shutil.copyfile(fixture, scratch)
+    conn = sqlite3.connect(scratch)
+    try:
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            report = import_vocabulary(conn, [deck], bulk=bulk)
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+        integrity = conn.execute("PRAGMA integrity_check;").fetchone()[0]
+    finally:
+        conn.close()
+    result = report.to_dict()
+    result["peakMiB"] = round(peak / 1024 / 1024, 2)
+    result["integrity"] = integrity
+    return result
+
+
+def run(deck_words: int, words: int, seed: int, modes: List[str]) -> Dict:
+    fixture = ensure_fixture(words, seed)
+    start = time.perf_counter()
+    deck = ensure_deck(deck_words, seed)
+    deck_seconds = time.perf_counter() - start
+    results = {}
+    for mode in modes:
+        timed = _import(fixture, deck, MODES[mode], trace_memory=False)
+        timed["peakMiB"] = _import(fixture, deck, MODES[mode], trace_memory=True)["peakMiB"]
+        results[mode] = timed
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "fixtureWords": words,
+            "deckWords": deck_words,
+            "deckMiB": round(os.path.getsize(deck) / 1024 / 1024, 2),
+            "deckGeneratedSeconds": round(deck_seconds, 2),
+        },
+        "modes": results,
+    }
+
+
+def print_report(report: Dict) -> None:
+    meta = report["meta"]
+    print(f"导入 {meta['deckWords']} 个单词（{meta['deckMiB']} MB CSV）到 {meta['fixtureWords']} 个单词的夹具")
+    print(f"{'方式':<10}{'读取':>10}{'写入':>10}{'重复':>8}{'用时(s)':>10}{'行/秒':>12}{'内存峰值(MB)':>14}")
+    for mode, r in report["modes"].items():
+        row = (f"{mode:<10}{r['read']:>10}{r['imported']:>10}{r['duplicates']:>8}"
+               f"{r['seconds']:>10.2f}{r['rowsPerSecond']:>12,}{r['peakMiB']:>14.1f}")
+        print(row + ("" if r["integrity"] == "ok" else f"  （完整性检查失败：{r['integrity']}）"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="批量导入单词的耗时与内存")
+    parser.add_argument("--deck-words", type=int, default=DEFAULT_DECK_WORDS, help="导入的单词数")
+    parser.add_argument("--words", type=int, default=DEFAULT_WORDS, help="夹具词库大小")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="随机数种子")
+    parser.add_argument("--modes", default=",".join(MODES), help="逗号分隔的导入方式")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "bulk_import.json"), help="结果 JSON 路径")
+    args = parser.parse_args()
+
+    modes = [m for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"未知的导入方式：{', '.join(unknown)}（可选：{', '.join(MODES)}）")
+
+    report = run(args.deck_words, args.words, args.seed, modes)
+    print_report(report)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
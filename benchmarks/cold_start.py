@@ -0,0 +1,211 @@
+"""冷启动基准：从启动进程到返回第一道随机题的耗时，比较有无词库快照。
+
+用法（在工程根目录执行）：
+    python -m benchmarks.cold_start                  # 每种方式各启动 5 次，取中位数
+    python -m benchmarks.cold_start --runs 10 --words 20000
+    python -m benchmarks.cold_start --baseline benchmarks/results/cold_start_base.json  # 与基线对比，变慢超过阈值时返回 1
+
+每次测量都启动一个新的 Python 进程（使用夹具数据库的副本），记录以下时间点（距进程启动，毫秒）：
+    interpreter  解释器启动完成
+    import       导入 web_app 完成
+    preload      数据库迁移 + 载入词库快照完成（即 web_app 开始接受请求的时刻）
+    lessons      第一个 /api/lessons 返回
+    firstQuiz    第一个随机出题 /api/quiz 返回
+比较的方式：
+    snapshot     快照已存在且与数据库一致（打包后正常启动的情形）
+    rebuild      快照不存在，启动时生成
+    no-snapshot  JAPANESE_LEARNING_SNAPSHOT=0，词库在第一次请求时从 SQLite 载入
+    sqlite       JAPANESE_LEARNING_VOCAB_STORE=0，所有读取直接查询 SQLite
+文件缓存是热的（夹具刚被复制），测到的是程序自身的启动开销，不含磁盘冷读。
+导入阶段各模块的耗时可用 python web_app.py --profile-startup 查看（见 src/core/startup_profile.py）。
+结果打印为表格并写入 benchmarks/results/cold_start.json。
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.fixture import DEFAULT_SEED, DEFAULT_WORDS, ensure_fixture
+from src.database.sqlite_pool import DB_PATH_ENV
+
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+START_TIME_ENV = "JAPANESE_LEARNING_COLD_START_T0"
+DEFAULT_RUNS = 5
+DEFAULT_THRESHOLD = 20.0   # 与基线相比中位数变慢超过该百分比视为退化
+PHASES = ("interpreter", "import", "preload", "lessons", "firstQuiz")
+MODES = {
+    "snapshot": {},
+    "rebuild": {},
+    "no-snapshot": {"JAPANESE_LEARNING_SNAPSHOT": "0"},
+    "sqlite": {"JAPANESE_LEARNING_SNAPSHOT": "0", "JAPANESE_LEARNING_VOCAB_STORE": "0"},
+}
+
+
+def child() -> None:
+    """在新进程中执行：按顺序完成启动各阶段，把时间点以 JSON 打印到 stdout。"""
+    t0 = float(os.environ[START_TIME_ENV])
+    marks = {"interpreter": (time.time() - t0) * 1000}
+
+    import web_app
+    from src.core import vocabulary_snapshot
+    marks["import"] = (time.time() - t0) * 1000
+
+    with web_app.DB_POOL.connection() as conn:
+        vocabulary_snapshot.preload(conn, web_app.DB_POOL.db_path)
+    marks["preload"] = (time.time() - t0) * 1000
+
+    client = web_app.app.test_client()
+    lessons = client.get("/api/lessons").get_json()
+    marks["lessons"] = (time.time() - t0) * 1000
+    quiz = client.post("/api/quiz", json={"lesson": "all", "count": "10", "mode": "random"}).get_json()
+    marks["firstQuiz"] = (time.time() - t0) * 1000
+
+    ok = bool(lessons.get("ok", True)) and bool(quiz.get("ok")) and len(quiz.get("questions", [])) > 0
+    web_app.shutdown_app()
+    print(json.dumps({"marks": marks, "ok": ok}))
+
+
+def _prepare(fixture: str, mode: str) -> str:
+    """复制夹具；snapshot 方式预先生成快照，其余方式删除快照。"""
+    from src.core.vocabulary_snapshot import build_snapshot, snapshot_path
+
+    scratch = os.path.join(os.path.dirname(fixture), "japanese_learning_cold_start.db")
+    for path in (scratch, scratch + "-wal", scratch + "-shm", snapshot_path(scratch)):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.copyfile(fixture, scratch)
+    if mode == "snapshot":
+        conn = sqlite3.connect(scratch)
+        try:
+            build_snapshot(conn, snapshot_path(scratch))
+        finally:
+            conn.close()
+    return scratch
+
+
+def measure(fixture: str, mode: str) -> Dict:
+    scratch = _prepare(fixture, mode)
+    env = dict(os.environ, **MODES[mode])
+    env[DB_PATH_ENV] = scratch
+    env["JAPANESE_LEARNING_PREFETCH_SIZE"] = "0"    # 只测同步出题路径，不让预取线程抢占
+    env[START_TIME_ENV] = repr(time.time())
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.cold_start", "--child"],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int, words: int, seed: int, modes: List[str]) -> Dict:
+    fixture = ensure_fixture(words, seed)
+    # 夹具只迁移一次，避免每次启动都把迁移时间计入 preload
+    conn = sqlite3.connect(fixture)
+    try:
+        from src.database.migrations import migrate
+        migrate(conn)
+    finally:
+        conn.close()
+
+    results = {}
+    for mode in modes:
+        samples = [measure(fixture, mode) for _ in range(runs)]
+        results[mode] = {
+            "ok": all(s["ok"] for s in samples),
+            "p50": {phase: round(statistics.median(s["marks"][phase] for s in samples), 1) for phase in PHASES},
+            "samples": [s["marks"] for s in samples],
+        }
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "words": words,
+            "runs": runs,
+        },
+        "modes": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """逐个方式对比 import 与 firstQuiz 的中位数，打印变化；返回变慢超过阈值的项。"""
+    regressions = []
+    print(f"\n与基线对比（{baseline['meta'].get('timestamp', '?')}，阈值 {threshold:.0f}%）：")
+    for mode, result in current["modes"].items():
+        base = baseline["modes"].get(mode)
+        if not base:
+            print(f"  {mode:<14} （基线中没有该方式）")
+            continue
+        for phase in ("import", "firstQuiz"):
+            before, after = base["p50"][phase], result["p50"][phase]
+            change = (after - before) / before * 100 if before else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  ⚠ 变慢"
+                regressions.append(f"{mode}.{phase}")
+            elif change < -threshold:
+                flag = "  ✓ 变快"
+            print(f"  {mode:<14}{phase:<10} {before:>9.1f} → {after:>9.1f} ms ({change:+6.1f}%){flag}")
+    return regressions
+
+
+def print_report(report: Dict) -> None:
+    header = f"{'方式':<14}" + "".join(f"{phase:>13}" for phase in PHASES) + f"{'就绪→首题':>12}"
+    print(f"距进程启动的毫秒数（{report['meta']['runs']} 次中位数，{report['meta']['words']} 个单词）")
+    print(header)
+    for mode, result in report["modes"].items():
+        p50 = result["p50"]
+        row = f"{mode:<14}" + "".join(f"{p50[phase]:>13.1f}" for phase in PHASES)
+        row += f"{p50['firstQuiz'] - p50['import']:>12.1f}"
+        print(row + ("" if result["ok"] else "  （出题失败）"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="冷启动到第一道题的耗时")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="每种方式的启动次数")
+    parser.add_argument("--words", type=int, default=DEFAULT_WORDS, help="夹具词库大小")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="随机数种子")
+    parser.add_argument("--modes", default=",".join(MODES), help="逗号分隔的测量方式")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "cold_start.json"), help="结果 JSON 路径")
+    parser.add_argument("--baseline", help="基线结果 JSON，用于对比")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="判定退化的变慢百分比")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return 0
+    modes = [m for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"未知的测量方式：{', '.join(unknown)}（可选：{', '.join(MODES)}）")
+
+    report = run(max(1, args.runs), args.words, args.seed, modes)
+    print_report(report)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
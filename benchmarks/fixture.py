@@ -0,0 +1,124 @@
+"""基准测试用的夹具数据库：按固定随机种子生成词库、错题本和学习记录。
+
+假名表（japanese_kana）是出题规则的基础数据，从工程自带的数据库复制；
+单词、读音、中文意思、课次全部由种子决定，同样的参数每次生成的内容完全相同。
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from src.database.migrations import migrate
+from src.database.sqlite_pool import DB_FILE_NAME
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DB = os.path.join(PROJECT_DIR, DB_FILE_NAME)
+
+DEFAULT_WORDS = 5000
+DEFAULT_SEED = 20240601
+LESSON_COUNT = 48
+NOTE_RATIO = 0.05            # 收藏（错题本）单词占词库的比例
+STUDY_RECORDS_PER_WORD = 2   # 平均每个单词的历史作答次数
+
+# 用于拼接单词写法和中文意思的固定字表
+_KANJI = "日本人学生先生会社電話時間今朝昼晩曜月火水木金土食飲見聞読書行来帰起寝働休勉強"
+_MEANING_CHARS = "学生老师公司电话时间早上中午晚上星期月火水木金土吃喝看听读写去来回起睡工作休息学习"
+
+
+_SMALL_KANA = "ぁぃぅぇぉっゃゅょゎ"
+
+
+def _kana_rows(conn: sqlite3.Connection):
+    """读音用的平假名（不含拗音/促音用的小写假名）。"""
+    return [kana for (kana,) in conn.execute(
+        "SELECT kana FROM japanese_kana WHERE type = 'hiragana' AND length(kana) = 1 ORDER BY id;"
+    ) if kana not in _SMALL_KANA]
+
+
+def _to_katakana(text: str) -> str:
+    return "".join(chr(ord(ch) + 0x60) if "ぁ" <= ch <= "ゖ" else ch for ch in text)
+
+
+def generate_words(rng: random.Random, kana: List[str], words: int) -> Iterator[Tuple[str, str, str, str]]:
+    """按 rng 生成 words 个 (单词, 读音, 中文意思, 课次)，课次从第1课到第48课均匀分布。"""
+    for i in range(words):
+        reading = "".join(rng.choice(kana) for _ in range(rng.randint(2, 5)))
+        style = rng.random()
+        if style < 0.5:
+            word = "".join(rng.choice(_KANJI) for _ in range(rng.randint(1, 2))) + reading[rng.randint(1, len(reading) - 1):]
+        elif style < 0.7:
+            word = _to_katakana(reading)
+        else:
+            word = reading
+        meaning = "".join(rng.choice(_MEANING_CHARS) for _ in range(rng.randint(2, 4)))
+        yield word, reading, meaning, f"第{i * LESSON_COUNT // words + 1}课"
+
+
+def generate_fixture(
+    path: str,
+    words: int = DEFAULT_WORDS,
+    seed: int = DEFAULT_SEED,
+    build_pool: bool = True,
+) -> str:
+    """在 path 生成夹具数据库（已存在则覆盖），返回 path。"""
+    if not os.path.exists(SOURCE_DB):
+        raise FileNotFoundError(f"找不到假名数据来源：{SOURCE_DB}")
+    for ext in ("", "-wal", "-shm"):
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    try:
+        # 只建基础表；灌入数据后再升级到最新版本，让各迁移按正式流程回填派生数据
+        migrate(conn, target_version=1)
+        conn.execute("ATTACH DATABASE ? AS src;", (f"file:{SOURCE_DB}?mode=ro",))
+        conn.execute("INSERT INTO japanese_kana SELECT * FROM src.japanese_kana;")
+        conn.commit()
+        conn.execute("DETACH DATABASE src;")
+
+        vocab = list(generate_words(rng, _kana_rows(conn), words))
+        conn.executemany("INSERT INTO vocabulary (word, hiragana, meaning, lesson) VALUES (?, ?, ?, ?);", vocab)
+
+        notes = rng.sample(vocab, int(words * NOTE_RATIO))
+        conn.executemany(
+            "INSERT OR IGNORE INTO user_note (word, hiragana, meaning, lesson) VALUES (?, ?, ?, ?);", notes
+        )
+        conn.executemany(
+            "INSERT INTO study_records (word, is_correct, created_at) VALUES (?, ?, datetime('now', ?));",
+            [
+                (rng.choice(vocab)[0], rng.random() < 0.7, f"-{rng.randint(0, 90 * 24 * 60)} minutes")
+                for _ in range(words * STUDY_RECORDS_PER_WORD)
+            ],
+        )
+        conn.commit()
+
+        # 全文索引、读音索引、按天统计、调度表等派生数据由后续迁移回填
+        migrate(conn)
+    finally:
+        conn.close()
+
+    if build_pool:
+        from src.core.quiz_distractors import build_distractors
+
+        # 单进程构建 + 固定种子，保证干扰项池可复现
+        random.seed(seed)
+        build_distractors(path, workers=1)
+    return path
+
+
+def fixture_path(words: int = DEFAULT_WORDS, seed: int = DEFAULT_SEED) -> str:
+    return os.path.join(tempfile.gettempdir(), f"japanese_learning_bench_{words}_{seed}.db")
+
+
+def ensure_fixture(words: int = DEFAULT_WORDS, seed: int = DEFAULT_SEED, rebuild: bool = False,
+                   path: Optional[str] = None) -> str:
+    """返回夹具数据库路径；不存在（或 rebuild=True）时生成。"""
+    path = path or fixture_path(words, seed)
+    if rebuild or not os.path.exists(path):
+        start = time.perf_counter()
+        generate_fixture(path, words=words, seed=seed)
+        print(f"夹具数据库已生成：{path}（{words} 个单词，用时 {time.perf_counter() - start:.1f}s）")
+    return path
@@ -0,0 +1,378 @@
+"""HTTP 压测：模拟多名学习者并发使用 web_app，统计各接口的吞吐、延迟、错误率与「database is locked」次数。
+
+用法（在工程根目录执行）：
+    python -m benchmarks.loadtest                               # 在本进程内启动服务，并发 1/4/16 各跑 10 秒
+    python -m benchmarks.loadtest --concurrency 8,32 --duration 30
+    python -m benchmarks.loadtest --url http://127.0.0.1:5000   # 压测已在运行的服务（不使用夹具数据库）
+
+不指定 --url 时使用 benchmarks/fixture.py 生成的夹具数据库副本，
+在本进程内用 werkzeug 多线程服务器启动 web_app，压测结束后关闭，不需要任何外部服务。
+每名学习者重复执行一轮完整的学习会话（见 LearnerSession），各自使用由种子决定的随机数，
+结果打印为表格并写入 benchmarks/results/loadtest.json。
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.fixture import DEFAULT_SEED, DEFAULT_WORDS, ensure_fixture
+from src.database.sqlite_pool import DB_PATH_ENV
+
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+DEFAULT_CONCURRENCY = "1,4,16"
+DEFAULT_DURATION = 10.0      # 每个并发级别的持续时间（秒）
+REQUEST_TIMEOUT = 30.0
+QUIZ_SIZE = 10
+CORRECT_RATE = 0.7           # 模拟作答的正确率
+LOCKED_MESSAGE = "database is locked"
+
+
+class EndpointStats:
+    """单个接口的延迟样本与计数（由 LoadStats 加锁保护）。"""
+
+    __slots__ = ("latencies", "errors", "locked")
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.locked = 0
+
+
+class LoadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.sessions = 0
+        self.server_locked = 0   # 服务端日志中出现的 locked（如写线程提交失败），不对应具体请求
+
+    def record(self, endpoint: str, elapsed: float, ok: bool, locked: bool) -> None:
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.latencies.append(elapsed)
+            if not ok:
+                stats.errors += 1
+            if locked:
+                stats.locked += 1
+
+    def session_done(self) -> None:
+        with self._lock:
+            self.sessions += 1
+
+
+class LockedLogCounter(logging.Handler):
+    """统计服务端日志里的「database is locked」（本进程内启动服务时挂在 src / web_app 日志上）。"""
+
+    def __init__(self, stats: LoadStats):
+        super().__init__(logging.WARNING)
+        self.stats = stats
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if LOCKED_MESSAGE in record.getMessage():
+            with self.stats._lock:
+                self.stats.server_locked += 1
+
+
+class LearnerSession:
+    """一名学习者的一轮会话：
+
+    打开首页（今日统计）→ 浏览课次与某课单词 → 日文/中文搜索 → 出题
+    → 批量提交作答记录 → 把答错的单词加入错题本。
+    GET 请求像浏览器一样带 If-None-Match，304 视为成功。
+    """
+
+    def __init__(self, base_url: str, stats: LoadStats, rng: random.Random,
+                 lessons: List[str], keywords: List[Tuple[str, str]], think_time: float = 0.0):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.rng = rng
+        self.lessons = lessons
+        self.keywords = keywords
+        self.think_time = think_time
+        self._etags: Dict[str, str] = {}
+
+    def _request(self, method: str, path: str, endpoint: str, params: Optional[Dict] = None,
+                 payload: Optional[Dict] = None) -> Optional[Dict]:
+        url = self.base_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        headers = {"Accept": "application/json"}
+        data = None
+        if payload is not None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if method == "GET" and url in self._etags:
+            headers["If-None-Match"] = self._etags[url]
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+
+        started = time.perf_counter()
+        body, ok, locked = None, False, False
+        try:
+            with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as resp:
+                raw = resp.read()
+                etag = resp.headers.get("ETag")
+                if etag:
+                    self._etags[url] = etag
+            body = json.loads(raw) if raw else None
+            ok = not (isinstance(body, dict) and body.get("ok") is False)
+        except urllib.error.HTTPError as e:
+            raw = e.read()
+            ok = e.code == 304
+            locked = LOCKED_MESSAGE in raw.decode("utf-8", "replace")
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            locked = LOCKED_MESSAGE in str(e)
+        elapsed = time.perf_counter() - started
+
+        if isinstance(body, dict) and LOCKED_MESSAGE in str(body.get("message", "")):
+            locked = True
+        self.stats.record(endpoint, elapsed, ok, locked)
+        return body
+
+    def _think(self) -> None:
+        if self.think_time > 0:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.think_time)
+
+    def run_once(self) -> None:
+        rng = self.rng
+        self._request("GET", "/api/today_stats", "GET /api/today_stats")
+        self._request("GET", "/api/lessons", "GET /api/lessons")
+        self._think()
+
+        lesson = rng.choice(self.lessons)
+        self._request("GET", "/api/lesson_words", "GET /api/lesson_words", params={"lesson": lesson})
+        self._think()
+
+        jp_keyword, zh_keyword = rng.choice(self.keywords)
+        self._request("GET", "/api/search", "GET /api/search?type=jp", params={"type": "jp", "keyword": jp_keyword})
+        self._request("GET", "/api/search", "GET /api/search?type=zh", params={"type": "zh", "keyword": zh_keyword})
+        self._think()
+
+        # 出题页的课次输入是数字（如 "3"、"1-5"），与课次列表的「第3课」写法不同
+        quiz_lesson = re.sub(r"\D", "", lesson) or "all"
+        quiz = self._request("POST", "/api/quiz", "POST /api/quiz",
+                             payload={"lesson": quiz_lesson, "count": str(QUIZ_SIZE)})
+        questions = quiz.get("questions", []) if isinstance(quiz, dict) else []
+        self._think()
+
+        if questions:
+            answers = [(q["word"], rng.random() < CORRECT_RATE) for q in questions]
+            self._request("POST", "/api/study/record", "POST /api/study/record", payload={
+                "records": [{"word": word, "is_correct": correct} for word, correct in answers]
+            })
+            wrong = [word for word, correct in answers if not correct]
+            if wrong:
+                self._request("POST", "/api/quiz/wrong", "POST /api/quiz/wrong", payload={"words": wrong})
+        self.stats.session_done()
+        self._think()
+
+
+def _get_json(base_url: str, path: str, params: Optional[Dict] = None) -> Dict:
+    url = base_url.rstrip("/") + path + ("?" + urllib.parse.urlencode(params) if params else "")
+    with urllib.request.urlopen(url, timeout=REQUEST_TIMEOUT) as resp:
+        return json.loads(resp.read())
+
+
+def session_material(base_url: str, seed: int) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """通过接口取课次列表与单词，按种子挑出搜索关键词 (日文, 中文)。"""
+    lessons = _get_json(base_url, "/api/lessons").get("lessons") or ["all"]
+    words = _get_json(base_url, "/api/lesson_words", {"lesson": "all"}).get("results") or []
+    rng = random.Random(seed)
+    picks = rng.sample(words, min(len(words), 50))
+    keywords = [(w["hiragana"][:2] or w["word"][:2], (w["meaning"] or "")[:2] or w["word"][:1]) for w in picks]
+    return lessons, keywords or [("あ", "学")]
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(stats: LoadStats, elapsed: float) -> Dict:
+    endpoints = {}
+    total_requests = total_errors = total_locked = 0
+    for name, ep in sorted(stats.endpoints.items()):
+        latencies = sorted(ep.latencies)
+        count = len(latencies)
+        total_requests += count
+        total_errors += ep.errors
+        total_locked += ep.locked
+        endpoints[name] = {
+            "requests": count,
+            "rps": round(count / elapsed, 1),
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+            "errors": ep.errors,
+            "error_rate": round(ep.errors / count * 100, 2),
+            "locked": ep.locked,
+        }
+    return {
+        "duration_s": round(elapsed, 2),
+        "sessions": stats.sessions,
+        "requests": total_requests,
+        "rps": round(total_requests / elapsed, 1),
+        "errors": total_errors,
+        "locked": total_locked,
+        "server_locked": stats.server_locked,
+        "endpoints": endpoints,
+    }
+
+
+def run_level(base_url: str, concurrency: int, duration: float, seed: int, think_time: float,
+              lessons: List[str], keywords: List[Tuple[str, str]],
+              log_loggers: Tuple[str, ...] = ()) -> Dict:
+    """以 concurrency 名学习者持续压测 duration 秒（进行中的会话跑完本轮再退出）。"""
+    stats = LoadStats()
+    handler = LockedLogCounter(stats)
+    for name in log_loggers:
+        logging.getLogger(name).addHandler(handler)
+
+    deadline = time.monotonic() + duration
+
+    def learner(index: int) -> None:
+        session = LearnerSession(base_url, stats, random.Random(seed * 1000 + index), lessons, keywords, think_time)
+        while time.monotonic() < deadline:
+            session.run_once()
+
+    threads = [threading.Thread(target=learner, args=(i,), name=f"learner-{i}", daemon=True)
+               for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    for name in log_loggers:
+        logging.getLogger(name).removeHandler(handler)
+    return summarize(stats, elapsed)
+
+
+def print_level(concurrency: int, result: Dict) -> None:
+    print(f"\n并发 {concurrency}：{result['sessions']} 轮会话，{result['requests']} 个请求，"
+          f"{result['rps']:.1f} req/s，错误 {result['errors']}，locked {result['locked']}"
+          f"（服务端日志 {result['server_locked']}）")
+    print(f"  {'接口':<28} {'请求':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'错误率':>7} {'locked':>7}")
+    for name, ep in result["endpoints"].items():
+        print(f"  {name:<30} {ep['requests']:>7} {ep['rps']:>8.1f} {ep['p50_ms']:>9.2f} {ep['p95_ms']:>9.2f} "
+              f"{ep['p99_ms']:>9.2f} {ep['error_rate']:>6.2f}% {ep['locked']:>7}")
+
+
+class InProcessServer:
+    """在本进程内用 werkzeug 多线程服务器启动 web_app（端口由系统分配）。"""
+
+    def __init__(self, db_path: str):
+        os.environ[DB_PATH_ENV] = db_path
+        from werkzeug.serving import make_server
+
+        from src.core import vocabulary_snapshot
+        from web_app import DB_POOL, WRITE_QUEUE, app
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)   # 不逐条打印访问日志
+        with DB_POOL.connection() as conn:
+            # 与正式启动一致：先完成结构迁移并载入词库快照，避免计入第一个请求
+            vocabulary_snapshot.preload(conn, DB_POOL.db_path)
+        self.write_queue = WRITE_QUEUE
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="loadtest-server", daemon=True)
+
+    def __enter__(self) -> "InProcessServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self._thread.join()
+        self.write_queue.flush()
+
+
+def _scratch_copy(fixture: str) -> str:
+    scratch = fixture + ".load"
+    for ext in ("", "-wal", "-shm"):
+        if os.path.exists(scratch + ext):
+            os.remove(scratch + ext)
+    shutil.copyfile(fixture, scratch)
+    return scratch
+
+
+def run(levels: List[int], duration: float, seed: int, think_time: float, url: Optional[str] = None,
+        words: int = DEFAULT_WORDS, rebuild_fixture: bool = False) -> Dict:
+    meta = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": seed,
+        "duration": duration,
+        "think_time": think_time,
+    }
+    results = {}
+    if url:
+        meta["url"] = url
+        lessons, keywords = session_material(url, seed)
+        for concurrency in levels:
+            results[str(concurrency)] = run_level(url, concurrency, duration, seed, think_time, lessons, keywords)
+            print_level(concurrency, results[str(concurrency)])
+        return {"meta": meta, "levels": results}
+
+    # 写入会修改数据库：在夹具副本上压测，夹具本身保持不变
+    scratch = _scratch_copy(ensure_fixture(words, seed, rebuild=rebuild_fixture))
+    meta["words"] = words
+    with InProcessServer(scratch) as server:
+        lessons, keywords = session_material(server.url, seed)
+        for concurrency in levels:
+            results[str(concurrency)] = run_level(server.url, concurrency, duration, seed, think_time,
+                                                  lessons, keywords, log_loggers=("src", "web_app"))
+            server.write_queue.flush()   # 上一级别积压的写入不计入下一级别
+            print_level(concurrency, results[str(concurrency)])
+    return {"meta": meta, "levels": results}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="web_app 并发压测")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY, help="并发学习者数，逗号分隔的多个级别")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="每个并发级别的持续秒数")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="两步操作之间的平均停顿（毫秒）")
+    parser.add_argument("--url", help="压测已在运行的服务，不在本进程内启动")
+    parser.add_argument("--words", type=int, default=DEFAULT_WORDS, help="夹具词库大小")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="随机数种子")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "loadtest.json"), help="结果 JSON 路径")
+    parser.add_argument("--rebuild-fixture", action="store_true", help="重新生成夹具数据库")
+    args = parser.parse_args()
+
+    try:
+        levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+    except ValueError:
+        parser.error("--concurrency 应为逗号分隔的整数，如 1,4,16")
+    if not levels or min(levels) < 1:
+        parser.error("--concurrency 至少为 1")
+
+    report = run(levels, args.duration, args.seed, args.think_ms / 1000, args.url, args.words, args.rebuild_fixture)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
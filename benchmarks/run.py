@@ -0,0 +1,243 @@
+"""热点路径基准测试：出题、搜索、课次列表、批量学习记录。
+
+用法（在工程根目录执行）：
+    python -m benchmarks.run                                  # 跑全部用例，结果写入 benchmarks/results/latest.json
+    python -m benchmarks.run --only search                    # 只跑名称包含 search 的用例
+    python -m benchmarks.run --output benchmarks/results/base.json
+    python -m benchmarks.run --baseline benchmarks/results/base.json   # 与基线对比，p50 变慢超过阈值时返回 1
+
+每个用例先预热，再计时 iterations 次，报告 ops/sec、p50/p99 延迟（毫秒）与每次操作执行的 SQL 条数。
+随机数种子固定，夹具数据库由 benchmarks/fixture.py 按种子生成，多次运行之间可直接比较。
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.fixture import DEFAULT_SEED, DEFAULT_WORDS, ensure_fixture
+from src.core.lesson_words import _query_words_by_lessons, iter_words_by_lessons
+from src.core.quiz_distractors import draw_quiz_questions, questions_for_words
+from src.core.random_kana import SQLiteDB, count_queries, generate_question
+from src.core.scheduler import select_quiz_words
+from src.core.search import search_words
+from src.core.study_record import record_study_batch
+from src.core.vocabulary_store import get_vocabulary_store
+from src.database.sqlite_pool import get_pool
+
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+DEFAULT_ITERATIONS = 200
+WARMUP_ITERATIONS = 10
+DEFAULT_THRESHOLD = 20.0   # 与基线相比 p50 变慢超过该百分比视为退化
+QUIZ_SIZE = 10
+STUDY_BATCH_SIZE = 20
+KEYWORD_COUNT = 20
+
+LESSON_RANGES = {
+    "lesson1": "第1课",
+    "lesson1-10": [f"第{i}课" for i in range(1, 11)],
+    "all": "all",
+}
+
+
+def _live_questions(conn: sqlite3.Connection, lesson_pattern, count: int) -> List[Dict]:
+    """实时出题路径（干扰项池不可用时的回退逻辑）：取全部候选词，打乱后逐个生成。"""
+    words = SQLiteDB.query_valid_words(conn, lesson_pattern)
+    random.shuffle(words)
+    questions = []
+    for word, hira in words:
+        if len(questions) >= count:
+            break
+        question = generate_question(conn, word, hira)
+        if question:
+            questions.append(question)
+    return questions
+
+
+def _review_questions(conn: sqlite3.Connection, lesson_pattern, count: int) -> List[Dict]:
+    return questions_for_words(conn, select_quiz_words(conn, lesson_pattern, count), count)
+
+
+def _keywords(conn: sqlite3.Connection, rng: random.Random) -> Dict[str, List[str]]:
+    """从夹具词库中按种子挑选搜索关键词。"""
+    rows = conn.execute("SELECT word, hiragana, meaning FROM vocabulary ORDER BY id;").fetchall()
+    picks = [rng.choice(rows) for _ in range(KEYWORD_COUNT)]
+    return {
+        "jp_kana": [hira[:2] for _, hira, _ in picks],
+        "jp_text": [word[:3] for word, _, _ in picks],
+        "jp_romaji": [rng.choice(["ka", "shi", "tsu", "na", "mo", "ryo", "kya", "n"]) for _ in picks],
+        "zh": [meaning[:2] for _, _, meaning in picks],
+    }
+
+
+def _words_by_lessons(conn: sqlite3.Connection, lesson_input) -> List:
+    """同 get_words_by_lessons，但词库关闭时绕过查询缓存，每次都查询 SQLite。"""
+    store = get_vocabulary_store(conn)
+    if store is not None:
+        return store.words_by_lessons(lesson_input, True)
+    return _query_words_by_lessons.uncached(conn, lesson_input, True)
+
+
+def build_cases(conn: sqlite3.Connection, seed: int) -> Dict[str, Callable[[int], object]]:
+    """用例名称 → 单次操作 op(i)。"""
+    cases: Dict[str, Callable[[int], object]] = {}
+    for label, pattern in LESSON_RANGES.items():
+        cases[f"quiz.generate.{label}"] = lambda i, p=pattern: _live_questions(conn, p, QUIZ_SIZE)
+        cases[f"quiz.draw.{label}"] = lambda i, p=pattern: draw_quiz_questions(conn, p, QUIZ_SIZE)
+        cases[f"quiz.review.{label}"] = lambda i, p=pattern: _review_questions(conn, p, QUIZ_SIZE)
+
+    keywords = _keywords(conn, random.Random(seed))
+    for kind, words in keywords.items():
+        query_type = "zh" if kind == "zh" else "jp"
+        cases[f"search.{kind}"] = lambda i, w=words, t=query_type: search_words.uncached(
+            conn, w[i % len(w)], t, 100, with_favorite=True
+        )
+
+    cases["lessons.single"] = lambda i: _words_by_lessons(conn, "第3课")
+    cases["lessons.all"] = lambda i: _words_by_lessons(conn, "all")
+    cases["lessons.page"] = lambda i: list(
+        iter_words_by_lessons(conn, "all", after=(i % 40 + 1, 0), limit=100, with_favorite=True)
+    )
+
+    study_words = [row[0] for row in conn.execute("SELECT word FROM vocabulary ORDER BY id LIMIT 500;")]
+    cases["study.record_batch"] = lambda i: record_study_batch(
+        conn,
+        [(study_words[(i * STUDY_BATCH_SIZE + k) % len(study_words)], k % 3 != 0) for k in range(STUDY_BATCH_SIZE)],
+    )
+    return cases
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(conn: sqlite3.Connection, op: Callable[[int], object], iterations: int, seed: int) -> Dict[str, float]:
+    """预热后逐次计时；SQL 条数单独用一轮带 trace 的执行统计，避免影响计时。"""
+    random.seed(seed)
+    for i in range(WARMUP_ITERATIONS):
+        op(i)
+
+    timings = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        op(i)
+        timings.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    count_runs = min(iterations, 20)
+    with count_queries(conn) as counter:
+        for i in range(count_runs):
+            op(i)
+
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / elapsed, 1),
+        "p50_ms": round(_percentile(timings, 50) * 1000, 4),
+        "p99_ms": round(_percentile(timings, 99) * 1000, 4),
+        "mean_ms": round(elapsed / iterations * 1000, 4),
+        "queries_per_op": round(counter.count / count_runs, 1),
+    }
+
+
+def run(words: int, seed: int, iterations: int, only: Optional[str] = None,
+        rebuild_fixture: bool = False) -> Dict:
+    fixture = ensure_fixture(words, seed, rebuild=rebuild_fixture)
+    # 写入类用例会修改数据库，在副本上运行，夹具本身保持不变
+    scratch = fixture + ".run"
+    for ext in ("", "-wal", "-shm"):
+        if os.path.exists(scratch + ext):
+            os.remove(scratch + ext)
+    shutil.copyfile(fixture, scratch)
+
+    pool = get_pool(scratch)
+    conn = pool.acquire()
+    results = {}
+    try:
+        cases = build_cases(conn, seed)
+        for index, (name, op) in enumerate(cases.items()):
+            if only and only not in name:
+                continue
+            results[name] = measure(conn, op, iterations, seed + index)
+            r = results[name]
+            print(f"{name:<26} {r['ops_per_sec']:>10.1f} ops/s  p50 {r['p50_ms']:>9.3f} ms  "
+                  f"p99 {r['p99_ms']:>9.3f} ms  {r['queries_per_op']:>7.1f} SQL/op")
+    finally:
+        pool.release(conn)
+        pool.close_all()
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "words": words,
+            "seed": seed,
+            "iterations": iterations,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """逐项对比 p50，打印变化；返回变慢超过阈值的用例名。"""
+    regressions = []
+    print(f"\n与基线对比（{baseline['meta'].get('timestamp', '?')}，阈值 {threshold:.0f}%）：")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"  {name:<26} （基线中没有该用例）")
+            continue
+        change = (result["p50_ms"] - base["p50_ms"]) / base["p50_ms"] * 100 if base["p50_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  ⚠ 变慢"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  ✓ 变快"
+        print(f"  {name:<26} p50 {base['p50_ms']:>9.3f} → {result['p50_ms']:>9.3f} ms ({change:+6.1f}%)  "
+              f"SQL/op {base['queries_per_op']} → {result['queries_per_op']}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="出题/搜索/列表/学习记录的基准测试")
+    parser.add_argument("--words", type=int, default=DEFAULT_WORDS, help="夹具词库大小")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="随机数种子")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="每个用例的计时次数")
+    parser.add_argument("--only", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"), help="结果 JSON 路径")
+    parser.add_argument("--baseline", help="基线结果 JSON，用于对比")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="判定退化的 p50 变慢百分比")
+    parser.add_argument("--rebuild-fixture", action="store_true", help="重新生成夹具数据库")
+    args = parser.parse_args()
+
+    report = run(args.words, args.seed, args.iterations, args.only, args.rebuild_fixture)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
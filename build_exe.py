@@ -68,6 +68,37 @@ def build_exe():
         print(f"\n❌ 打包失败: {e}")
         return False
 
+def build_distractor_pool():
+    """增量构建出题用的干扰项池（quiz_distractors 表），随数据库一起分发"""
+    db_file = "japanese_learning.db"
+    if not os.path.exists(db_file):
+        return
+    try:
+        from src.core.quiz_distractors import build_distractors
+        built = build_distractors(db_file, incremental=True)
+        print(f"✓ 干扰项池已更新，重算 {built} 个单词")
+    except Exception as e:
+        print(f"⚠ 干扰项池构建失败（运行时将回退到实时出题）: {e}")
+
+def build_vocabulary_snapshot():
+    """生成词库快照（与数据库一起分发，程序启动时直接映射，不必重新读取整个词库）"""
+    db_file = "japanese_learning.db"
+    if not os.path.exists(db_file):
+        return
+    try:
+        import sqlite3
+        from src.core.vocabulary_snapshot import build_snapshot, snapshot_path
+        from src.database.migrations import migrate
+        conn = sqlite3.connect(db_file)
+        try:
+            migrate(conn)
+            meta = build_snapshot(conn, snapshot_path(db_file))
+        finally:
+            conn.close()
+        print(f"✓ 词库快照已生成：{meta['rows']} 个单词，{meta['eligible']} 个可出题单词")
+    except Exception as e:
+        print(f"⚠ 词库快照生成失败（程序启动时会自动生成）: {e}")
+
 def copy_database():
     """复制数据库文件到dist目录（如果存在）"""
     db_file = "japanese_learning.db"
@@ -93,6 +124,11 @@ def copy_database():
         if not os.path.exists(target_db):
             shutil.copy2(db_file, target_db)
             print(f"✓ 已复制数据库文件到: {target_db}")
+            # 快照与数据库配套：只在复制数据库时一起复制（已有数据库时由程序启动时重建）
+            snapshot_file = os.path.splitext(db_file)[0] + ".snapshot"
+            if os.path.exists(snapshot_file):
+                shutil.copy2(snapshot_file, os.path.splitext(target_db)[0] + ".snapshot")
+                print(f"✓ 已复制词库快照: {snapshot_file}")
         else:
             print(f"ℹ 数据库文件已存在: {target_db}")
 
@@ -157,7 +193,9 @@ def main():
     
     # 执行打包
     if build_exe():
-        # 复制数据库文件
+        # 更新干扰项池后复制数据库文件
+        build_distractor_pool()
+        build_vocabulary_snapshot()
         copy_database()
         
         # 创建使用说明
@@ -170,6 +208,7 @@ def main():
         print("请将以下文件一起分发：")
         print("  - 日语学习系统.exe")
         print("  - japanese_learning.db (如果存在)")
+        print("  - japanese_learning.snapshot (词库快照，可选，缺失时程序自动生成)")
         print("  - 使用说明.txt")
         print("\n注意：数据库文件包含学习数据，请妥善保管！")
     else:
@@ -14,6 +14,7 @@ a = Analysis(
     ],
     hiddenimports=[
         'flask',
+        'waitress',
         'sqlite3',
         'src',
         'src.core',
@@ -23,13 +24,33 @@ a = Analysis(
         'src.core.study_record',
         'src.core.find_word',
         'src.core.test',
+        'src.core.quiz_distractors',
+        'src.core.search',
+        'src.core.kana_normalize',
+        'src.core.data_version',
+        'src.core.query_cache',
+        'src.core.scheduler',
+        'src.core.app_logging',
+        'src.core.metrics',
+        'src.core.serving',
+        'src.core.question_prefetch',
+        'src.core.vocabulary_store',
+        'src.core.vocabulary_snapshot',
+        'src.core.startup_profile',
+        'src.database',
+        'src.database.sqlite_pool',
+        'src.database.migrations',
+        'src.database.write_queue',
+        'src.database.timed_connection',
+        'src.database.sql_trace',
         'werkzeug',
         'jinja2',
     ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Web 服务用不到的依赖（MySQL 连接、Word 文档导入等工具脚本才需要），不打进单文件程序，减少启动时的解压量
+    excludes=['mysql', 'mysql.connector', 'dotenv', 'docx', 'lxml', 'tkinter'],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
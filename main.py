@@ -1,7 +1,8 @@
 # 导入部分（确保包含 get_db_connection）
 from src.core import test
+from src.core.app_logging import configure_logging
 from src.core import find_word
-from src.core.find_word import get_db_connection  
+from src.core.find_word import get_db_connection, release_db_connection
 from src.core.lesson_words import get_lessons, get_words_by_lessons
 
 
@@ -46,7 +47,7 @@ def run_lesson_view():
             if cont != 'y':
                 return
     finally:
-        conn.close()
+        release_db_connection(conn)
 
 
 def main():
@@ -70,7 +71,7 @@ def main():
             conn = get_db_connection()
             if conn:
                 find_word.find_word(conn)  # 关键：传入 connection 参数
-                conn.close()  # 关闭连接（重要）
+                release_db_connection(conn)  # 归还连接（重要）
             else:
                 print("❌ 数据库连接失败，无法查找词汇！")
         elif choice == '3':
@@ -82,4 +83,5 @@ def main():
             print("❌ 无效选项，请重新输入！")
 
 if __name__ == "__main__":
+    configure_logging()
     main()
\ No newline at end of file
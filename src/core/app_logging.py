@@ -0,0 +1,48 @@
+"""日志配置：各模块用 logging.getLogger(__name__) 记录日志，默认只输出 WARNING 及以上。
+
+调试信息改由环境变量开启（不再在代码里写死 DEBUG_MODE）：
+    JAPANESE_LEARNING_LOG_LEVEL=DEBUG python web_app.py
+可选级别：DEBUG / INFO / WARNING / ERROR / OFF。
+"""
+import logging
+import os
+import sys
+import threading
+from typing import Optional
+
+LOG_LEVEL_ENV = "JAPANESE_LEARNING_LOG_LEVEL"
+DEFAULT_LOG_LEVEL = "WARNING"
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+# 本工程的日志命名空间（src.* 模块、web_app、基准测试脚本）
+LOGGER_NAMES = ("src", "web_app", "benchmarks")
+
+_configured = False
+_lock = threading.Lock()
+
+
+def _parse_level(level: Optional[str]) -> int:
+    name = (level or os.environ.get(LOG_LEVEL_ENV) or DEFAULT_LOG_LEVEL).strip().upper()
+    if name == "OFF":
+        return logging.CRITICAL + 1
+    value = logging.getLevelName(name)
+    return value if isinstance(value, int) else logging.WARNING
+
+
+def configure_logging(level: Optional[str] = None) -> int:
+    """为工程日志挂上 stderr 输出并设置级别（重复调用只更新级别），返回生效的级别。
+
+    level 为 None 时读取环境变量 JAPANESE_LEARNING_LOG_LEVEL。
+    """
+    global _configured
+    value = _parse_level(level)
+    with _lock:
+        for name in LOGGER_NAMES:
+            logger = logging.getLogger(name)
+            logger.setLevel(value)
+            if not _configured:
+                handler = logging.StreamHandler(sys.stderr)
+                handler.setFormatter(logging.Formatter(LOG_FORMAT))
+                logger.addHandler(handler)
+                logger.propagate = False
+        _configured = True
+    return value
@@ -0,0 +1,26 @@
+import sqlite3
+from typing import Dict
+
+TABLE_DATA_VERSIONS = "data_versions"
+
+
+def get_data_versions(conn: sqlite3.Connection) -> Dict[str, int]:
+    """读取各表的内容版本号（由触发器维护，表内容变化时递增）。"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT name, version FROM {TABLE_DATA_VERSIONS};")
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def bump_data_version(conn: sqlite3.Connection, name: str) -> None:
+    """手动递增版本号（批量写入绕过触发器时调用；不提交）。"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"UPDATE {TABLE_DATA_VERSIONS} SET version = version + 1 WHERE name = ?;",
+            (name,),
+        )
+    finally:
+        cursor.close()
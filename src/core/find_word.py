@@ -1,6 +1,8 @@
-import sqlite3
+"""终端查词。单独运行时在工程根目录执行：python -m src.core.find_word"""
 from sqlite3 import Error
-import os
+
+from src.core.search import search_words
+from src.database.sqlite_pool import get_pool, resolve_db_path
 
 
 def find_word(connection):  # 查找单词
@@ -22,10 +24,8 @@ def find_word(connection):  # 查找单词
 
                 # 数据库操作
                 try:
-                    cursor = connection.cursor()
-                    # 使用SQLite占位符 ? 替代MySQL的 %s
-                    cursor.execute("SELECT word, hiragana, meaning, lesson FROM vocabulary WHERE word LIKE ?", (f'%{word}%',))
-                    results = cursor.fetchall()
+                    # 与网页搜索共用全文索引，结果按相关度排序
+                    results = search_words(connection, word, "jp", limit=None)
 
                     print("查询结果：")
                     if results:
@@ -34,12 +34,9 @@ def find_word(connection):  # 查找单词
                             print("-" * 40)
                     else:
                         print("未找到相关结果。")
-                    cursor.close()
 
                 except Error as e:
                     print(f"数据库查询错误：{e}")
-                    if 'cursor' in locals():  # 确保游标关闭
-                        cursor.close()
                 
                 
             # 中文查询
@@ -51,10 +48,7 @@ def find_word(connection):  # 查找单词
 
                 # 数据库操作
                 try:
-                    cursor = connection.cursor()
-                    # 使用SQLite占位符 ? 替代MySQL的 %s，并修复重复的lesson字段
-                    cursor.execute("SELECT word, hiragana, meaning, lesson FROM vocabulary WHERE meaning LIKE ?", (f'%{meaning}%',))
-                    results = cursor.fetchall()
+                    results = search_words(connection, meaning, "zh", limit=None)
 
                     print("查询结果：")
                     if results:
@@ -63,12 +57,9 @@ def find_word(connection):  # 查找单词
                             print("-" * 40)
                     else:
                         print("未找到相关结果。")
-                    cursor.close()
 
                 except Error as e:
                     print(f"数据库查询错误：{e}")
-                    if 'cursor' in locals():  # 确保游标关闭
-                        cursor.close()
                         
             # 询问是否继续查询
             continue_search = input("是否继续查询？(y/n): ").strip().lower()
@@ -80,18 +71,9 @@ def find_word(connection):  # 查找单词
 
 
 def get_db_connection():
-    """获取SQLite数据库连接"""
+    """获取SQLite数据库连接（从连接池借用，用完调用 release_db_connection 归还）"""
     try:
-        # 支持PyInstaller打包后的路径处理
-        import sys
-        if getattr(sys, 'frozen', False):
-            # 打包后的可执行文件：数据库放在可执行文件所在目录
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            # 开发环境：数据库放在当前工作目录
-            base_dir = os.getcwd()
-        db_path = os.path.join(base_dir, 'japanese_learning.db')
-        connection = sqlite3.connect(db_path)
+        connection = get_pool(resolve_db_path()).acquire()
         print("成功连接到SQLite数据库")
         return connection
     except Error as e:
@@ -99,12 +81,17 @@ def get_db_connection():
     return None
 
 
+def release_db_connection(connection):
+    """归还 get_db_connection 借出的连接"""
+    get_pool(resolve_db_path()).release(connection)
+
+
 def main():
     connection = get_db_connection()
     if connection:
         find_word(connection)
-        connection.close()
-        print("数据库连接已关闭")
+        release_db_connection(connection)
+        print("数据库连接已归还")
 
 
 if __name__ == "__main__":
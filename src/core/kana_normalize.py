@@ -0,0 +1,199 @@
+"""读音归一化：把平假名 / 片假名 / 半角片假名 / 罗马字统一成平假名，供读音索引与搜索使用。
+
+罗马字 → 假名的对照来自 japanese_kana 表（平假名行的 romaji 列），
+拗音（きゃ 等）由「い段假名 + 小写ゃゅょ」推导。
+"""
+import logging
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.database.sqlite_pool import database_path
+
+logger = logging.getLogger(__name__)
+
+TABLE_KANA = "japanese_kana"
+TABLE_VOCABULARY = "vocabulary"
+
+_KATAKANA_START, _KATAKANA_END = 0x30A1, 0x30F6  # ァ..ヶ，与平假名相差 0x60
+_HIRAGANA_START, _HIRAGANA_END = 0x3041, 0x3096
+_SMALL_TSU = "っ"
+_NN = "ん"
+_VOWELS = "aeiou"
+_ROMAJI_MAX_LEN = 3
+
+# 训令式等常见别名 → japanese_kana 中使用的平文式拼写
+_ROMAJI_ALIASES = {
+    "si": "shi", "ti": "chi", "tu": "tsu", "hu": "fu", "zi": "ji", "di": "ji", "du": "zu",
+    "sya": "sha", "syu": "shu", "syo": "sho",
+    "tya": "cha", "tyu": "chu", "tyo": "cho",
+    "zya": "ja", "zyu": "ju", "zyo": "jo",
+    "jya": "ja", "jyu": "ju", "jyo": "jo",
+}
+# 拗音：い段假名 + 小写ゃゅょ；sh/ch/j 开头的省略 y
+_YOON_SMALL = (("ゃ", "a"), ("ゅ", "u"), ("ょ", "o"))
+_YOON_BARE_STEMS = ("sh", "ch", "j")
+
+
+def fold_kana(text: str) -> str:
+    """NFKC（半角片假名→全角）后把片假名折叠为平假名，英文转小写并去掉空白。"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if _KATAKANA_START <= code <= _KATAKANA_END:
+            out.append(chr(code - 0x60))
+        elif not ch.isspace():
+            out.append(ch)
+    return "".join(out)
+
+
+def is_reading(text: str) -> bool:
+    """是否只由平假名（及长音符ー）组成。"""
+    return bool(text) and all(
+        _HIRAGANA_START <= ord(ch) <= _HIRAGANA_END or ch == "ー" for ch in text
+    )
+
+
+class KanaNormalizer:
+    """只读的罗马字 → 平假名对照表。"""
+
+    __slots__ = ("_romaji",)
+
+    def __init__(self, rows: Iterable[Tuple[str, str, str]]):
+        romaji: Dict[str, str] = {}
+        i_row = []
+        for kana, kana_type, roma in rows:
+            if kana_type != "hiragana" or not kana or not roma:
+                continue
+            # 同音的两个假名（じ/ぢ、ず/づ）保留表中靠前的常用写法
+            romaji.setdefault(roma, kana)
+            if roma.endswith("i") and len(roma) > 1 and roma != "wi":
+                i_row.append((kana, roma[:-1]))
+        for kana, stem in i_row:
+            for small, vowel in _YOON_SMALL:
+                if stem in _YOON_BARE_STEMS:
+                    romaji.setdefault(stem + vowel, kana + small)
+                else:
+                    romaji.setdefault(stem + "y" + vowel, kana + small)
+        for alias, canonical in _ROMAJI_ALIASES.items():
+            if canonical in romaji:
+                romaji.setdefault(alias, romaji[canonical])
+        self._romaji = romaji
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "KanaNormalizer":
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT kana, type, romaji FROM {TABLE_KANA} ORDER BY id;")
+            return cls(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def romaji_to_kana(self, text: str) -> str:
+        """把字符串中的罗马字片段转写为平假名，其余字符原样保留。"""
+        out = []
+        i, n = 0, len(text)
+        while i < n:
+            ch = text[i]
+            if not ("a" <= ch <= "z"):
+                out.append("ー" if ch == "-" else ch)
+                i += 1
+                continue
+            nxt = text[i + 1] if i + 1 < n else ""
+            # 促音：双写辅音（kk、tt、tch…）
+            if ch not in _VOWELS and ch != "n" and (nxt == ch or (ch == "t" and nxt == "c")):
+                out.append(_SMALL_TSU)
+                i += 1
+                continue
+            # 拨音：n 后面不是元音/y，或写作 n'；黑本式在 b/p 前写作 m
+            if (ch == "n" and (not nxt or nxt == "'" or (nxt not in _VOWELS and nxt != "y"))) \
+                    or (ch == "m" and nxt in ("b", "p")):
+                out.append(_NN)
+                i += 2 if nxt == "'" else 1
+                continue
+            for size in range(_ROMAJI_MAX_LEN, 0, -1):
+                kana = self._romaji.get(text[i:i + size])
+                if kana:
+                    out.append(kana)
+                    i += size
+                    break
+            else:
+                out.append(ch)
+                i += 1
+        return "".join(out)
+
+    def normalize(self, text: str) -> str:
+        """归一化读音：假名折叠为平假名，罗马字转写为平假名。"""
+        return self.romaji_to_kana(fold_kana(text))
+
+
+_NORMALIZERS: Dict[str, KanaNormalizer] = {}     # 数据库文件路径 -> 罗马字对照表
+_NORMALIZER_LOCK = threading.Lock()
+
+
+def get_kana_normalizer(conn: sqlite3.Connection) -> KanaNormalizer:
+    """获取 conn 所在数据库的罗马字对照表；首次调用时用 conn 载入。"""
+    key = database_path(conn)
+    normalizer = _NORMALIZERS.get(key)
+    if normalizer is None:
+        with _NORMALIZER_LOCK:
+            normalizer = _NORMALIZERS.get(key)
+            if normalizer is None:
+                normalizer = _NORMALIZERS[key] = KanaNormalizer.load(conn)
+    return normalizer
+
+
+def reading_key(word: str, hiragana: Optional[str]) -> str:
+    """计算单词的归一化读音（写入 vocabulary.reading_norm）。"""
+    return fold_kana(hiragana if hiragana and hiragana.strip() else word)
+
+
+def refresh_reading_norm(conn: sqlite3.Connection, only_missing: bool = True) -> int:
+    """回填 vocabulary.reading_norm（只写值有变化的行），返回更新的行数（不提交，由调用方决定事务边界）。
+
+    only_missing=False 时重算所有行，用于修正被其他程序改过单词/读音而过期的值。
+    """
+    cursor = conn.cursor()
+    try:
+        where = "WHERE reading_norm IS NULL" if only_missing else ""
+        cursor.execute(f"SELECT id, word, hiragana, reading_norm FROM {TABLE_VOCABULARY} {where};")
+        updates = []
+        for vocab_id, word, hira, current in cursor.fetchall():
+            key = reading_key(word, hira)
+            if key != current:
+                updates.append((key, vocab_id))
+        cursor.executemany(f"UPDATE {TABLE_VOCABULARY} SET reading_norm = ? WHERE id = ?;", updates)
+        return len(updates)
+    finally:
+        cursor.close()
+
+
+def ensure_reading_norm(conn: sqlite3.Connection) -> int:
+    """读音查找前调用：有 reading_norm 为空的行时先回填并提交，返回回填的行数。
+
+    不经导入程序新增的单词、被改过单词/读音的行（触发器置空，见 migrations v12）reading_norm 为空，
+    不回填就查不到。检查走 idx_vocabulary_reading_norm（空值排在索引最前），没有空值时只是一次索引查找。
+    回填失败（如写锁被占用、只读连接）时记录日志并照常查询。
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT 1 FROM {TABLE_VOCABULARY} WHERE reading_norm IS NULL LIMIT 1;")
+        if cursor.fetchone() is None:
+            return 0
+    finally:
+        cursor.close()
+    in_transaction = conn.in_transaction
+    try:
+        updated = refresh_reading_norm(conn)
+        if not in_transaction:
+            conn.commit()
+    except sqlite3.Error as e:
+        if not in_transaction and conn.in_transaction:
+            conn.rollback()
+        logger.warning("回填 reading_norm 失败，本次搜索可能缺少部分单词：%s", e)
+        return 0
+    if updated:
+        logger.info("已回填 %d 个单词的 reading_norm", updated)
+    return updated
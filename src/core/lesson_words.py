@@ -1,12 +1,26 @@
 import sqlite3
 import re
-from typing import List, Tuple, Union
+from typing import Iterator, List, Optional, Tuple, Union
+
+from src.core.query_cache import cached_query
+from src.core.user_note import favorited_column
+from src.core.vocabulary_store import get_vocabulary_store
 
 TABLE_VOCABULARY = "vocabulary"
+FETCH_BATCH_SIZE = 500  # 流式读取时每次从游标取的行数
 
 
 def get_lessons(conn: sqlite3.Connection) -> List[str]:
     """获取所有存在单词的课次列表，并按数字顺序从第1课到第48课排序。"""
+    store = get_vocabulary_store(conn)
+    if store is not None:
+        return store.lessons()
+    return _query_lessons(conn)
+
+
+@cached_query("vocabulary")
+def _query_lessons(conn: sqlite3.Connection) -> List[str]:
+    """get_lessons 的 SQL 实现（进程内词库关闭时使用，结果按版本号缓存）。"""
     cursor = None
     try:
         cursor = conn.cursor()
@@ -46,32 +60,117 @@ def _normalize_lessons(lesson_input: Union[str, List[str]]) -> Union[str, List[s
     return s
 
 
+def _lesson_where(lesson_norm: Union[str, List[str]]) -> Tuple[str, tuple]:
+    if lesson_norm == "all":
+        return "1 = 1", ()
+    if isinstance(lesson_norm, list):
+        placeholders = ",".join(["?"] * len(lesson_norm))
+        return f"lesson IN ({placeholders})", tuple(lesson_norm)
+    return "lesson = ?", (lesson_norm,)
+
+
+def _favorite_select(with_favorite: bool) -> str:
+    return ", " + favorited_column("v") if with_favorite else ""
+
+
 def get_words_by_lessons(
     conn: sqlite3.Connection,
     lesson_input: Union[str, List[str]] = "all",
-) -> List[Tuple[str, str, str, str]]:
+    with_favorite: bool = False,
+) -> List[Tuple]:
     """按课次查询单词。
 
-    返回 (word, hiragana, meaning, lesson) 列表。
+    返回 (word, hiragana, meaning, lesson) 列表，按课次编号、录入顺序排列。
     lesson_input 可为："all" / "第3课" / ["第1课","第2课"]。
+    with_favorite=True 时每行末尾多一列「是否已收藏」（0/1）。
+    进程内词库可用时直接从内存取（见 vocabulary_store），否则查询 SQLite。
     """
     lesson_norm = _normalize_lessons(lesson_input)
+    store = get_vocabulary_store(conn)
+    if store is not None:
+        return store.words_by_lessons(lesson_norm, with_favorite)
+    return _query_words_by_lessons(conn, lesson_norm, with_favorite)
+
+
+@cached_query("vocabulary", "user_note")
+def _query_words_by_lessons(
+    conn: sqlite3.Connection,
+    lesson_norm: Union[str, List[str]],
+    with_favorite: bool,
+) -> List[Tuple]:
+    """get_words_by_lessons 的 SQL 实现（进程内词库关闭时使用，结果按版本号缓存）。"""
+    where, params = _lesson_where(lesson_norm)
     cursor = None
     try:
         cursor = conn.cursor()
-        if lesson_norm == "all":
-            sql = f"SELECT word, hiragana, meaning, lesson FROM {TABLE_VOCABULARY} ORDER BY lesson ASC, rowid ASC;"
-            cursor.execute(sql)
-        elif isinstance(lesson_norm, list):
-            placeholders = ",".join(["?"] * len(lesson_norm))
-            sql = f"SELECT word, hiragana, meaning, lesson FROM {TABLE_VOCABULARY} WHERE lesson IN ({placeholders}) ORDER BY lesson ASC, rowid ASC;"
-            cursor.execute(sql, tuple(lesson_norm))
-        else:
-            sql = f"SELECT word, hiragana, meaning, lesson FROM {TABLE_VOCABULARY} WHERE lesson = ? ORDER BY rowid ASC;"
-            cursor.execute(sql, (lesson_norm,))
+        cursor.execute(
+            f"SELECT word, hiragana, meaning, lesson{_favorite_select(with_favorite)} FROM {TABLE_VOCABULARY} v "
+            f"WHERE {where} ORDER BY lesson_no ASC, id ASC;",
+            params,
+        )
         return cursor.fetchall()
     finally:
         if cursor:
             cursor.close()
 
 
+def encode_cursor(lesson_no: int, vocab_id: int) -> str:
+    """分页游标：最后一行的 (lesson_no, id)。"""
+    return f"{lesson_no}:{vocab_id}"
+
+
+def parse_cursor(after: Optional[str]) -> Optional[Tuple[int, int]]:
+    """解析分页游标，格式不正确时视为从头开始。"""
+    if not after:
+        return None
+    parts = str(after).split(":")
+    if len(parts) != 2:
+        return None
+    try:
+        return int(parts[0]), int(parts[1])
+    except ValueError:
+        return None
+
+
+def iter_words_by_lessons(
+    conn: sqlite3.Connection,
+    lesson_input: Union[str, List[str]] = "all",
+    after: Optional[Tuple[int, int]] = None,
+    limit: Optional[int] = None,
+    with_favorite: bool = False,
+) -> Iterator[Tuple]:
+    """按课次流式读取单词（keyset 分页，走 idx_vocabulary_lesson_no）。
+
+    逐批从游标取行，不一次性 fetchall；产出 (word, hiragana, meaning, lesson, lesson_no, id)，
+    with_favorite=True 时末尾多一列「是否已收藏」。
+    after 为上一页最后一行的 (lesson_no, id)，limit=None 表示读到结尾。
+    进程内词库可用时按 (lesson_no, id) 二分定位后从内存读取。
+    """
+    lesson_norm = _normalize_lessons(lesson_input)
+    store = get_vocabulary_store(conn)
+    if store is not None:
+        yield from store.iter_words_by_lessons(lesson_norm, after, limit, with_favorite)
+        return
+    where, params = _lesson_where(lesson_norm)
+    if after is not None:
+        where += " AND (lesson_no, id) > (?, ?)"
+        params += tuple(after)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"""
+            SELECT word, hiragana, meaning, lesson, lesson_no, id{_favorite_select(with_favorite)}
+            FROM {TABLE_VOCABULARY} v
+            WHERE {where}
+            ORDER BY lesson_no ASC, id ASC
+            LIMIT ?;
+            """,
+            params + (-1 if limit is None else int(limit),),
+        )
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        cursor.close()
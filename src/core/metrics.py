@@ -0,0 +1,158 @@
+"""请求级指标：各路由的延迟直方图、进行中请求数、错误数与数据库耗时，以 Prometheus 文本格式导出。
+
+web_app 在 before_request / after_request 中调用 request_started / request_finished，
+/metrics 返回 render() 的结果。所有计数都在进程内存中，重启后清零。
+"""
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+METRIC_PREFIX = "japanese_learning"
+# 秒；覆盖从缓存命中（亚毫秒）到实时出题（数百毫秒）的范围
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+UNMATCHED_ROUTE = "<unmatched>"   # 404 等没有匹配到路由的请求统一归为一类，避免标签无限增长
+
+
+class Histogram:
+    """固定分桶的直方图（非线程安全，由 MetricsRegistry 加锁）。"""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        out, running = [], 0
+        for c in self.counts:
+            running += c
+            out.append(running)
+        return out
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """线程安全的指标集合。"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._db_time: Dict[Tuple[str, str], Histogram] = {}
+        self._db_statements: Dict[Tuple[str, str], int] = {}
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._in_flight = 0
+        # 渲染时才读取的外部数值：(名称, 类型, 说明, 取值函数)
+        self._callbacks: List[Tuple[str, str, str, Callable[[], float]]] = []
+
+    def request_started(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def request_finished(
+        self,
+        route: Optional[str],
+        method: str,
+        status: int,
+        duration: float,
+        db_time: float = 0.0,
+        db_statements: int = 0,
+    ) -> None:
+        key = (route or UNMATCHED_ROUTE, method)
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._latency.setdefault(key, Histogram(self.buckets)).observe(duration)
+            self._db_time.setdefault(key, Histogram(self.buckets)).observe(db_time)
+            self._db_statements[key] = self._db_statements.get(key, 0) + db_statements
+            status_key = key + (str(status),)
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+            if status >= 500:
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+    def register_callback(self, name: str, metric_type: str, help_text: str, func: Callable[[], float]) -> None:
+        """登记一个在导出时才取值的指标（如写入队列长度、缓存命中数）。"""
+        with self._lock:
+            self._callbacks.append((name, metric_type, help_text, func))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latency.clear()
+            self._db_time.clear()
+            self._db_statements.clear()
+            self._requests.clear()
+            self._errors.clear()
+
+    def _render_histogram(self, lines: List[str], name: str, help_text: str,
+                          data: Dict[Tuple[str, str], Histogram]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (route, method), hist in sorted(data.items()):
+            for bound, count in zip(hist.buckets, hist.cumulative()):
+                lines.append(f"{name}_bucket{_labels(route=route, method=method, le=repr(bound))} {count}")
+            lines.append(f"{name}_bucket{_labels(route=route, method=method, le='+Inf')} {hist.count}")
+            lines.append(f"{name}_sum{_labels(route=route, method=method)} {hist.total!r}")
+            lines.append(f"{name}_count{_labels(route=route, method=method)} {hist.count}")
+
+    def render(self) -> str:
+        """导出 Prometheus 文本格式（text/plain; version=0.0.4）。"""
+        p = METRIC_PREFIX
+        lines: List[str] = []
+        with self._lock:
+            self._render_histogram(lines, f"{p}_http_request_duration_seconds",
+                                   "HTTP 请求处理耗时（秒）", self._latency)
+            self._render_histogram(lines, f"{p}_http_request_db_seconds",
+                                   "单个请求内执行 SQL 与取结果的累计耗时（秒）", self._db_time)
+
+            lines.append(f"# HELP {p}_http_requests_total HTTP 请求数")
+            lines.append(f"# TYPE {p}_http_requests_total counter")
+            for (route, method, status), count in sorted(self._requests.items()):
+                lines.append(f"{p}_http_requests_total{_labels(route=route, method=method, status=status)} {count}")
+
+            lines.append(f"# HELP {p}_http_request_errors_total 返回 5xx 的请求数")
+            lines.append(f"# TYPE {p}_http_request_errors_total counter")
+            for (route, method), count in sorted(self._errors.items()):
+                lines.append(f"{p}_http_request_errors_total{_labels(route=route, method=method)} {count}")
+
+            lines.append(f"# HELP {p}_db_statements_total 请求内执行的 SQL 语句数")
+            lines.append(f"# TYPE {p}_db_statements_total counter")
+            for (route, method), count in sorted(self._db_statements.items()):
+                lines.append(f"{p}_db_statements_total{_labels(route=route, method=method)} {count}")
+
+            lines.append(f"# HELP {p}_http_requests_in_flight 正在处理的请求数")
+            lines.append(f"# TYPE {p}_http_requests_in_flight gauge")
+            lines.append(f"{p}_http_requests_in_flight {self._in_flight}")
+            callbacks = list(self._callbacks)
+
+        for name, metric_type, help_text, func in callbacks:
+            try:
+                value = func()
+            except Exception:
+                continue
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {metric_type}")
+            lines.append(f"{p}_{name} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
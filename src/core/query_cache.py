@@ -0,0 +1,92 @@
+"""查询结果缓存：进程级 LRU，按函数与参数缓存只读查询的结果。
+
+每条缓存记录都带着写入时相关表的版本号（data_versions），
+读取时版本号不一致即视为失效，因此数据变化后无需手动清理。
+缓存键包含数据库文件路径，同一进程打开多个数据库（基准测试、导入工具）时互不干扰。
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Tuple
+
+from src.core.data_version import get_data_versions
+from src.database.sqlite_pool import database_path
+
+QUERY_CACHE_MAXSIZE = 256
+
+
+def _freeze(value: Any) -> Any:
+    """把参数转换为可哈希的形式（列表 → 元组）。"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class QueryCache:
+    """线程安全的 LRU 缓存，记录命中/未命中次数。"""
+
+    def __init__(self, maxsize: int = QUERY_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[Tuple, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple, versions: Tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Tuple, versions: Tuple, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+QUERY_CACHE = QueryCache()
+
+
+def cached_query(*tables: str) -> Callable:
+    """缓存 func(conn, ...) 的结果，tables 为结果所依赖的表（其版本号变化即失效）。
+
+    被缓存的函数应返回列表；每次返回浅拷贝，调用方可以放心修改（如 shuffle）。
+    """
+    def decorator(func: Callable) -> Callable:
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(conn: sqlite3.Connection, *args, **kwargs):
+            try:
+                all_versions = get_data_versions(conn)
+            except sqlite3.Error:
+                # 尚未迁移的数据库没有版本表，直接查询
+                return func(conn, *args, **kwargs)
+            versions = tuple(all_versions.get(t) for t in tables)
+            key = (database_path(conn), name, _freeze(args), _freeze(kwargs))
+            found, value = QUERY_CACHE.get(key, versions)
+            if not found:
+                value = tuple(func(conn, *args, **kwargs))
+                QUERY_CACHE.put(key, versions, value)
+            return list(value)
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
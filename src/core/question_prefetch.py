@@ -0,0 +1,232 @@
+"""题目预取池：后台线程为常用的课次范围提前生成随机题，/api/quiz 直接取用。
+
+每个课次范围（"all"、单课、最近请求过的范围）一个有界队列，最多 capacity 道题；
+取题后队列低于一半即通知后台线程补满。队列为空或题目不够时由调用方同步生成剩余部分。
+每批题目记录生成时 vocabulary 与 quiz_eligible 的版本号，词库变化或可出题表重建后旧题整批丢弃。
+fork 出的子进程（多进程生产模式）中预取池自动重置：后台线程不会被继承，需要重新启动。
+
+池大小由环境变量 JAPANESE_LEARNING_PREFETCH_SIZE 设置（默认 100，0 表示关闭）；
+命中率与补充延迟见 stats()，web_app 通过 /metrics 与 /healthz 导出。
+"""
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from src.core.data_version import get_data_versions
+from src.database.sqlite_pool import SQLitePool
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_SIZE_ENV = "JAPANESE_LEARNING_PREFETCH_SIZE"
+DEFAULT_PREFETCH_SIZE = 100     # 每个课次范围预生成的题目数
+PREFETCH_MAX_KEYS = 16          # 同时维护的课次范围数，超出后淘汰最久未用的范围
+PREFETCH_BATCH = 20             # 后台每次生成的题目数
+REFILL_LOW_WATER = 0.5          # 队列低于容量的这个比例时开始补充
+WARM_KEYS = ("all",)            # 第一次取题时预热的范围
+VERSION_TABLES = ("vocabulary", "quiz_eligible")   # 题目依赖的表，任一版本号变化即丢弃旧题
+
+LessonPattern = Union[str, List[str]]
+# 生成函数：generate(conn, lesson_pattern, count) -> 题目列表
+Generator = Callable[[Any, LessonPattern, int], List[Dict]]
+
+
+def _size_from_env() -> int:
+    try:
+        return max(0, int(os.environ.get(PREFETCH_SIZE_ENV, DEFAULT_PREFETCH_SIZE)))
+    except ValueError:
+        return DEFAULT_PREFETCH_SIZE
+
+
+def lesson_key(lesson_pattern: LessonPattern) -> str:
+    if isinstance(lesson_pattern, (list, tuple)):
+        return ",".join(lesson_pattern)
+    return lesson_pattern
+
+
+class _Slot:
+    """一个课次范围的预取队列：元素为 (生成时 VERSION_TABLES 的版本号, 题目)。"""
+
+    __slots__ = ("pattern", "questions", "refill_requested_at")
+
+    def __init__(self, pattern: LessonPattern):
+        self.pattern = pattern
+        self.questions: Deque[Tuple[Optional[tuple], Dict]] = deque()
+        self.refill_requested_at: Optional[float] = None
+
+
+class QuestionPrefetcher:
+    """按课次范围预生成题目；take 非阻塞，补充由单个后台线程完成。"""
+
+    def __init__(self, pool: SQLitePool, generate: Generator, capacity: Optional[int] = None,
+                 max_keys: int = PREFETCH_MAX_KEYS, batch: int = PREFETCH_BATCH):
+        self.pool = pool
+        self.generate = generate
+        self.capacity = _size_from_env() if capacity is None else capacity
+        self.max_keys = max_keys
+        self.batch = batch
+        self._reset()
+        _PREFETCHERS.add(self)
+
+    def _reset(self) -> None:
+        """初始化状态（fork 出的子进程中也用它重置）。"""
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._slots: "OrderedDict[str, _Slot]" = OrderedDict()
+        self._pending: "OrderedDict[str, None]" = OrderedDict()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.hits = 0            # 从池中取到的题目数
+        self.misses = 0          # 池中不够、需要同步生成的题目数
+        self.refills = 0
+        self.stale = 0           # 因词库变化丢弃的题目数
+        self.refill_lag_total = 0.0
+        self.refill_lag_max = 0.0
+        self.last_refill_lag = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def take(self, conn, lesson_pattern: LessonPattern, count: int) -> List[Dict]:
+        """从池中取最多 count 道题（不重复单词）；不足的部分由调用方同步生成。"""
+        if not self.enabled:
+            return []
+        version = self._current_version(conn)
+        key = lesson_key(lesson_pattern)
+        taken: List[Dict] = []
+        seen = set()
+        with self._lock:
+            self._ensure_started()
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._add_slot(key, lesson_pattern)
+            else:
+                self._slots.move_to_end(key)
+            while slot.questions and len(taken) < count:
+                question_version, question = slot.questions.popleft()
+                if question_version != version:
+                    self.stale += 1
+                    continue
+                if question["word"] in seen:
+                    continue
+                seen.add(question["word"])
+                taken.append(question)
+            self.hits += len(taken)
+            self.misses += count - len(taken)
+            if len(slot.questions) < self.capacity * REFILL_LOW_WATER:
+                self._request_refill(key, slot)
+        return taken
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            served = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "capacity": self.capacity,
+                "keys": {key: len(slot.questions) for key, slot in self._slots.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / served, 4) if served else 0.0,
+                "stale": self.stale,
+                "refills": self.refills,
+                "pendingRefills": len(self._pending),
+                "refillLagMs": {
+                    "last": round(self.last_refill_lag * 1000, 1),
+                    "avg": round(self.refill_lag_total / self.refills * 1000, 1) if self.refills else 0.0,
+                    "max": round(self.refill_lag_max * 1000, 1),
+                },
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    # ---- 以下方法在持有 self._lock 时调用 ----
+
+    def _ensure_started(self) -> None:
+        if self._thread is None and not self._closed:
+            for key in WARM_KEYS:
+                if key not in self._slots:
+                    self._add_slot(key, key)
+            self._thread = threading.Thread(target=self._run, name="quiz-prefetch", daemon=True)
+            self._thread.start()
+
+    def _add_slot(self, key: str, lesson_pattern: LessonPattern) -> _Slot:
+        slot = self._slots[key] = _Slot(lesson_pattern)
+        while len(self._slots) > self.max_keys:
+            evicted, _ = self._slots.popitem(last=False)
+            self._pending.pop(evicted, None)
+        self._request_refill(key, slot)
+        return slot
+
+    def _request_refill(self, key: str, slot: _Slot) -> None:
+        if slot.refill_requested_at is None:
+            slot.refill_requested_at = time.perf_counter()
+        self._pending[key] = None
+        self._wakeup.notify()
+
+    # ---- 后台线程 ----
+
+    def _current_version(self, conn) -> Optional[tuple]:
+        try:
+            versions = get_data_versions(conn)
+        except Exception:
+            return None
+        return tuple(versions.get(table) for table in VERSION_TABLES)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                self._wakeup.wait_for(lambda: self._pending or self._closed)
+                if self._closed:
+                    return
+                key, _ = self._pending.popitem(last=False)
+                slot = self._slots.get(key)
+            if slot is not None:
+                try:
+                    self._refill(key, slot)
+                except Exception as e:
+                    logger.error("预生成题目失败（%s）：%s", key, e)
+
+    def _refill(self, key: str, slot: _Slot) -> None:
+        with self.pool.connection() as conn:
+            while True:
+                with self._lock:
+                    missing = self.capacity - len(slot.questions)
+                    if missing <= 0 or self._closed or self._slots.get(key) is not slot:
+                        break
+                version = self._current_version(conn)
+                questions = self.generate(conn, slot.pattern, min(self.batch, missing))
+                if not questions:
+                    break   # 该范围没有可出题的单词
+                with self._lock:
+                    slot.questions.extend((version, q) for q in questions)
+        with self._lock:
+            if slot.refill_requested_at is not None:
+                lag = time.perf_counter() - slot.refill_requested_at
+                slot.refill_requested_at = None
+                self.refills += 1
+                self.refill_lag_total += lag
+                self.refill_lag_max = max(self.refill_lag_max, lag)
+                self.last_refill_lag = lag
+
+
+_PREFETCHERS: "weakref.WeakSet[QuestionPrefetcher]" = weakref.WeakSet()
+
+
+def _reset_prefetchers_after_fork() -> None:
+    """子进程中后台线程不存在了，继承来的锁也可能处于持有状态：重置状态，下次 take 时重新启动后台线程。"""
+    for prefetcher in list(_PREFETCHERS):
+        prefetcher._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_prefetchers_after_fork)
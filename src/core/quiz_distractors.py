@@ -0,0 +1,381 @@
+"""预计算干扰项池：离线为每个 vocabulary 单词生成一批合法错误选项，出题时直接抽取。
+
+构建命令（在工程根目录执行）：
+    python -m src.core.quiz_distractors              # 全量重建
+    python -m src.core.quiz_distractors --incremental  # 只重算新增/读音变化的单词
+"""
+import json
+import random
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.core.data_version import bump_data_version
+from src.core.random_kana import (
+    SQLiteDB,
+    assemble_question,
+    generate_question,
+    generate_wrong_options,
+    get_kana_index,
+    DEFAULT_WRONG_OPTION_COUNT,
+    TABLE_VOCABULARY,
+    VALID_HIRAGANA_CONDITION,
+)
+from src.core.vocabulary_store import get_vocabulary_store
+from src.database.migrations import migrate
+
+TABLE_QUIZ_DISTRACTORS = "quiz_distractors"
+DISTRACTOR_POOL_SIZE = 8          # 每个单词最多保存的错误选项数
+POOL_BUILD_ATTEMPTS = 80          # 离线构建时的最大尝试次数（远高于在线出题的20次）
+BUILD_CHUNK_SIZE = 200            # 每个子进程任务处理的单词数
+TABLE_QUIZ_ELIGIBLE = "quiz_eligible"
+DRAW_ROUNDS = 3                   # 抽到失效行时的最多补抽轮数
+
+
+def _lesson_filter(lesson_pattern: Union[str, List[str]]) -> Tuple[str, tuple]:
+    """把课程参数（all / 单课 / 课程列表）转换为 SQL 条件。"""
+    if lesson_pattern == "all":
+        return "1 = 1", ()
+    if isinstance(lesson_pattern, list):
+        placeholders = ",".join(["?"] * len(lesson_pattern))
+        return f"v.lesson IN ({placeholders})", tuple(lesson_pattern)
+    return "v.lesson = ?", (lesson_pattern,)
+
+
+# ------------------- 抽题（在线路径）-------------------
+def _eligible_ranges(conn: sqlite3.Connection, lesson_pattern: Union[str, List[str]]) -> List[Tuple[int, int]]:
+    """课程范围在 quiz_eligible 中对应的 seq 区间列表 [(起, 止)]（同一课次的 seq 连续）。"""
+    if lesson_pattern == "all":
+        sql, params = f"SELECT MIN(seq), MAX(seq) FROM {TABLE_QUIZ_ELIGIBLE};", ()
+    else:
+        lessons = lesson_pattern if isinstance(lesson_pattern, list) else [lesson_pattern]
+        placeholders = ",".join(["?"] * len(lessons))
+        sql = (
+            f"SELECT MIN(seq), MAX(seq) FROM {TABLE_QUIZ_ELIGIBLE} "
+            f"WHERE lesson IN ({placeholders}) GROUP BY lesson;"
+        )
+        params = tuple(lessons)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return [(lo, hi) for lo, hi in cursor.fetchall() if lo is not None]
+    finally:
+        cursor.close()
+
+
+def _sample_seqs(ranges: List[Tuple[int, int]], count: int, exclude: set) -> List[int]:
+    """在若干 seq 区间内不重复地随机取 count 个（不展开区间，只抽偏移量）。"""
+    total = sum(hi - lo + 1 for lo, hi in ranges)
+    count = min(count, total - len(exclude))
+    picked: List[int] = []
+    chosen = set(exclude)
+    while len(picked) < count:
+        offset = random.randrange(total)
+        for lo, hi in ranges:
+            size = hi - lo + 1
+            if offset < size:
+                seq = lo + offset
+                break
+            offset -= size
+        if seq not in chosen:
+            chosen.add(seq)
+            picked.append(seq)
+    return picked
+
+
+def _draw_from_store(store, lesson_pattern: Union[str, List[str]], count: int) -> Optional[List[Dict]]:
+    """同 draw_quiz_questions，数据来自词库快照（快照生成时已剔除读音失效的行）。"""
+    eligible = store.eligible
+    ranges = [(start, end - 1) for start, end in eligible.ranges_for(lesson_pattern)]
+    if not ranges:
+        return None
+    questions: List[Dict] = []
+    for k in _sample_seqs(ranges, count, set()):
+        pos = eligible.positions[k]
+        pool = json.loads(eligible.options[k])
+        question = assemble_question(store.words[pos], store.hiraganas[pos],
+                                     random.sample(pool, DEFAULT_WRONG_OPTION_COUNT), store.meanings[pos])
+        if question:
+            questions.append(question)
+    random.shuffle(questions)
+    return questions
+
+
+def draw_quiz_questions(
+    conn: sqlite3.Connection,
+    lesson_pattern: Union[str, List[str]],
+    count: int,
+) -> Optional[List[Dict]]:
+    """从预计算的可出题表 quiz_eligible 中随机抽取 count 道题。
+
+    先按索引查出课程范围对应的 seq 区间，再在区间内随机抽 count 个 seq，
+    按主键取回这些行（连同干扰项与中文意思），不展开整个课程、不会抽到无法出题的单词。
+    返回题目字典列表（结构同 generate_question）；
+    可出题表为空（干扰项池尚未构建）或范围内没有记录时返回 None，调用方应回退到实时生成。
+    已载入词库快照时直接从快照中的可出题索引抽取，不执行 SQL。
+    """
+    store = get_vocabulary_store(conn)
+    if store is not None and store.eligible is not None:
+        return _draw_from_store(store, lesson_pattern, count)
+
+    ranges = _eligible_ranges(conn, lesson_pattern)
+    if not ranges:
+        return None
+
+    questions: List[Dict] = []
+    tried: set = set()
+    cursor = conn.cursor()
+    try:
+        # 构建后词库若有修改，个别行会失效（读音变化/被删除），此时再补抽
+        for _ in range(DRAW_ROUNDS):
+            seqs = _sample_seqs(ranges, count - len(questions), tried)
+            if not seqs:
+                break
+            tried.update(seqs)
+            placeholders = ",".join(["?"] * len(seqs))
+            cursor.execute(
+                f"""
+                SELECT e.word, e.hiragana, e.meaning, e.options
+                FROM {TABLE_QUIZ_ELIGIBLE} e
+                JOIN {TABLE_VOCABULARY} v ON v.id = e.vocab_id AND v.hiragana = e.hiragana
+                WHERE e.seq IN ({placeholders});
+                """,
+                seqs,
+            )
+            for word, hira, meaning, options_json in cursor.fetchall():
+                pool = json.loads(options_json)
+                question = assemble_question(word, hira, random.sample(pool, DEFAULT_WRONG_OPTION_COUNT), meaning)
+                if question:
+                    questions.append(question)
+            if len(questions) >= count:
+                break
+    finally:
+        cursor.close()
+
+    random.shuffle(questions)
+    return questions
+
+
+def random_questions(
+    conn: sqlite3.Connection,
+    lesson_pattern: Union[str, List[str]],
+    count: int,
+) -> List[Dict]:
+    """随机出 count 道题：优先从可出题表抽取，干扰项池未构建时回退到实时生成。"""
+    questions = draw_quiz_questions(conn, lesson_pattern, count)
+    if questions is not None:
+        return questions
+
+    questions = []
+    store = get_vocabulary_store(conn)
+    if store is not None:
+        words = store.iter_random_words(lesson_pattern)
+    else:
+        words = SQLiteDB.query_valid_words(conn, lesson_pattern)
+        random.shuffle(words)
+    for word, hira in words:
+        if len(questions) >= count:
+            break
+        question = generate_question(conn, word, hira)
+        if question:
+            questions.append(question)
+    return questions
+
+
+def questions_for_words(
+    conn: sqlite3.Connection,
+    candidates: List[Tuple[int, str, str, str]],
+    count: int,
+) -> List[Dict]:
+    """按候选顺序为 (vocab_id, word, hiragana, meaning) 出题，最多 count 道。
+
+    干扰项一次性从池中按 vocab_id 取出；池中没有（或读音已变化）的单词实时生成。
+    """
+    pools: Dict[int, List[str]] = {}
+    ids = [row[0] for row in candidates]
+    if ids:
+        placeholders = ",".join(["?"] * len(ids))
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"""
+                SELECT d.vocab_id, d.options
+                FROM {TABLE_QUIZ_DISTRACTORS} d
+                JOIN {TABLE_VOCABULARY} v ON v.id = d.vocab_id AND v.hiragana = d.hiragana
+                WHERE d.vocab_id IN ({placeholders}) AND d.option_count >= ?;
+                """,
+                tuple(ids) + (DEFAULT_WRONG_OPTION_COUNT,),
+            )
+            pools = {vocab_id: json.loads(options) for vocab_id, options in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    questions = []
+    for vocab_id, word, hira, meaning in candidates:
+        if len(questions) >= count:
+            break
+        pool = pools.get(vocab_id)
+        if pool:
+            wrong_opts = random.sample(pool, DEFAULT_WRONG_OPTION_COUNT)
+        else:
+            wrong_opts, is_valid = generate_wrong_options(conn, hira)
+            if not is_valid:
+                continue
+        question = assemble_question(word, hira, wrong_opts, meaning)
+        if question:
+            questions.append(question)
+    return questions
+
+
+# ------------------- 构建（离线路径）-------------------
+_WORKER_CONN = None
+
+
+def _init_worker(db_path: str) -> None:
+    """子进程初始化：打开只读连接并载入假名索引。"""
+    global _WORKER_CONN
+    _WORKER_CONN = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    get_kana_index(_WORKER_CONN)
+
+
+def _build_chunk(rows: List[Tuple[int, str]]) -> List[Tuple[int, str, str, int]]:
+    """为一批 (vocab_id, hiragana) 生成干扰项池。"""
+    results = []
+    for vocab_id, hira in rows:
+        wrong_opts, _ = generate_wrong_options(
+            _WORKER_CONN, hira, target_count=DISTRACTOR_POOL_SIZE, max_attempts=POOL_BUILD_ATTEMPTS
+        )
+        wrong_opts.sort()
+        results.append((vocab_id, hira, json.dumps(wrong_opts, ensure_ascii=False), len(wrong_opts)))
+    return results
+
+
+def _select_build_targets(conn: sqlite3.Connection, incremental: bool) -> List[Tuple[int, str]]:
+    cursor = conn.cursor()
+    try:
+        if incremental:
+            cursor.execute(
+                f"""
+                SELECT v.id, v.hiragana FROM {TABLE_VOCABULARY} v
+                LEFT JOIN {TABLE_QUIZ_DISTRACTORS} d ON d.vocab_id = v.id
+                WHERE v.hiragana IS NOT NULL AND TRIM(v.hiragana) != ''
+                  AND (d.vocab_id IS NULL OR d.hiragana != v.hiragana);
+                """
+            )
+        else:
+            cursor.execute(f"SELECT id, hiragana FROM {TABLE_VOCABULARY} WHERE {VALID_HIRAGANA_CONDITION};")
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def refresh_quiz_eligible(conn: sqlite3.Connection) -> int:
+    """按干扰项池重新生成 quiz_eligible（不提交），返回可出题的单词数。
+
+    只收录能出题的单词：至少 DEFAULT_WRONG_OPTION_COUNT 个错误选项，
+    且题目可能与选项重复（needs_meaning）时有中文意思可显示。
+    按 (lesson_no, lesson, id) 顺序写入，seq 从1开始连续，同一课次的 seq 构成一个连续区间。
+    重建后 data_versions 中 quiz_eligible 的版本号加1（词库快照据此判断是否过期）。
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {TABLE_QUIZ_ELIGIBLE};")
+        cursor.execute(
+            f"""
+            INSERT INTO {TABLE_QUIZ_ELIGIBLE}
+                (seq, vocab_id, lesson, lesson_no, word, hiragana, meaning, needs_meaning, options)
+            SELECT ROW_NUMBER() OVER (ORDER BY lesson_no, lesson, vocab_id), *
+            FROM (
+                SELECT v.id AS vocab_id, v.lesson, v.lesson_no, v.word, v.hiragana, v.meaning,
+                       (v.word = v.hiragana
+                        OR EXISTS (SELECT 1 FROM json_each(d.options) j WHERE j.value = v.word)) AS needs_meaning,
+                       d.options
+                FROM {TABLE_VOCABULARY} v
+                JOIN {TABLE_QUIZ_DISTRACTORS} d ON d.vocab_id = v.id AND d.hiragana = v.hiragana
+                WHERE d.option_count >= ?
+            )
+            WHERE NOT needs_meaning OR TRIM(COALESCE(meaning, '')) != '';
+            """,
+            (DEFAULT_WRONG_OPTION_COUNT,),
+        )
+        rows = cursor.rowcount
+        bump_data_version(conn, TABLE_QUIZ_ELIGIBLE)
+        return rows
+    finally:
+        cursor.close()
+
+
+def build_distractors(db_path: str, workers: Optional[int] = None, incremental: bool = False) -> int:
+    """构建干扰项池，返回重算的单词数。
+
+    workers 为子进程数（默认 CPU 核数）；workers=1 时在当前进程内构建。
+    incremental=True 时只重算新增或 hiragana 发生变化的单词。
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        migrate(conn)
+        targets = _select_build_targets(conn, incremental)
+        chunks = [targets[i:i + BUILD_CHUNK_SIZE] for i in range(0, len(targets), BUILD_CHUNK_SIZE)]
+
+        results = []
+        if workers == 1 or len(chunks) <= 1:
+            _init_worker(db_path)
+            try:
+                for chunk in chunks:
+                    results.extend(_build_chunk(chunk))
+            finally:
+                _WORKER_CONN.close()
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path,)) as pool:
+                for chunk_result in pool.map(_build_chunk, chunks):
+                    results.extend(chunk_result)
+
+        # 生成阶段只读；删除与写入放在最后的同一个事务里，尽量缩短写锁时间
+        cursor = conn.cursor()
+        try:
+            if incremental:
+                # 清理已删除或读音被清空的单词
+                cursor.execute(
+                    f"""
+                    DELETE FROM {TABLE_QUIZ_DISTRACTORS}
+                    WHERE vocab_id NOT IN (
+                        SELECT id FROM {TABLE_VOCABULARY} WHERE {VALID_HIRAGANA_CONDITION}
+                    );
+                    """
+                )
+            else:
+                cursor.execute(f"DELETE FROM {TABLE_QUIZ_DISTRACTORS};")
+            cursor.executemany(
+                f"""
+                INSERT OR REPLACE INTO {TABLE_QUIZ_DISTRACTORS} (vocab_id, hiragana, options, option_count)
+                VALUES (?, ?, ?, ?);
+                """,
+                results,
+            )
+            refresh_quiz_eligible(conn)
+            conn.commit()
+        finally:
+            cursor.close()
+        return len(results)
+    finally:
+        conn.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="构建出题用的干扰项池（quiz_distractors 表）")
+    parser.add_argument("--db", default=SQLiteDB().db_path, help="数据库文件路径")
+    parser.add_argument("--workers", type=int, default=None, help="子进程数，默认CPU核数")
+    parser.add_argument("--incremental", action="store_true", help="只重算新增/读音变化的单词")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    built = build_distractors(args.db, workers=args.workers, incremental=args.incremental)
+    print(f"✅ 干扰项池构建完成：重算 {built} 个单词，用时 {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
-import sqlite3
+import logging
 from sqlite3 import Error
 import os
 import random
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+
+from src.database.sqlite_pool import DB_FILE_NAME, database_path, get_pool, resolve_db_path
+from src.database.sql_trace import chain_trace_callbacks
 
 # ------------------- 全局配置（工具逻辑依赖，需保留在此）-------------------
-DEBUG_MODE = True
+# 调试输出改用 logging（默认关闭），通过环境变量 JAPANESE_LEARNING_LOG_LEVEL=DEBUG 开启
+logger = logging.getLogger(__name__)
 DEFAULT_WRONG_OPTION_COUNT = 3  # 错误选项需满足此数量才视为有效题
 MAX_ATTEMPT_GENERATE_WRONG = 20
 TABLE_VOCABULARY = "vocabulary"
@@ -14,40 +21,32 @@ VALID_HIRAGANA_CONDITION = "hiragana IS NOT NULL AND TRIM(hiragana) != ''"
 
 # ------------------- 数据库工具类 -------------------
 class SQLiteDB:
-    def __init__(self, db_name="japanese_learning.db"):
-        # 支持PyInstaller打包后的路径处理
-        import sys
-        if getattr(sys, 'frozen', False):
-            # 打包后的可执行文件：数据库放在可执行文件所在目录
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            # 开发环境：数据库放在当前工作目录
-            base_dir = os.getcwd()
-        self.db_path = os.path.join(base_dir, db_name)
+    def __init__(self, db_name=DB_FILE_NAME):
+        # 支持PyInstaller打包后的路径处理（打包后放在可执行文件所在目录，开发环境放在当前工作目录）
+        self.db_path = resolve_db_path(db_name)
         self.connection = None
 
     def __enter__(self):
-        if DEBUG_MODE:
-            print(f"\n【数据库调试】工作目录：{os.getcwd()}")
-            print(f"【数据库调试】数据库路径：{self.db_path}")
-            print(f"【数据库调试】文件存在：{os.path.exists(self.db_path)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("工作目录：%s，数据库路径：%s，文件存在：%s",
+                         os.getcwd(), self.db_path, os.path.exists(self.db_path))
         
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            if DEBUG_MODE:
-                print("【数据库调试】连接成功")
+            # 从连接池借用已配置好的连接，退出时归还而不是关闭
+            self.connection = get_pool(self.db_path).acquire()
+            logger.debug("数据库连接成功")
             return self.connection
         except Error as e:
-            print(f"❌ 数据库连接失败：{e}")
+            logger.error("数据库连接失败：%s", e)
             raise
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.connection:
-            self.connection.close()
-            if DEBUG_MODE:
-                print("【数据库调试】连接已关闭")
+            get_pool(self.db_path).release(self.connection)
+            self.connection = None
+            logger.debug("连接已归还连接池")
         if exc_type:
-            print(f"❌ 数据库异常：{exc_val}")
+            logger.error("数据库异常：%s", exc_val)
 
     @staticmethod
     def query_valid_words(conn, lesson_pattern):
@@ -56,13 +55,10 @@ class SQLiteDB:
         try:
             cursor = conn.cursor()
 
-            # 调试：打印课程分布（前10个）
-            if DEBUG_MODE:
-                print("\n【关键调试】课程单词分布（前10个）：")
+            # 调试：记录课程分布（前10个）；需额外执行一条统计SQL，只在 DEBUG 级别时执行
+            if logger.isEnabledFor(logging.DEBUG):
                 cursor.execute(f"SELECT lesson, COUNT(*) FROM {TABLE_VOCABULARY} GROUP BY lesson LIMIT 10;")
-                for lesson, count in cursor.fetchall():
-                    print(f"  → {lesson}：{count}个单词")
-                print("  → ...（仅显示前10个课程）")
+                logger.debug("课程单词分布（前10个）：%s", cursor.fetchall())
 
             # 动态生成查询SQL
             if lesson_pattern == "all":
@@ -77,22 +73,121 @@ class SQLiteDB:
                 params = (lesson_pattern,)
 
             # 执行查询
-            if DEBUG_MODE:
-                print(f"\n【查询调试】SQL：{sql}")
-                print(f"【查询调试】参数：{params[:5]}..." if isinstance(params, list) else params)
+            logger.debug("SQL：%s 参数：%s", sql, params[:5] if isinstance(params, list) else params)
             cursor.execute(sql, params)
             valid_words = cursor.fetchall()
-            print(f"\n【查询结果】共找到 {len(valid_words)} 个带平假名的单词（后续筛选有效题）")
+            logger.debug("共找到 %d 个带平假名的单词（后续筛选有效题）", len(valid_words))
             return valid_words
 
         except Error as e:
-            print(f"❌ 单词查询失败：{e}")
+            logger.error("单词查询失败：%s", e)
             return []
         finally:
             if cursor:
                 cursor.close()
 
 
+# ------------------- 假名混淆组索引（进程级，只读）-------------------
+class KanaIndex:
+    """japanese_kana 表的只读内存索引：kana → group_id，group_id → 同组假名。
+
+    japanese_kana 只有一百多行且运行期不变，整表载入一次后，
+    生成干扰项时不再访问数据库。
+    """
+
+    __slots__ = ("_group_of", "_members")
+
+    def __init__(self, rows):
+        group_of = {}
+        members = {}
+        for kana, gid in rows:
+            if not kana:
+                continue
+            group_of[kana] = gid
+            members.setdefault(gid, []).append(kana)
+        self._group_of = MappingProxyType(group_of)
+        self._members = MappingProxyType({gid: tuple(kanas) for gid, kanas in members.items()})
+
+    @classmethod
+    def load(cls, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT kana, confusion_group_id FROM {TABLE_KANA} ORDER BY id;")
+            return cls(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def group_id(self, kana):
+        """返回假名的 confusion_group_id，未收录的字符返回 None。"""
+        return self._group_of.get(kana)
+
+    def siblings(self, kana, gid):
+        """返回同一混淆组内除 kana 以外的假名（按表中顺序）。"""
+        return tuple(k for k in self._members.get(gid, ()) if k != kana)
+
+    def __len__(self):
+        return len(self._group_of)
+
+
+_KANA_INDEXES = {}      # 数据库文件路径 -> 假名索引
+_KANA_INDEX_LOCK = threading.Lock()
+
+
+def get_kana_index(conn):
+    """获取 conn 所在数据库的假名索引；首次调用时用 conn 载入，之后直接复用。"""
+    key = database_path(conn)
+    index = _KANA_INDEXES.get(key)
+    if index is None:
+        with _KANA_INDEX_LOCK:
+            index = _KANA_INDEXES.get(key)
+            if index is None:
+                index = _KANA_INDEXES[key] = KanaIndex.load(conn)
+                logger.debug("假名索引已载入：%d个假名（%s）", len(index), key)
+    return index
+
+
+def set_kana_index(conn, index):
+    """为 conn 所在数据库直接使用已构建好的假名索引（如从词库快照载入），之后不再查询 japanese_kana 表。"""
+    key = database_path(conn)
+    with _KANA_INDEX_LOCK:
+        _KANA_INDEXES[key] = index
+
+
+def reset_kana_index(conn=None):
+    """丢弃 conn 所在数据库已载入的假名索引（japanese_kana 表被修改后调用）；不传 conn 时全部丢弃。"""
+    key = None if conn is None else database_path(conn)
+    with _KANA_INDEX_LOCK:
+        if key is None:
+            _KANA_INDEXES.clear()
+        else:
+            _KANA_INDEXES.pop(key, None)
+
+
+class QueryCounter:
+    """统计连接上执行的 SQL 语句数（基于 set_trace_callback）。"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, _statement):
+        self.count += 1
+
+
+@contextmanager
+def count_queries(conn):
+    """在 with 块内统计 conn 执行的 SQL 条数：with count_queries(conn) as counter: ...
+
+    连接上已有的 trace 回调（如 SQL 跟踪）在块内照常触发，退出时恢复。
+    """
+    counter = QueryCounter()
+    previous = getattr(conn, "trace_callback", None)
+    conn.set_trace_callback(chain_trace_callbacks(previous, counter))
+    try:
+        yield counter
+    finally:
+        conn.set_trace_callback(previous)
+
+
 # ------------------- 核心业务工具函数 -------------------
 def get_modifiable_positions(group_id_list):
     """筛选可修改的字符位置（内部工具，不对外暴露也可）"""
@@ -106,44 +201,34 @@ def get_delete_positions(group_id_list):
 
 def modify_single_position(conn, current_char, current_gid):
     """单个字符错误替换（内部工具）"""
-    cursor = None
     try:
-        cursor = conn.cursor()
-        sql = f"SELECT kana FROM {TABLE_KANA} WHERE confusion_group_id = ? AND kana != ? LIMIT 10;"
-        cursor.execute(sql, (current_gid, current_char))
-        candidates = [item[0] for item in cursor.fetchall() if item[0]]
-
-        if not candidates:
-            return None, "无匹配错误字符"
-        target_char = random.choice(candidates)
-        return target_char, f"「{current_char}」→「{target_char}」"
+        candidates = get_kana_index(conn).siblings(current_char, current_gid)
     except Error as e:
         return None, f"字符修改失败：{e}"
-    finally:
-        if cursor:
-            cursor.close()
 
+    if not candidates:
+        return None, "无匹配错误字符"
+    target_char = random.choice(candidates)
+    return target_char, f"「{current_char}」→「{target_char}」"
 
-def generate_wrong_options(conn, original_hira):
-    """生成足够数量的错误选项（对外提供：返回(错误选项列表, 是否有效)）"""
+
+def generate_wrong_options(conn, original_hira, target_count=DEFAULT_WRONG_OPTION_COUNT,
+                           max_attempts=MAX_ATTEMPT_GENERATE_WRONG):
+    """生成足够数量的错误选项（对外提供：返回(错误选项列表, 是否有效)）
+
+    target_count/max_attempts 默认按出题需要；离线构建干扰项池时可调大。
+    """
     if not original_hira:
         return [], False
 
-    # 1. 获取平假名对应的group_id
-    cursor = None
+    # 1. 获取平假名对应的group_id（走内存索引，不查库）
     try:
-        cursor = conn.cursor()
-        placeholders = ",".join(["?"] * len(original_hira))
-        sql = f"SELECT kana, confusion_group_id FROM {TABLE_KANA} WHERE kana IN ({placeholders})"
-        cursor.execute(sql, tuple(original_hira))
-        kana_gid_map = dict(cursor.fetchall())
-        group_ids = [kana_gid_map.get(c) for c in original_hira]
+        kana_index = get_kana_index(conn)
     except Error as e:
-        print(f"❌ 获取group_id失败：{e}")
+        logger.error("获取group_id失败：%s", e)
         return [], False
-    finally:
-        if cursor:
-            cursor.close()
+    group_ids = [kana_index.group_id(c) for c in original_hira]
+    debug = logger.isEnabledFor(logging.DEBUG)
 
     # 2. 生成错误选项（需满足数量+去重）
     wrong_opts = set()
@@ -157,11 +242,11 @@ def generate_wrong_options(conn, original_hira):
 
     # 如果既没有可删除的也没有可替换的，直接返回
     if not delete_pos and not modifiable_pos:
-        if DEBUG_MODE:
-            print(f"【调试】{original_hira}：无可用修改位置")
+        if debug:
+            logger.debug("%s：无可用修改位置", original_hira)
         return [], False
 
-    while len(wrong_opts) < DEFAULT_WRONG_OPTION_COUNT and attempt < MAX_ATTEMPT_GENERATE_WRONG:
+    while len(wrong_opts) < target_count and attempt < max_attempts:
         attempt += 1
         modified = original_chars.copy()
         modified_group_ids = group_ids.copy()
@@ -195,9 +280,9 @@ def generate_wrong_options(conn, original_hira):
                     modified.pop(pos)
                     modified_group_ids.pop(pos)
                     operation_performed = True
-            if DEBUG_MODE and operation_performed:
+            if debug and operation_performed:
                 deleted_chars = [original_chars[p] for p in positions_to_delete if p < len(original_chars)]
-                print(f"【调试】{original_hira}：删除字符 {deleted_chars}")
+                logger.debug("%s：删除字符 %s", original_hira, deleted_chars)
         
         # 执行替换操作
         if do_replace:
@@ -219,8 +304,8 @@ def generate_wrong_options(conn, original_hira):
                     new_char, log = modify_single_position(conn, char, gid)
                     
                     if not new_char:
-                        if DEBUG_MODE:
-                            print(f"【调试】{original_hira}：替换失败（{log}）")
+                        if debug:
+                            logger.debug("%s：替换失败（%s）", original_hira, log)
                         replace_success = False
                         break
                     modified[pos] = new_char
@@ -237,17 +322,37 @@ def generate_wrong_options(conn, original_hira):
             # 确保结果不为空且与原始不同
             if wrong_opt and wrong_opt != original_hira and len(wrong_opt) > 0:
                 wrong_opts.add(wrong_opt)
-                if DEBUG_MODE:
-                    print(f"【调试】{original_hira} → {wrong_opt}")
+                if debug:
+                    logger.debug("%s → %s", original_hira, wrong_opt)
 
     # 判定是否有效（满足错误选项数量）
     wrong_opts = list(wrong_opts)
     is_valid = len(wrong_opts) >= DEFAULT_WRONG_OPTION_COUNT
-    if not is_valid and DEBUG_MODE:
-        print(f"【调试】{original_hira}：仅生成{len(wrong_opts)}个错误选项（需{DEFAULT_WRONG_OPTION_COUNT}个），视为无效题")
+    if not is_valid and debug:
+        logger.debug("%s：仅生成%d个错误选项（需%d个），视为无效题",
+                     original_hira, len(wrong_opts), DEFAULT_WRONG_OPTION_COUNT)
     return wrong_opts, is_valid
 
 
+def assemble_question(word, original_hira, wrong_opts, meaning=None):
+    """用现成的错误选项组装题目（对外提供：返回题目字典/None，None表示无效题）
+
+    与 generate_question 的返回结构一致；题目与选项重复时需要 meaning，缺失则视为无效题。
+    """
+    all_opts = list(wrong_opts) + [original_hira]
+    random.shuffle(all_opts)
+    show_meaning = (word in all_opts)
+    if show_meaning and not meaning:
+        return None
+    return {
+        "word": word,
+        "correct": original_hira,
+        "options": all_opts,
+        "show_meaning": show_meaning,
+        "meaning": meaning if show_meaning else None
+    }
+
+
 def generate_question(conn, word, original_hira):
     """生成完整题目（对外提供：返回题目字典/None，None表示无效题）"""
     wrong_opts, is_valid = generate_wrong_options(conn, original_hira)
@@ -277,12 +382,10 @@ def generate_question(conn, word, original_hira):
             else:
                 # 如果获取不到中文意思，跳过这道题
                 # 因为题目和选项会完全一样，没有测试意义
-                if DEBUG_MODE:
-                    print(f"【调试】单词 {word} 与平假名相同但无中文意思，跳过此题")
+                logger.debug("单词 %s 与平假名相同但无中文意思，跳过此题", word)
                 return None
         except Error as e:
-            if DEBUG_MODE:
-                print(f"【调试】获取单词意思失败：{e}")
+            logger.warning("获取单词意思失败：%s", e)
             # 查询失败时也跳过此题
             return None
         finally:
@@ -0,0 +1,239 @@
+"""间隔重复调度（SM-2）：按答题结果为每个单词安排下次复习时间，出题时优先抽取到期的单词。
+
+word_schedule 每个单词一行（见 migrations v9），由 record_study / record_study_batch
+在写入学习记录的同一事务中更新；到期时间 due_at 有索引，
+选题只需按 due_at 取前 N 条，再用未学过的新词补足，不必载入并打乱整个词库。
+"""
+import datetime
+import math
+import random
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from src.core.quiz_distractors import TABLE_QUIZ_DISTRACTORS
+from src.core.random_kana import DEFAULT_WRONG_OPTION_COUNT, TABLE_VOCABULARY
+
+TABLE_WORD_SCHEDULE = "word_schedule"
+
+INITIAL_EASE = 2.5          # SM-2 初始难度系数
+MIN_EASE = 1.3
+QUALITY_CORRECT = 4         # 选择题只有对/错，分别按 SM-2 的 4 分和 2 分计算
+QUALITY_WRONG = 2
+FIRST_INTERVAL_DAYS = 1
+SECOND_INTERVAL_DAYS = 6
+MAX_INTERVAL_DAYS = 36500   # 间隔上限（约100年）；连续答对时间隔指数增长，不设上限会超出日期范围
+NEW_WORDS_MIN_RATIO = 0.3   # 每次出题至少留给新词的比例（有新词时）
+CANDIDATE_FACTOR = 2        # 多取候选，抵消无法出题（干扰项不足）的单词
+LOOKUP_CHUNK_SIZE = 500     # IN 查询每批的单词数
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"  # 与 CURRENT_TIMESTAMP 相同（UTC）
+
+# (repetitions, interval_days, ease, lapses)
+ScheduleState = Tuple[int, float, float, int]
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _format_time(value: datetime.datetime) -> str:
+    return value.strftime(_TIME_FORMAT)
+
+
+def next_state(state: Optional[ScheduleState], is_correct: bool) -> ScheduleState:
+    """按 SM-2 计算一次作答后的调度状态。"""
+    repetitions, interval, ease, lapses = state or (0, 0.0, INITIAL_EASE, 0)
+    quality = QUALITY_CORRECT if is_correct else QUALITY_WRONG
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if is_correct:
+        repetitions += 1
+        if repetitions == 1:
+            interval = FIRST_INTERVAL_DAYS
+        elif repetitions == 2:
+            interval = SECOND_INTERVAL_DAYS
+        else:
+            interval = min(MAX_INTERVAL_DAYS, round(interval * ease, 2))
+    else:
+        # 答错：重新开始，次日复习
+        repetitions = 0
+        interval = FIRST_INTERVAL_DAYS
+        lapses += 1
+    return repetitions, interval, ease, lapses
+
+
+def _load_states(conn: sqlite3.Connection, words: List[str]) -> Dict[str, ScheduleState]:
+    states: Dict[str, ScheduleState] = {}
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(words), LOOKUP_CHUNK_SIZE):
+            chunk = words[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join(["?"] * len(chunk))
+            cursor.execute(
+                f"""
+                SELECT word, repetitions, interval_days, ease, lapses FROM {TABLE_WORD_SCHEDULE}
+                WHERE word IN ({placeholders});
+                """,
+                chunk,
+            )
+            for word, repetitions, interval, ease, lapses in cursor.fetchall():
+                states[word] = (repetitions, interval, ease, lapses)
+        return states
+    finally:
+        cursor.close()
+
+
+def apply_outcomes(
+    conn: sqlite3.Connection,
+    outcomes: Iterable[Tuple[str, bool]],
+    reviewed_at: Optional[datetime.datetime] = None,
+) -> int:
+    """按作答结果 (word, is_correct) 更新调度表（不提交，由调用方决定事务边界）。
+
+    一次读取所有涉及单词的当前状态，按顺序推进后批量写回；返回更新的单词数。
+    """
+    outcomes = [(word, bool(ok)) for word, ok in outcomes if word]
+    if not outcomes:
+        return 0
+    reviewed_at = reviewed_at or _utcnow()
+    states = _load_states(conn, list(dict.fromkeys(word for word, _ in outcomes)))
+    for word, is_correct in outcomes:
+        states[word] = next_state(states.get(word), is_correct)
+    touched = dict.fromkeys(word for word, _ in outcomes)
+    _save_states(conn, [(word, states[word], reviewed_at) for word in touched])
+    return len(touched)
+
+
+def _save_states(
+    conn: sqlite3.Connection,
+    items: Iterable[Tuple[str, ScheduleState, datetime.datetime]],
+) -> None:
+    """写回 (word, 状态, 作答时间)；下次复习时间 = 作答时间 + 间隔天数。"""
+    rows = [
+        (word, repetitions, interval, ease, lapses,
+         _format_time(reviewed_at + datetime.timedelta(days=interval)), _format_time(reviewed_at))
+        for word, (repetitions, interval, ease, lapses), reviewed_at in items
+    ]
+    conn.executemany(
+        f"""
+        INSERT OR REPLACE INTO {TABLE_WORD_SCHEDULE}
+            (word, repetitions, interval_days, ease, lapses, due_at, last_reviewed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+        """,
+        rows,
+    )
+
+
+def rebuild_schedule(conn: sqlite3.Connection) -> int:
+    """按时间顺序重放全部 study_records，重建调度表（不提交）。返回单词数。"""
+    conn.execute(f"DELETE FROM {TABLE_WORD_SCHEDULE};")
+    states: Dict[str, ScheduleState] = {}
+    last_seen: Dict[str, datetime.datetime] = {}
+    cursor = conn.execute("SELECT word, is_correct, created_at FROM study_records ORDER BY id;")
+    for word, is_correct, created_at in cursor:
+        if not word:
+            continue
+        states[word] = next_state(states.get(word), is_correct == 1)
+        try:
+            last_seen[word] = datetime.datetime.strptime(str(created_at)[:19], _TIME_FORMAT)
+        except ValueError:
+            last_seen[word] = _utcnow()
+    _save_states(conn, [(word, state, last_seen[word]) for word, state in states.items()])
+    return len(states)
+
+
+def _lesson_filter(lesson_pattern: Union[str, List[str]]) -> Tuple[str, tuple]:
+    if lesson_pattern == "all":
+        return "1 = 1", ()
+    if isinstance(lesson_pattern, list):
+        placeholders = ",".join(["?"] * len(lesson_pattern))
+        return f"v.lesson IN ({placeholders})", tuple(lesson_pattern)
+    return "v.lesson = ?", (lesson_pattern,)
+
+
+def _fetch(conn: sqlite3.Connection, sql: str, params: tuple) -> List[Tuple[int, str, str, str]]:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def select_quiz_words(
+    conn: sqlite3.Connection,
+    lesson_pattern: Union[str, List[str]],
+    count: int,
+    now: Optional[datetime.datetime] = None,
+) -> List[Tuple[int, str, str, str]]:
+    """选出本次测验的候选单词，返回 (vocab_id, word, hiragana, meaning) 列表，按优先级排列。
+
+    顺序：已到期的复习词（最早到期的优先）与新词混合，新词至少占 NEW_WORDS_MIN_RATIO；
+    仍不足时用尚未到期、最快到期的单词补足。候选数最多为 count * CANDIDATE_FACTOR。
+    """
+    where, params = _lesson_filter(lesson_pattern)
+    where += " AND v.hiragana IS NOT NULL AND TRIM(v.hiragana) != ''"
+    # 干扰项池已确认凑不齐选项的单词出不了题，也就永远不会被作答；
+    # 不排除的话它们会一直停在到期队列最前面，挤掉其他到期词
+    where += f"""
+        AND NOT EXISTS (
+            SELECT 1 FROM {TABLE_QUIZ_DISTRACTORS} d
+            WHERE d.vocab_id = v.id AND d.hiragana = v.hiragana AND d.option_count < {DEFAULT_WRONG_OPTION_COUNT}
+        )"""
+    now_str = _format_time(now or _utcnow())
+    limit = count * CANDIDATE_FACTOR
+
+    # 到期复习词：走 idx_word_schedule_due，按 due_at 顺序取前 N 条
+    due = _fetch(
+        conn,
+        f"""
+        SELECT v.id, v.word, v.hiragana, v.meaning
+        FROM {TABLE_WORD_SCHEDULE} s
+        JOIN {TABLE_VOCABULARY} v ON v.word = s.word
+        WHERE s.due_at <= ? AND {where}
+        ORDER BY s.due_at
+        LIMIT ?;
+        """,
+        (now_str,) + params + (limit,),
+    )
+    # 新词：没有调度记录的单词，按课次与录入顺序
+    new = _fetch(
+        conn,
+        f"""
+        SELECT v.id, v.word, v.hiragana, v.meaning
+        FROM {TABLE_VOCABULARY} v
+        WHERE {where} AND NOT EXISTS (SELECT 1 FROM {TABLE_WORD_SCHEDULE} s WHERE s.word = v.word)
+        ORDER BY v.lesson_no, v.id
+        LIMIT ?;
+        """,
+        params + (limit,),
+    )
+
+    reserved_new = min(len(new), math.ceil(count * NEW_WORDS_MIN_RATIO))
+    head = due[:count - reserved_new] + new[:count - min(len(due), count - reserved_new)]
+    random.shuffle(head)
+    chosen = head + [r for r in due + new if r not in head]
+
+    if len(chosen) < limit:
+        # 复习词和新词都不够时，提前复习最快到期的单词
+        upcoming = _fetch(
+            conn,
+            f"""
+            SELECT v.id, v.word, v.hiragana, v.meaning
+            FROM {TABLE_WORD_SCHEDULE} s
+            JOIN {TABLE_VOCABULARY} v ON v.word = s.word
+            WHERE s.due_at > ? AND {where}
+            ORDER BY s.due_at
+            LIMIT ?;
+            """,
+            (now_str,) + params + (limit - len(chosen),),
+        )
+        chosen += upcoming
+
+    # 同一个单词在词库中可能出现多次，只保留一条
+    seen = set()
+    result = []
+    for row in chosen:
+        if row[1] not in seen:
+            seen.add(row[1])
+            result.append(row)
+    return result[:limit]
@@ -0,0 +1,135 @@
+import sqlite3
+from typing import List, Optional, Tuple
+
+from src.core.kana_normalize import ensure_reading_norm, fold_kana, get_kana_normalizer, is_reading
+from src.core.query_cache import cached_query
+from src.core.user_note import favorited_column
+
+TABLE_VOCABULARY = "vocabulary"
+TABLE_VOCABULARY_FTS = "vocabulary_fts"
+
+SEARCH_DEFAULT_LIMIT = 100
+SEARCH_MAX_LIMIT = 500
+TRIGRAM_MIN_CHARS = 3  # trigram 索引只能匹配不少于3个字符的关键词
+
+# 查询方式 → 参与匹配的列（jp：日文单词与读音；其他：中文意思）
+_SEARCH_COLUMNS = {
+    "jp": ("word", "hiragana"),
+}
+_DEFAULT_COLUMNS = ("meaning",)
+_READING_PREFIX_END = "\U0010ffff"  # 前缀范围查询的上界：reading_norm >= q AND < q + U+10FFFF
+
+
+def _select_columns(with_favorite: bool) -> str:
+    columns = "v.word, v.hiragana, v.meaning, v.lesson"
+    return columns + ", " + favorited_column("v") if with_favorite else columns
+
+
+def _fts_phrase(keyword: str) -> str:
+    """把关键词转成 FTS5 短语（双引号转义），避免被解析为查询语法。"""
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+@cached_query("vocabulary", "user_note")
+def search_words(
+    conn: sqlite3.Connection,
+    keyword: str,
+    query_type: str = "jp",
+    limit: Optional[int] = SEARCH_DEFAULT_LIMIT,
+    with_favorite: bool = False,
+) -> List[Tuple]:
+    """按关键词搜索单词，结果按相关度排序。
+
+    返回 (word, hiragana, meaning, lesson) 列表；limit=None 表示不限条数。
+    with_favorite=True 时每行末尾多一列「是否已收藏」（0/1），在同一条 SQL 中计算。
+    日文查询先把关键词归一化为平假名（片假名、半角片假名、罗马字均可），
+    用 reading_norm 索引做读音前缀查找（先回填为空的 reading_norm）；再按原文做全文检索，两者合并去重。
+    罗马字关键词只走读音查找。
+    """
+    sql_limit = -1 if limit is None else max(1, min(int(limit), SEARCH_MAX_LIMIT))
+
+    if query_type == "jp":
+        reading = get_kana_normalizer(conn).normalize(keyword)
+        if is_reading(reading):
+            ensure_reading_norm(conn)
+            rows = _search_by_reading(conn, reading, sql_limit, with_favorite)
+            # 罗马字输入在单词原文里不会出现，读音索引的结果即为全部
+            if reading != fold_kana(keyword):
+                return rows
+            seen = set(rows)
+            merged = rows + [r for r in _search_text(conn, keyword, query_type, sql_limit, with_favorite) if r not in seen]
+            return merged if sql_limit < 0 else merged[:sql_limit]
+
+    return _search_text(conn, keyword, query_type, sql_limit, with_favorite)
+
+
+def _search_by_reading(
+    conn: sqlite3.Connection,
+    reading: str,
+    sql_limit: int,
+    with_favorite: bool = False,
+) -> List[Tuple]:
+    """读音前缀查找（走 idx_vocabulary_reading_norm），完全匹配优先、短词优先。"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"""
+            SELECT {_select_columns(with_favorite)} FROM {TABLE_VOCABULARY} v
+            WHERE v.reading_norm >= ? AND v.reading_norm < ?
+            ORDER BY v.reading_norm != ?, length(v.reading_norm), v.id
+            LIMIT ?;
+            """,
+            (reading, reading + _READING_PREFIX_END, reading, sql_limit),
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _search_text(
+    conn: sqlite3.Connection,
+    keyword: str,
+    query_type: str,
+    sql_limit: int,
+    with_favorite: bool = False,
+) -> List[Tuple]:
+    """按原文搜索：关键词不少于3个字符时走 FTS5 trigram 索引（bm25 排序），
+    更短的关键词或未建全文索引时回退到 LIKE（完全匹配、前缀匹配优先）。
+    """
+    columns = _SEARCH_COLUMNS.get(query_type, _DEFAULT_COLUMNS)
+    cursor = conn.cursor()
+    try:
+        if len(keyword) >= TRIGRAM_MIN_CHARS:
+            try:
+                cursor.execute(
+                    f"""
+                    SELECT {_select_columns(with_favorite)}
+                    FROM {TABLE_VOCABULARY_FTS} f
+                    JOIN {TABLE_VOCABULARY} v ON v.id = f.rowid
+                    WHERE {TABLE_VOCABULARY_FTS} MATCH ?
+                    ORDER BY f.rank
+                    LIMIT ?;
+                    """,
+                    ("{" + " ".join(columns) + "} : " + _fts_phrase(keyword), sql_limit),
+                )
+                return cursor.fetchall()
+            except sqlite3.OperationalError:
+                # 全文索引不可用（SQLite 不支持 FTS5/trigram），回退到 LIKE
+                pass
+
+        pattern = f"%{keyword}%"
+        where = " OR ".join(f"v.{col} LIKE ?" for col in columns)
+        exact = " OR ".join(f"v.{col} = ?" for col in columns)
+        prefix = " OR ".join(f"v.{col} LIKE ?" for col in columns)
+        cursor.execute(
+            f"""
+            SELECT {_select_columns(with_favorite)} FROM {TABLE_VOCABULARY} v
+            WHERE {where}
+            ORDER BY ({exact}) DESC, ({prefix}) DESC, length(v.{columns[0]}), v.id
+            LIMIT ?;
+            """,
+            (pattern,) * len(columns) + (keyword,) * len(columns) + (f"{keyword}%",) * len(columns) + (sql_limit,),
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
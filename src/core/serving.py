@@ -0,0 +1,234 @@
+"""生产环境服务：多线程 WSGI 服务器（优先 waitress），可选多进程，优雅退出。
+
+开发环境仍用 app.run(debug=True)；生产模式由命令行或环境变量选择（见 web_app.parse_serve_args）：
+    python web_app.py --production --threads 16
+    JAPANESE_LEARNING_SERVE=production JAPANESE_LEARNING_THREADS=16 python web_app.py
+打包后的可执行文件默认就是生产模式。
+
+收到 Ctrl+C / SIGTERM 后：停止接受新连接 → 等待进行中的请求完成（最多 DRAIN_TIMEOUT 秒）
+→ 调用 on_shutdown（由 web_app 提交写入队列中剩余的写入并关闭连接池）。
+退出过程中再次收到信号会被忽略；超过 DRAIN_TIMEOUT 仍未退出时，再次 Ctrl+C 才强制退出。
+多进程（workers > 1，仅 POSIX）时主进程先建好监听套接字再 fork，各子进程共享套接字、
+各自拥有连接池与写入队列；连接池和写入队列在 fork 后的子进程中自动重置（见 sqlite_pool / write_queue）。
+终端中的 Ctrl+C 会发给整个进程组，子进程因此忽略 SIGINT，只以主进程转发的 SIGTERM 作为退出信号。
+"""
+import logging
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from typing import Callable, List, Optional
+
+from src.core import startup_profile
+
+logger = logging.getLogger(__name__)
+
+THREADS_ENV = "JAPANESE_LEARNING_THREADS"
+WORKERS_ENV = "JAPANESE_LEARNING_WORKERS"
+DEFAULT_THREADS = 8
+DEFAULT_WORKERS = 1
+DRAIN_TIMEOUT = 10.0        # 退出时等待进行中请求的最长时间（秒）
+LISTEN_BACKLOG = 1024
+POLL_INTERVAL = 0.5
+
+ShutdownHook = Callable[[], None]
+
+
+def env_int(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        return max(minimum, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+_STOP_SIGNALS = tuple(sig for sig in (signal.SIGINT, getattr(signal, "SIGTERM", None)) if sig is not None)
+
+
+class _StopSignal:
+    """把 SIGINT / SIGTERM 转为一个事件，服务循环据此开始优雅退出。
+
+    退出开始后的 DRAIN_TIMEOUT 秒内再收到信号只打印提示；之后再收到才调用 on_force 并立即退出。
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self._previous = {}
+        self._stopping_since: Optional[float] = None
+
+    def install(self, on_signal: Optional[Callable[[], None]] = None,
+                on_force: Optional[Callable[[], None]] = None,
+                signals: tuple = _STOP_SIGNALS) -> "_StopSignal":
+        def handler(signum, _frame):
+            if self._stopping_since is not None:
+                waited = time.monotonic() - self._stopping_since
+                if waited < DRAIN_TIMEOUT:
+                    logger.warning("正在退出，等待进行中的请求与写入完成（%.0f 秒后再次按 Ctrl+C 可强制退出）",
+                                   DRAIN_TIMEOUT - waited)
+                    return
+                logger.warning("退出超时，强制退出")
+                if on_force is not None:
+                    on_force()
+                os._exit(1)
+            self._stopping_since = time.monotonic()
+            logger.warning("收到退出信号（%s），等待进行中的请求完成…", signal.Signals(signum).name)
+            self.event.set()
+            if on_signal is not None:
+                on_signal()
+
+        for sig in signals:
+            self._previous[sig] = signal.signal(sig, handler)
+        return self
+
+    def restore(self) -> None:
+        for sig, previous in self._previous.items():
+            signal.signal(sig, previous)
+
+
+def _listen_socket(host: str, port: int) -> socket.socket:
+    sock = socket.create_server((host, port), backlog=LISTEN_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve_waitress(app, sock: socket.socket, threads: int, stop: _StopSignal) -> None:
+    from waitress import wasyncore
+    from waitress.server import create_server
+
+    # 所有线程都忙时 waitress 每排队一个请求就打印一条警告，积压情况改由 /metrics 观察
+    logging.getLogger("waitress.queue").setLevel(logging.ERROR)
+    socket_map: dict = {}
+    server = create_server(app, map=socket_map, sockets=[sock], threads=threads)
+    while not stop.event.is_set():
+        wasyncore.loop(timeout=POLL_INTERVAL, map=socket_map, count=1)
+
+    # 不再接受新连接，继续驱动事件循环把进行中请求的响应发完
+    server.accepting = False
+    deadline = time.monotonic() + DRAIN_TIMEOUT
+    while time.monotonic() < deadline and any(
+        channel.requests or channel.total_outbufs_len for channel in list(server.active_channels.values())
+    ):
+        wasyncore.loop(timeout=0.05, map=socket_map, count=1)
+    server.task_dispatcher.shutdown(cancel_pending=False, timeout=max(0.0, deadline - time.monotonic()))
+    wasyncore.close_all(socket_map)
+
+
+def _serve_werkzeug(app, sock: socket.socket, threads: int, stop: _StopSignal) -> None:
+    """未安装 waitress 时的回退：werkzeug 多线程服务器，同时处理的请求数限制为 threads。"""
+    from werkzeug.serving import ThreadedWSGIServer
+
+    class BoundedThreadedWSGIServer(ThreadedWSGIServer):
+        daemon_threads = False   # server_close 时等待请求线程结束
+        block_on_close = True
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._slots = threading.BoundedSemaphore(threads)
+
+        def process_request(self, request, client_address):
+            self._slots.acquire()
+            try:
+                super().process_request(request, client_address)
+            except BaseException:
+                self._slots.release()
+                raise
+
+        def process_request_thread(self, request, client_address):
+            try:
+                socketserver.ThreadingMixIn.process_request_thread(self, request, client_address)
+            finally:
+                self._slots.release()
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)   # 不逐条打印访问日志
+    host, port = sock.getsockname()[:2]
+    server = BoundedThreadedWSGIServer(host, port, app, fd=sock.fileno())
+    watcher = threading.Thread(target=lambda: (stop.event.wait(), server.shutdown()), daemon=True)
+    watcher.start()
+    server.serve_forever(poll_interval=POLL_INTERVAL)
+    server.server_close()   # 等待进行中的请求线程
+
+
+def _serve_one(app, sock: socket.socket, threads: int, on_shutdown: Optional[ShutdownHook],
+               signals: tuple = _STOP_SIGNALS) -> None:
+    stop = _StopSignal().install(signals=signals)
+    try:
+        try:
+            import waitress  # noqa: F401
+        except ImportError:
+            logger.warning("未安装 waitress，使用 werkzeug 多线程服务器（pip install waitress）")
+            _serve_werkzeug(app, sock, threads, stop)
+        else:
+            _serve_waitress(app, sock, threads, stop)
+    finally:
+        stop.restore()
+        if on_shutdown is not None:
+            on_shutdown()
+
+
+def _serve_forked(app, sock: socket.socket, threads: int, workers: int,
+                  on_shutdown: Optional[ShutdownHook]) -> None:
+    children: List[int] = []
+
+    def forward(sig=signal.SIGTERM):
+        for pid in children:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    # fork 期间屏蔽退出信号：子进程先改好自己的信号处理再解除屏蔽，主进程收到的信号在 fork 完成后转发给全部子进程
+    stop = _StopSignal().install(on_signal=forward, on_force=lambda: forward(signal.SIGKILL))
+    signal.pthread_sigmask(signal.SIG_BLOCK, _STOP_SIGNALS)
+    try:
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    stop.restore()
+                    signal.signal(signal.SIGINT, signal.SIG_IGN)
+                    signal.pthread_sigmask(signal.SIG_UNBLOCK, _STOP_SIGNALS)
+                    _serve_one(app, sock, threads, on_shutdown, signals=(signal.SIGTERM,))
+                except BaseException:
+                    logger.exception("工作进程异常退出")
+                    code = 1
+                finally:
+                    os._exit(code)
+            children.append(pid)
+    finally:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, _STOP_SIGNALS)
+    try:
+        for pid in children:
+            while True:
+                try:
+                    os.waitpid(pid, 0)
+                    break
+                except InterruptedError:
+                    continue
+                except ChildProcessError:
+                    break
+    finally:
+        stop.restore()
+        sock.close()
+
+
+def serve(app, host: str = "127.0.0.1", port: int = 5000, threads: Optional[int] = None,
+          workers: Optional[int] = None, on_shutdown: Optional[ShutdownHook] = None) -> None:
+    """以生产模式运行 WSGI 应用，直到收到退出信号。"""
+    threads = threads or env_int(THREADS_ENV, DEFAULT_THREADS)
+    workers = workers or env_int(WORKERS_ENV, DEFAULT_WORKERS)
+    if workers > 1 and not hasattr(os, "fork"):
+        logger.warning("当前平台不支持多进程，workers=%d 改为 1", workers)
+        workers = 1
+
+    sock = _listen_socket(host, port)
+    startup_profile.mark("listening")
+    print(f"生产模式：http://{host}:{port}（{workers} 个进程 × {threads} 个线程），按 Ctrl+C 退出")
+    if workers == 1:
+        try:
+            _serve_one(app, sock, threads, on_shutdown)
+        finally:
+            sock.close()
+    else:
+        _serve_forked(app, sock, threads, workers, on_shutdown)
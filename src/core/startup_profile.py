@@ -0,0 +1,265 @@
+"""启动耗时分析：从进程启动到第一个请求完成，各阶段的耗时，以及（开启时）每个模块的导入耗时。
+
+阶段时间点总是记录（只是几次 perf_counter），开启分析时由 /debug/startup 返回：
+    unpack        PyInstaller 单文件程序的引导进程解压（仅打包后的单文件程序）
+    interpreter   Python 解释器启动，到 web_app 开始执行
+    imports       web_app 导入 Flask 与各模块
+    app           创建 Flask 应用、注册路由与指标
+    database      数据库迁移检查 + 载入词库快照
+    listening     创建服务器、开始监听
+    firstRequest  处理第一个请求
+模块导入计时需要在导入 Flask 之前挂上导入钩子，用命令行参数或环境变量开启：
+    python web_app.py --profile-startup
+    JAPANESE_LEARNING_PROFILE_STARTUP=1 日语学习系统.exe
+开启后第一个请求完成时把报告打印到 stderr，并卸下导入钩子。
+"""
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+PROFILE_ENV = "JAPANESE_LEARNING_PROFILE_STARTUP"
+PROFILE_FLAG = "--profile-startup"
+TOP_IMPORTS = 25            # 报告中列出的最慢模块数
+
+
+def _linux_start_age(pid: int) -> Optional[float]:
+    """进程已运行的秒数（/proc，精度为一个时钟节拍，通常 10ms）。"""
+    with open(f"/proc/{pid}/stat") as f:
+        stat = f.read()
+    start_ticks = int(stat[stat.rindex(")") + 2:].split()[19])
+    with open("/proc/uptime") as f:
+        uptime = float(f.read().split()[0])
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+def _windows_start_epoch(pid: int) -> Optional[float]:
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(0x1000, False, pid)   # PROCESS_QUERY_LIMITED_INFORMATION
+    if not handle:
+        return None
+    try:
+        times = [wintypes.FILETIME() for _ in range(4)]
+        if not kernel32.GetProcessTimes(handle, *[ctypes.byref(t) for t in times]):
+            return None
+        created = times[0].dwHighDateTime << 32 | times[0].dwLowDateTime
+        return created / 1e7 - 11644473600      # FILETIME（1601 年起的 100ns）→ Unix 时间
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def process_start_time(pid: Optional[int] = None) -> Optional[float]:
+    """进程的创建时间（Unix 时间戳）；平台不支持时返回 None。"""
+    pid = os.getpid() if pid is None else pid
+    try:
+        if sys.platform == "win32":
+            return _windows_start_epoch(pid)
+        if os.path.exists(f"/proc/{pid}/stat"):
+            return time.time() - _linux_start_age(pid)
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+
+def _onefile_bootloader_pid() -> Optional[int]:
+    """单文件打包时，解压并启动本进程的引导进程；其他情况返回 None。"""
+    meipass = getattr(sys, "_MEIPASS", None)
+    if not getattr(sys, "frozen", False) or not meipass:
+        return None
+    return os.getppid() if os.path.basename(os.path.normpath(meipass)).startswith("_MEI") else None
+
+
+class _TimedLoader:
+    """包装模块的 loader：执行模块代码时计时，执行前把 __loader__ 还原为原 loader。"""
+
+    def __init__(self, loader, timer: "ImportTimer", find_time: float):
+        self._loader = loader
+        self._timer = timer
+        self._find_time = find_time
+
+    def create_module(self, spec):
+        create = getattr(self._loader, "create_module", None)
+        return create(spec) if create is not None else None
+
+    def exec_module(self, module):
+        spec = module.__spec__
+        spec.loader = module.__loader__ = self._loader
+        self._timer.run(spec.name, self._find_time, self._loader.exec_module, module)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportTimer:
+    """放在 sys.meta_path 最前面的查找器：委托其余查找器找到模块，再为其计时。
+
+    记录每个模块的查找 + 执行耗时（含子模块，即 -X importtime 的 cumulative）与扣除子模块后的自身耗时。
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.records: List[Tuple[str, float, float]] = []    # (模块, 自身, 累计)
+
+    def install(self) -> None:
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        try:
+            sys.meta_path.remove(self)
+        except ValueError:
+            pass
+
+    def find_spec(self, fullname, path=None, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        start = time.perf_counter()
+        try:
+            for finder in sys.meta_path:
+                find = getattr(finder, "find_spec", None)
+                if finder is self or find is None:
+                    continue
+                spec = find(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self, time.perf_counter() - start)
+        return spec
+
+    def run(self, name: str, find_time: float, exec_module, module) -> None:
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)       # 子模块累计耗时
+        start = time.perf_counter()
+        try:
+            exec_module(module)
+        finally:
+            total = time.perf_counter() - start + find_time
+            children = stack.pop()
+            if stack:
+                stack[-1] += total
+            with self._lock:
+                self.records.append((name, total - children, total))
+
+    def top(self, limit: int = TOP_IMPORTS) -> List[Dict]:
+        with self._lock:
+            records = sorted(self.records, key=lambda r: r[1], reverse=True)[:limit]
+        return [{"module": name, "selfMs": round(own * 1000, 2), "totalMs": round(total * 1000, 2)}
+                for name, own, total in records]
+
+
+class StartupProfile:
+    """启动各阶段的时间点（距进程创建），第一个请求完成后不再变化。"""
+
+    def __init__(self):
+        self.created = time.time()
+        self.created_perf = time.perf_counter()
+        start = process_start_time()
+        bootloader_pid = _onefile_bootloader_pid()
+        bootloader_start = process_start_time(bootloader_pid) if bootloader_pid else None
+        # 单文件程序从引导进程启动算起；取不到进程创建时间时从本模块导入算起
+        self.origin = bootloader_start or start or self.created
+        self.marks: List[Tuple[str, float]] = []
+        if bootloader_start and start:
+            self.marks.append(("unpack", start - self.origin))
+        self.marks.append(("interpreter", self.created - self.origin))
+        self.imports: Optional[ImportTimer] = None
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        """距进程创建的秒数。"""
+        return self.created - self.origin + time.perf_counter() - self.created_perf
+
+    def mark(self, phase: str) -> None:
+        """记录某阶段结束的时间点（同一阶段只记第一次）。"""
+        with self._lock:
+            if not self.finished and all(name != phase for name, _ in self.marks):
+                self.marks.append((phase, self.elapsed()))
+
+    def enable_imports(self) -> None:
+        if self.imports is None:
+            self.imports = ImportTimer()
+            self.imports.install()
+
+    def first_request_done(self) -> bool:
+        """第一个请求完成时调用；返回 True 表示这就是第一个请求。"""
+        if self.finished:
+            return False
+        self.mark("firstRequest")
+        with self._lock:
+            if self.finished:
+                return False
+            self.finished = True
+        if self.imports is not None:
+            self.imports.uninstall()
+        return True
+
+    def report(self) -> Dict:
+        with self._lock:
+            marks = list(self.marks)
+        phases, previous = [], 0.0
+        for name, at in marks:
+            phases.append({"phase": name, "atMs": round(at * 1000, 1), "durationMs": round((at - previous) * 1000, 1)})
+            previous = at
+        out = {
+            "processStart": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.origin)),
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "complete": self.finished,
+            "totalMs": round(previous * 1000, 1),
+            "phases": phases,
+        }
+        if self.imports is not None:
+            out["slowestImports"] = self.imports.top()
+            out["modulesImported"] = len(self.imports.records)
+        return out
+
+    def format_report(self) -> str:
+        report = self.report()
+        lines = [f"启动耗时：{report['totalMs']:.1f}ms（进程启动于 {report['processStart']}）"]
+        for phase in report["phases"]:
+            lines.append(f"  {phase['phase']:<14}{phase['durationMs']:>9.1f}ms   （累计 {phase['atMs']:.1f}ms）")
+        if "slowestImports" in report:
+            lines.append(f"导入最慢的模块（共导入 {report['modulesImported']} 个，按自身耗时排序）：")
+            for item in report["slowestImports"]:
+                lines.append(f"  {item['module']:<40}{item['selfMs']:>9.2f}ms   （含子模块 {item['totalMs']:.2f}ms）")
+        return "\n".join(lines)
+
+
+PROFILE = StartupProfile()
+
+
+def requested(argv: Optional[List[str]] = None) -> bool:
+    argv = sys.argv if argv is None else argv
+    if PROFILE_FLAG in argv:
+        return True
+    return os.environ.get(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def install_from_args(argv: Optional[List[str]] = None) -> bool:
+    """在导入 Flask 之前调用：命令行带 --profile-startup 或设置了环境变量时开启模块导入计时。"""
+    if requested(argv):
+        PROFILE.enable_imports()
+        return True
+    return False
+
+
+def mark(phase: str) -> None:
+    PROFILE.mark(phase)
+
+
+def request_finished() -> None:
+    """web_app 每个请求结束时调用：第一个请求时记下时间点，开启了导入计时则把报告打印到 stderr。"""
+    if PROFILE.finished:
+        return
+    if PROFILE.first_request_done() and PROFILE.imports is not None:
+        print(PROFILE.format_report(), file=sys.stderr, flush=True)
@@ -1,39 +1,15 @@
 import sqlite3
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-
-TABLE_STUDY_RECORDS = "study_records"
+from src.core.scheduler import apply_outcomes
 
 
-def ensure_study_records_table(conn: sqlite3.Connection) -> None:
-    """保证 study_records 表存在。"""
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            f"""
-            CREATE TABLE IF NOT EXISTS {TABLE_STUDY_RECORDS} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                word TEXT NOT NULL,
-                is_correct INTEGER NOT NULL DEFAULT 0,
-                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-        )
-        # 创建索引以提高查询性能
-        cursor.execute(
-            f"CREATE INDEX IF NOT EXISTS idx_created_at ON {TABLE_STUDY_RECORDS}(created_at);"
-        )
-        cursor.execute(
-            f"CREATE INDEX IF NOT EXISTS idx_word ON {TABLE_STUDY_RECORDS}(word);"
-        )
-        conn.commit()
-    finally:
-        cursor.close()
+TABLE_STUDY_RECORDS = "study_records"
+TABLE_STUDY_DAILY_STATS = "study_daily_stats"
 
 
-def record_study(conn: sqlite3.Connection, word: str, is_correct: bool) -> None:
-    """记录学习记录。"""
-    ensure_study_records_table(conn)
+def record_study(conn: sqlite3.Connection, word: str, is_correct: bool, commit: bool = True) -> None:
+    """记录学习记录。commit=False 时由调用方（如写入队列）统一提交。"""
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -43,29 +19,39 @@ def record_study(conn: sqlite3.Connection, word: str, is_correct: bool) -> None:
             """,
             (word, 1 if is_correct else 0),
         )
-        conn.commit()
+        _add_daily_stats(cursor, 1, 1 if is_correct else 0)
+        apply_outcomes(conn, [(word, is_correct)])
+        if commit:
+            conn.commit()
     finally:
         cursor.close()
 
 
+def _add_daily_stats(cursor: sqlite3.Cursor, total: int, correct: int) -> None:
+    """把今天（本地日期）新增的题数累加到 study_daily_stats，与明细记录在同一事务中。"""
+    cursor.execute(
+        f"""
+        INSERT INTO {TABLE_STUDY_DAILY_STATS} (day, total, correct)
+        VALUES (DATE('now', 'localtime'), ?, ?)
+        ON CONFLICT(day) DO UPDATE SET
+            total = {TABLE_STUDY_DAILY_STATS}.total + excluded.total,
+            correct = {TABLE_STUDY_DAILY_STATS}.correct + excluded.correct;
+        """,
+        (total, correct),
+    )
+
+
 def get_today_stats(conn: sqlite3.Connection) -> Tuple[int, float]:
     """获取今日学习统计。
     
     返回 (总题数, 正确率)
     正确率范围: 0.0 - 100.0
     """
-    ensure_study_records_table(conn)
     cursor = conn.cursor()
     try:
-        # 查询今日的记录（使用日期比较）
+        # 读取按天汇总表中今天的一行，不再扫描明细记录
         cursor.execute(
-            f"""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END) as correct_count
-            FROM {TABLE_STUDY_RECORDS}
-            WHERE DATE(created_at) = DATE('now', 'localtime');
-            """
+            f"SELECT total, correct FROM {TABLE_STUDY_DAILY_STATS} WHERE day = DATE('now', 'localtime');"
         )
         row = cursor.fetchone()
         total = row[0] if row and row[0] else 0
@@ -79,12 +65,35 @@ def get_today_stats(conn: sqlite3.Connection) -> Tuple[int, float]:
         cursor.close()
 
 
-def record_study_batch(conn: sqlite3.Connection, records: List[Tuple[str, bool]]) -> None:
-    """批量记录学习记录。"""
+def get_daily_stats(
+    conn: sqlite3.Connection,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> List[Tuple[str, int, int]]:
+    """按日期范围查询每日统计，返回 (日期, 总题数, 正确数) 列表，按日期升序。
+
+    日期格式为 YYYY-MM-DD（本地日期），两端均包含；为 None 表示不限。只返回有记录的日期。
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"""
+            SELECT day, total, correct FROM {TABLE_STUDY_DAILY_STATS}
+            WHERE day >= ? AND day <= ?
+            ORDER BY day ASC;
+            """,
+            (date_from or "", date_to or "9999-12-31"),
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def record_study_batch(conn: sqlite3.Connection, records: List[Tuple[str, bool]], commit: bool = True) -> None:
+    """批量记录学习记录。commit=False 时由调用方统一提交。"""
     if not records:
         return
     
-    ensure_study_records_table(conn)
     cursor = conn.cursor()
     try:
         cursor.executemany(
@@ -94,7 +103,10 @@ def record_study_batch(conn: sqlite3.Connection, records: List[Tuple[str, bool]]
             """,
             [(word, 1 if is_correct else 0) for word, is_correct in records],
         )
-        conn.commit()
+        _add_daily_stats(cursor, len(records), sum(1 for _, is_correct in records if is_correct))
+        apply_outcomes(conn, records)
+        if commit:
+            conn.commit()
     finally:
         cursor.close()
 
@@ -1,12 +1,18 @@
 import sys
 import os
-# 把 test.py 所在目录（src/core）加入 Python 模块搜索路径
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# 把工程根目录加入 Python 模块搜索路径（支持直接运行 python src/core/test.py）
+# 统一按 src.core.* 导入，保证与 web_app 共用同一份模块（及其进程级缓存）
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+import logging
 import random
 # 导入工具模块的核心类和函数
-from random_kana import SQLiteDB, generate_question, DEBUG_MODE
-from user_note import ensure_user_note_table, record_wrong_word
+from src.core.app_logging import configure_logging
+from src.core.random_kana import SQLiteDB, generate_question, count_queries
+from src.core.user_note import record_wrong_word
+from src.core.quiz_distractors import draw_quiz_questions
+
+logger = logging.getLogger(__name__)
 
 # ------------------- 全局配置（应用逻辑专属：题目数量选项）-------------------
 QUESTION_COUNT_OPTIONS = [10, 20, 30, 40, 50]  # 用户可选择的题目数量
@@ -80,6 +86,33 @@ def parse_lesson_input():
 
 
 # ------------------- 主测试流程（应用逻辑核心）-------------------
+def _generate_questions(conn, lesson_pattern, target_question_count):
+    """干扰项池不可用时实时出题；无带平假名的单词时返回 None。"""
+    all_valid_words = SQLiteDB.query_valid_words(conn, lesson_pattern)
+    if len(all_valid_words) == 0:
+        return None
+
+    # 筛选有效题（跳过无法生成足够错误选项的单词）
+    print(f"\n【筛选有效题】需筛选{target_question_count}道有效题（跳过无效题）...")
+    valid_questions = []
+    random.shuffle(all_valid_words)  # 随机遍历，避免固定顺序
+
+    with count_queries(conn) as query_counter:
+        for word, hira in all_valid_words:
+            if len(valid_questions) >= target_question_count:
+                break  # 已凑够题目，停止筛选
+
+            # 调用工具模块的函数生成题目
+            question = generate_question(conn, word, hira)
+            if question:
+                valid_questions.append(question)
+                # 打印筛选进度（每5道更一次）
+                if len(valid_questions) % 5 == 0 or len(valid_questions) == target_question_count:
+                    print(f"  → 已筛选{len(valid_questions)}/{target_question_count}道有效题")
+    logger.debug("出题共执行 %d 条SQL", query_counter.count)
+    return valid_questions
+
+
 def run_kana_test():
     """
     对外提供的核心调用接口：启动平假名测试
@@ -93,34 +126,17 @@ def run_kana_test():
     db = SQLiteDB()
     try:
         with db as conn:
-            ensure_user_note_table(conn)
             # 1. 步骤1：用户选择课程范围
             lesson_pattern = parse_lesson_input()
             # 2. 步骤2：用户选择题目数量
             target_question_count = parse_question_count()
-            # 3. 步骤3：查询所有带平假名的单词
-            all_valid_words = SQLiteDB.query_valid_words(conn, lesson_pattern)
-            
-            if len(all_valid_words) == 0:
-                print("⚠️  无带平假名的单词，测试终止！")
-                return
-
-            # 4. 步骤4：筛选有效题（跳过无法生成足够错误选项的单词）
-            print(f"\n【筛选有效题】需筛选{target_question_count}道有效题（跳过无效题）...")
-            valid_questions = []
-            random.shuffle(all_valid_words)  # 随机遍历，避免固定顺序
-
-            for word, hira in all_valid_words:
-                if len(valid_questions) >= target_question_count:
-                    break  # 已凑够题目，停止筛选
-                
-                # 调用工具模块的函数生成题目
-                question = generate_question(conn, word, hira)
-                if question:
-                    valid_questions.append(question)
-                    # 打印筛选进度（每5道更一次）
-                    if len(valid_questions) % 5 == 0 or len(valid_questions) == target_question_count:
-                        print(f"  → 已筛选{len(valid_questions)}/{target_question_count}道有效题")
+            # 3. 步骤3：优先从预计算的干扰项池抽题（单条SQL）
+            valid_questions = draw_quiz_questions(conn, lesson_pattern, target_question_count)
+            if valid_questions is None:
+                valid_questions = _generate_questions(conn, lesson_pattern, target_question_count)
+                if valid_questions is None:
+                    print("⚠️  无带平假名的单词，测试终止！")
+                    return
 
             # 5. 步骤5：处理有效题不足的情况
             actual_count = len(valid_questions)
@@ -182,4 +198,5 @@ def run_kana_test():
 
 # ------------------- 测试入口（本地运行test.py时触发）-------------------
 if __name__ == "__main__":
+    configure_logging()
     run_kana_test()
\ No newline at end of file
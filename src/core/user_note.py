@@ -3,28 +3,7 @@ from typing import Optional, List, Tuple, Dict
 
 
 TABLE_USER_NOTE = "user_note"
-
-
-def ensure_user_note_table(conn: sqlite3.Connection) -> None:
-    """保证 user_note 表存在。"""
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            f"""
-            CREATE TABLE IF NOT EXISTS {TABLE_USER_NOTE} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                word TEXT NOT NULL UNIQUE,
-                hiragana TEXT,
-                meaning TEXT,
-                lesson TEXT,
-                wrong_count INTEGER NOT NULL DEFAULT 1,
-                last_wrong_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-        )
-        conn.commit()
-    finally:
-        cursor.close()
+LOOKUP_CHUNK_SIZE = 500  # IN 查询每批的单词数，避免超出 SQLite 参数个数上限
 
 
 def record_wrong_answer(
@@ -33,9 +12,9 @@ def record_wrong_answer(
     hiragana: Optional[str],
     meaning: Optional[str],
     lesson: Optional[str],
+    commit: bool = True,
 ) -> None:
-    """将做错的单词插入/更新到 user_note 表。"""
-    ensure_user_note_table(conn)
+    """将做错的单词插入/更新到 user_note 表。commit=False 时由调用方统一提交。"""
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -51,14 +30,14 @@ def record_wrong_answer(
             """,
             (word, hiragana, meaning, lesson),
         )
-        conn.commit()
+        if commit:
+            conn.commit()
     finally:
         cursor.close()
 
 
 def fetch_user_notes(conn: sqlite3.Connection) -> List[Tuple[str, Optional[str], Optional[str], Optional[str], int, str]]:
     """查询收藏（错题）列表，按最近错误时间倒序。"""
-    ensure_user_note_table(conn)
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -71,7 +50,6 @@ def fetch_user_notes(conn: sqlite3.Connection) -> List[Tuple[str, Optional[str],
 
 def delete_user_note(conn: sqlite3.Connection, word: str) -> bool:
     """删除指定单词的收藏记录。"""
-    ensure_user_note_table(conn)
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -84,49 +62,59 @@ def delete_user_note(conn: sqlite3.Connection, word: str) -> bool:
         cursor.close()
 
 
-def record_wrong_word(conn: sqlite3.Connection, word: str) -> None:
-    """从 vocabulary 查找信息并写入错题本。"""
-    ensure_user_note_table(conn)
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            "SELECT word, hiragana, meaning, lesson FROM vocabulary WHERE word = ? LIMIT 1;",
-            (word,),
-        )
-        row = cursor.fetchone()
-    finally:
-        cursor.close()
+def record_wrong_word(conn: sqlite3.Connection, word: str, commit: bool = True) -> None:
+    """从 vocabulary 查找信息并写入错题本。commit=False 时由调用方统一提交。"""
+    record_wrong_answers_batch(conn, [word], commit=commit)
 
-    if row:
-        _, hira, meaning, lesson = row
-        record_wrong_answer(conn, word, hira, meaning, lesson)
-    else:
-        record_wrong_answer(conn, word, None, None, None)
 
+def record_wrong_answers_batch(conn: sqlite3.Connection, words: List[str], commit: bool = True) -> int:
+    """批量写入错题本：一条 IN 查询取回单词信息，executemany 批量 upsert，只提交一次。
 
-def is_word_favorited(conn: sqlite3.Connection, word: str) -> bool:
-    """检查单词是否已收藏。"""
-    ensure_user_note_table(conn)
+    同一个单词出现多次时错误次数累加多次；vocabulary 中找不到的单词只记录单词本身。
+    返回写入（upsert）的条数。
+    """
+    words = [w for w in words if w]
+    if not words:
+        return 0
+
+    info: Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]] = {}
+    unique_words = list(dict.fromkeys(words))
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            f"SELECT 1 FROM {TABLE_USER_NOTE} WHERE word = ? LIMIT 1;",
-            (word,),
+        for start in range(0, len(unique_words), LOOKUP_CHUNK_SIZE):
+            chunk = unique_words[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join(["?"] * len(chunk))
+            cursor.execute(
+                f"SELECT word, hiragana, meaning, lesson FROM vocabulary WHERE word IN ({placeholders}) ORDER BY id;",
+                chunk,
+            )
+            for word, hira, meaning, lesson in cursor.fetchall():
+                # 与单条查询的 LIMIT 1 一致：同名单词取最早录入的一条
+                info.setdefault(word, (hira, meaning, lesson))
+
+        cursor.executemany(
+            f"""
+            INSERT INTO {TABLE_USER_NOTE} (word, hiragana, meaning, lesson, wrong_count, last_wrong_at)
+            VALUES (?, ?, ?, ?, 1, CURRENT_TIMESTAMP)
+            ON CONFLICT(word) DO UPDATE SET
+                hiragana = excluded.hiragana,
+                meaning = excluded.meaning,
+                lesson = excluded.lesson,
+                wrong_count = {TABLE_USER_NOTE}.wrong_count + 1,
+                last_wrong_at = CURRENT_TIMESTAMP;
+            """,
+            [(word,) + info.get(word, (None, None, None)) for word in words],
         )
-        return cursor.fetchone() is not None
+        if commit:
+            conn.commit()
+        return len(words)
     finally:
         cursor.close()
 
 
-def get_favorited_words(conn: sqlite3.Connection) -> set:
-    """获取所有已收藏的单词集合。"""
-    ensure_user_note_table(conn)
-    cursor = conn.cursor()
-    try:
-        cursor.execute(f"SELECT word FROM {TABLE_USER_NOTE};")
-        rows = cursor.fetchall()
-        return {row[0] for row in rows}
-    finally:
-        cursor.close()
-
+def favorited_column(alias: str = "v") -> str:
+    """SQL 片段：alias 所指的单词是否已收藏。
 
+    user_note.word 有唯一索引，每行只做一次索引查找，耗时与错题本大小无关。
+    """
+    return f"EXISTS (SELECT 1 FROM {TABLE_USER_NOTE} n WHERE n.word = {alias}.word)"
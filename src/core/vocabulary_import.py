@@ -0,0 +1,498 @@
+"""批量导入单词：从 CSV / JSONL / Word 表格流式读入，经过一串生成器写入 vocabulary 表。
+
+    读取（parse）→ 课次规范化（第N课）→ 校验必填字段与读音 → 去重（文件内 + 库中已有）→ 分批 executemany
+
+每一步都是生成器，任何时刻内存里只有一批待写入的行（IMPORT_CHUNK_SIZE）和去重用的 64 位哈希集合，
+导入 20 万词的词库也不会把文件整个读进内存（Word 文档除外：python-docx 需要一次解析整个文件）。
+
+写入在一个 BEGIN IMMEDIATE 事务中完成，中途出错整体回滚：
+    - vocabulary 上的 AFTER INSERT 触发器（全文索引、data_versions 计数）先删除，
+      写完后用一条 INSERT … SELECT 补全文索引、版本号只加1，最后按原 SQL 重建触发器；
+    - 批量模式（导入量与现有词库相当，或 --bulk）下同时删除二级索引，写完后重建，
+      比逐行维护索引快得多；少量追加时保留索引。
+reading_norm 在管道中直接算好一并写入。提交后增量构建干扰项池、刷新可出题表，
+数据库旁已有词库快照时一并重新生成。
+
+用法（在工程根目录执行）：
+    python -m src.core.vocabulary_import words.csv
+    python -m src.core.vocabulary_import 第3课.docx --lesson 3
+    python -m src.core.vocabulary_import deck.jsonl --dry-run      # 只检查，不写入
+
+列可以用表头指定（word/单词、hiragana/假名/读音、meaning/中文/意思、lesson/课次），
+没有表头时按「单词, 读音, 中文意思, 课次」的顺序读取。Word 文档中表格前的「第N课」标题作为该表格的课次。
+"""
+import csv
+import functools
+import itertools
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.core.data_version import bump_data_version
+from src.core.kana_normalize import fold_kana, is_reading, reading_key
+from src.core.vocabulary_store import MAX_LESSON, MIN_LESSON
+from src.database.migrations import LESSON_NO_EXPR, LESSON_NO_INSERT_TRIGGER
+
+TABLE_VOCABULARY = "vocabulary"
+TABLE_VOCABULARY_FTS = "vocabulary_fts"
+IMPORT_CHUNK_SIZE = 5000        # 每次 executemany 写入的行数
+BULK_RATIO = 0.2                # 估计导入行数达到现有词库的这个比例时，删除索引后重建
+BYTES_PER_ROW = {"docx": 200}  # 估计导入行数用的每行平均字节数（Word 文档是压缩的 XML）
+DEFAULT_BYTES_PER_ROW = 40
+MAX_REJECT_EXAMPLES = 20        # 报告中列出的无效行数
+FIELDS = ("word", "hiragana", "meaning", "lesson")   # 没有表头时的列顺序
+FIELD_ALIASES = {
+    "word": ("word", "单词", "單詞", "単語", "日语", "日文", "写法"),
+    "hiragana": ("hiragana", "reading", "kana", "假名", "平假名", "读音", "讀音", "読み", "注音"),
+    "meaning": ("meaning", "中文", "意思", "中文意思", "释义", "词义", "翻译"),
+    "lesson": ("lesson", "课", "课次", "課", "课程"),
+}
+FORMATS = {".csv": "csv", ".tsv": "tsv", ".txt": "tsv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".docx": "docx"}
+READING_SEPARATORS = re.compile(r"[/／∕]")    # 读音中并列的两种说法，如「じゃあ∕では」
+
+_ALIAS_TO_FIELD = {alias.lower(): field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+_LESSON_PATTERN = re.compile(r"^(?:第\s*)?0*(\d+|[一二三四五六七八九十]+)\s*[课課]?$")
+_LESSON_EN_PATTERN = re.compile(r"^(?:lesson|l)\s*[-_.]?\s*0*(\d+)$", re.IGNORECASE)
+_CN_DIGITS = {ch: i for i, ch in enumerate("零一二三四五六七八九")}
+_PLAIN_HIRAGANA = re.compile(r"[\u3041-\u3096ー]+\Z")     # 与 kana_normalize.is_reading 相同的字符范围
+
+# 管道中的一行：(来源位置, {字段: 值})，来源位置用于报告无效行，如「words.csv:12」
+Row = Tuple[str, Dict[str, str]]
+# 校验通过、待写入的一行：(word, hiragana, meaning, lesson, reading_norm)
+VocabRow = Tuple[str, str, str, str, str]
+
+
+# ------------------- 读取 -------------------
+def detect_format(path: str) -> str:
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"无法识别的文件类型：{path}（支持 {', '.join(sorted(FORMATS))}，或用 --format 指定）")
+    return fmt
+
+
+def _header_fields(cells: Sequence[str]) -> Optional[List[Optional[str]]]:
+    """表头行 → 每列对应的字段；不是表头（没有「单词」列或有无法识别的列名）时返回 None。"""
+    fields = [_ALIAS_TO_FIELD.get((cell or "").strip().lower()) for cell in cells]
+    named = [(cell or "").strip() for cell in cells]
+    if "word" not in fields or any(name and field is None for name, field in zip(named, fields)):
+        return None
+    return fields
+
+
+def _rows_from_cells(source: str, rows: Iterable[Tuple[int, Sequence[str]]]) -> Iterator[Row]:
+    """把表格行（行号, 单元格列表）转为字段字典；第一行是表头时按表头取列。"""
+    fields: Optional[List[Optional[str]]] = None
+    first = True
+    for line_no, cells in rows:
+        if not any((cell or "").strip() for cell in cells):
+            continue
+        if first:
+            first = False
+            fields = _header_fields(cells)
+            if fields is not None:
+                continue
+        columns = fields or FIELDS
+        yield f"{source}:{line_no}", {
+            field: cell for field, cell in zip(columns, cells) if field is not None and cell is not None
+        }
+
+
+def _read_csv(path: str, encoding: str, delimiter: str) -> Iterator[Row]:
+    with open(path, newline="", encoding=encoding) as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        yield from _rows_from_cells(os.path.basename(path), ((reader.line_num, cells) for cells in reader))
+
+
+def _read_jsonl(path: str, encoding: str) -> Iterator[Row]:
+    """每行一个 JSON 对象（键同表头别名）或数组（按 FIELDS 顺序）；无法解析的行带上 error 交给校验步骤报告。"""
+    source = os.path.basename(path)
+    with open(path, encoding=encoding) as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            where = f"{source}:{line_no}"
+            try:
+                item = json.loads(line)
+            except ValueError:
+                yield where, {"error": "JSON 无法解析"}
+                continue
+            if isinstance(item, list):
+                yield where, {field: str(v) for field, v in zip(FIELDS, item) if v is not None}
+            elif isinstance(item, dict):
+                yield where, {
+                    _ALIAS_TO_FIELD[key.strip().lower()]: str(v)
+                    for key, v in item.items() if v is not None and key.strip().lower() in _ALIAS_TO_FIELD
+                }
+            else:
+                yield where, {"error": "不是 JSON 对象或数组"}
+
+
+def _read_docx(path: str) -> Iterator[Row]:
+    """按文档顺序读取段落与表格：「第N课」标题段落设定其后表格的课次，每个表格单独识别表头。"""
+    try:
+        import docx
+        from docx.table import Table
+    except ImportError:
+        raise RuntimeError("读取 Word 文档需要 python-docx：pip install python-docx") from None
+
+    document = docx.Document(path)
+    source = os.path.basename(path)
+    heading_lesson = None
+    table_no = 0
+    for element in document.element.body.iterchildren():
+        tag = element.tag.rsplit("}", 1)[-1]
+        if tag == "p":
+            text = "".join(node.text or "" for node in element.iter() if node.tag.endswith("}t")).strip()
+            if text and not text.isdigit() and normalize_lesson(text):
+                heading_lesson = text
+        elif tag == "tbl":
+            table_no += 1
+            rows = ((i, [cell.text for cell in row.cells]) for i, row in enumerate(Table(element, document).rows, 1))
+            for where, fields in _rows_from_cells(f"{source}:表{table_no}", rows):
+                if heading_lesson and not (fields.get("lesson") or "").strip():
+                    fields["lesson"] = heading_lesson
+                yield where, fields
+
+
+def read_rows(path: str, fmt: Optional[str] = None, encoding: str = "utf-8-sig") -> Iterator[Row]:
+    """按文件类型逐行读取，产出 (来源位置, 字段字典)。"""
+    fmt = fmt or detect_format(path)
+    if fmt == "csv":
+        return _read_csv(path, encoding, ",")
+    if fmt == "tsv":
+        return _read_csv(path, encoding, "\t")
+    if fmt == "jsonl":
+        return _read_jsonl(path, encoding)
+    if fmt == "docx":
+        return _read_docx(path)
+    raise ValueError(f"不支持的格式：{fmt}")
+
+
+# ------------------- 规范化、去重、校验 -------------------
+def _chinese_number(text: str) -> Optional[int]:
+    """一 … 九十九 → 整数。"""
+    if "十" not in text:
+        return _CN_DIGITS.get(text) if len(text) == 1 else None
+    tens, _, ones = text.partition("十")
+    if len(tens) > 1 or len(ones) > 1:
+        return None
+    return (_CN_DIGITS.get(tens, 0) if tens else 1) * 10 + (_CN_DIGITS.get(ones, 0) if ones else 0)
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_lesson(label: Optional[str]) -> Optional[str]:
+    """把「第3课」「第03課」「第三课」「3」「Lesson 3」等写法统一为「第3课」；无法识别或超出 1-48 时返回 None。"""
+    text = unicodedata.normalize("NFKC", label or "").strip()
+    match = _LESSON_PATTERN.match(text) or _LESSON_EN_PATTERN.match(text)
+    if not match:
+        return None
+    digits = match.group(1)
+    num = int(digits) if digits.isdigit() else _chinese_number(digits)
+    if num is None or not MIN_LESSON <= num <= MAX_LESSON:
+        return None
+    return f"第{num}课"
+
+
+def normalize_rows(rows: Iterable[Row], default_lesson: Optional[str] = None) -> Iterator[Row]:
+    """去掉首尾空白，课次统一为「第N课」（行内没有课次时用 default_lesson）；原文保留在 lesson_raw 中供校验报告。"""
+    for where, fields in rows:
+        out = {field: (fields.get(field) or "").strip() for field in FIELDS}
+        out["lesson_raw"] = out["lesson"] or (default_lesson or "")
+        out["lesson"] = normalize_lesson(out["lesson_raw"]) or ""
+        if "error" in fields:
+            out["error"] = fields["error"]
+        yield where, out
+
+
+def reading_error(hiragana: str) -> Optional[str]:
+    """读音的校验：允许为空；否则只能由平/片假名与长音符组成，并列读法用 / 分隔。"""
+    if not hiragana or _PLAIN_HIRAGANA.match(hiragana):
+        return None
+    for part in READING_SEPARATORS.split(hiragana):
+        if not is_reading(fold_kana(part)):
+            return "读音含非假名字符"
+    return None
+
+
+def validate_rows(rows: Iterable[Row], report: "ImportReport") -> Iterator[VocabRow]:
+    """校验必填字段与读音，产出待写入的 (word, hiragana, meaning, lesson, reading_norm)。"""
+    for where, fields in rows:
+        word, hiragana, meaning, lesson = (fields[field] for field in FIELDS)
+        if "error" in fields:
+            error = fields["error"]
+        elif not word:
+            error = "缺少单词"
+        elif not meaning:
+            error = "缺少中文意思"
+        elif not lesson:
+            error = f"课次无效（{fields['lesson_raw']}）" if fields["lesson_raw"] else "缺少课次"
+        else:
+            error = reading_error(hiragana)
+        if error:
+            report.reject(where, error, word)
+            continue
+        # 纯平假名的读音归一化后不变，省去一次 fold_kana（大多数行如此）
+        norm = hiragana if _PLAIN_HIRAGANA.match(hiragana) else reading_key(word, hiragana)
+        yield word, hiragana, meaning, lesson, norm
+
+
+def _row_key(word: str, hiragana: Optional[str], lesson: str) -> int:
+    """去重键：同一课中写法与读音都相同视为同一个单词。只保存 64 位哈希以节省内存。"""
+    return hash((word, hiragana or "", lesson))
+
+
+def existing_keys(conn: sqlite3.Connection) -> set:
+    """库中已有单词的去重键。"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT word, hiragana, lesson FROM {TABLE_VOCABULARY};")
+        return {_row_key(word, hira, lesson) for word, hira, lesson in cursor}
+    finally:
+        cursor.close()
+
+
+def dedupe_rows(rows: Iterable[VocabRow], seen: set, report: "ImportReport") -> Iterator[VocabRow]:
+    """跳过文件内重复以及库中已有的单词（seen 预先装入库中已有的键，本次导入的键随之加入）。"""
+    for row in rows:
+        key = _row_key(row[0], row[1], row[3])
+        if key in seen:
+            report.duplicates += 1
+            continue
+        seen.add(key)
+        yield row
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ------------------- 写入 -------------------
+class ImportReport:
+    """一次导入的统计。"""
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.rejected: Counter = Counter()
+        self.examples: List[Tuple[str, str, str]] = []     # (来源位置, 原因, 单词)
+        self.bulk = False
+        self.dry_run = False
+        self.seconds = 0.0
+
+    def reject(self, where: str, reason: str, word: str) -> None:
+        self.rejected[reason.split("（")[0]] += 1
+        if len(self.examples) < MAX_REJECT_EXAMPLES:
+            self.examples.append((where, reason, word))
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "read": self.read,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "rejected": dict(self.rejected),
+            "bulk": self.bulk,
+            "dryRun": self.dry_run,
+            "seconds": round(self.seconds, 3),
+            "rowsPerSecond": round(self.rows_per_second),
+        }
+
+    def format(self) -> str:
+        action, wrote = ("检查完成（未写入）", "可写入") if self.dry_run else ("导入完成", "写入")
+        lines = [
+            f"✅ {action}：读取 {self.read} 行，{wrote} {self.imported} 个单词，"
+            f"跳过重复 {self.duplicates} 个，无效 {sum(self.rejected.values())} 行；"
+            f"用时 {self.seconds:.2f}s（{self.rows_per_second:,.0f} 行/秒{'，批量模式' if self.bulk else ''}）"
+        ]
+        for reason, count in self.rejected.most_common():
+            lines.append(f"  {reason}：{count} 行")
+        for where, reason, word in self.examples:
+            lines.append(f"    {where}  {reason}  {word}")
+        return "\n".join(lines)
+
+
+def _vocabulary_schema(conn: sqlite3.Connection) -> List[Tuple[str, str, str]]:
+    """vocabulary 上的二级索引与 AFTER INSERT 触发器：(类型, 名称, 建立用的 SQL)。"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = ? AND sql IS NOT NULL AND type IN ('index', 'trigger');",
+            (TABLE_VOCABULARY,),
+        )
+        return [
+            (kind, name, sql) for kind, name, sql in cursor.fetchall()
+            if kind == "index" or re.search(r"\bAFTER\s+INSERT\s+ON\b", sql, re.IGNORECASE)
+        ]
+    finally:
+        cursor.close()
+
+
+def _has_fts(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?;", (TABLE_VOCABULARY_FTS,)).fetchone()
+    return row is not None
+
+
+def estimate_rows(paths: Sequence[str], fmt: Optional[str] = None) -> int:
+    """按文件大小粗略估计行数（用于决定是否进入批量模式）。"""
+    return sum(
+        os.path.getsize(path) // BYTES_PER_ROW.get(fmt or detect_format(path), DEFAULT_BYTES_PER_ROW)
+        for path in paths
+    )
+
+
+def import_vocabulary(
+    conn: sqlite3.Connection,
+    paths: Sequence[str],
+    fmt: Optional[str] = None,
+    default_lesson: Optional[str] = None,
+    encoding: str = "utf-8-sig",
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    bulk: Optional[bool] = None,
+    dry_run: bool = False,
+) -> ImportReport:
+    """把若干文件中的单词导入 vocabulary（一个事务），返回统计。
+
+    bulk=None 时按文件大小估计导入行数，达到现有词库的 BULK_RATIO 倍即删除二级索引、写完重建；
+    dry_run=True 时执行全部步骤后回滚。只写 vocabulary 及其全文索引，干扰项池由调用方之后增量构建。
+    """
+    report = ImportReport()
+    report.dry_run = dry_run
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE;")
+        try:
+            existing = cursor.execute(f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {TABLE_VOCABULARY};").fetchone()
+            existing_rows, last_id = existing
+            report.bulk = bulk if bulk is not None else estimate_rows(paths, fmt) >= existing_rows * BULK_RATIO
+            schema = [(kind, name, sql) for kind, name, sql in _vocabulary_schema(conn)
+                      if kind == "trigger" or report.bulk]
+            for kind, name, _sql in schema:
+                cursor.execute(f'DROP {kind.upper()} "{name}";')
+
+            def counted(rows: Iterable[Row]) -> Iterator[Row]:
+                for row in rows:
+                    report.read += 1
+                    yield row
+
+            rows = itertools.chain.from_iterable(read_rows(path, fmt, encoding) for path in paths)
+            rows = normalize_rows(counted(rows), default_lesson)
+            rows = dedupe_rows(validate_rows(rows, report), existing_keys(conn), report)
+            for chunk in _chunks(rows, chunk_size):
+                cursor.executemany(
+                    f"INSERT INTO {TABLE_VOCABULARY} (word, hiragana, meaning, lesson, reading_norm) VALUES (?, ?, ?, ?, ?);",
+                    chunk,
+                )
+                report.imported += len(chunk)
+
+            # 触发器被删除期间的写入：一次补全文索引（旧版 SQLite 还有普通列 lesson_no）、版本号只加1
+            if report.imported:
+                if any(name == LESSON_NO_INSERT_TRIGGER for _kind, name, _sql in schema):
+                    cursor.execute(
+                        f"UPDATE {TABLE_VOCABULARY} SET lesson_no = {LESSON_NO_EXPR.format('lesson')} WHERE id > ?;",
+                        (last_id,),
+                    )
+                if _has_fts(conn):
+                    cursor.execute(
+                        f"""
+                        INSERT INTO {TABLE_VOCABULARY_FTS}(rowid, word, hiragana, meaning)
+                        SELECT id, word, hiragana, meaning FROM {TABLE_VOCABULARY} WHERE id > ?;
+                        """,
+                        (last_id,),
+                    )
+                bump_data_version(conn, TABLE_VOCABULARY)
+            for _kind, _name, sql in schema:
+                cursor.execute(sql)
+        except BaseException:
+            conn.rollback()
+            raise
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    finally:
+        cursor.close()
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def main():
+    import argparse
+    import sys
+
+    from src.core.quiz_distractors import build_distractors
+    from src.core.random_kana import SQLiteDB
+    from src.core.vocabulary_snapshot import build_snapshot, snapshot_path
+    from src.database.migrations import migrate
+
+    parser = argparse.ArgumentParser(description="从 CSV / JSONL / Word 表格批量导入单词")
+    parser.add_argument("files", nargs="+", help="要导入的文件")
+    parser.add_argument("--db", default=SQLiteDB().db_path, help="数据库文件路径")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())), help="文件格式（默认按扩展名判断）")
+    parser.add_argument("--encoding", default="utf-8-sig", help="CSV/JSONL 的编码（Excel 导出的中文 CSV 常为 gbk）")
+    parser.add_argument("--lesson", help="行内没有课次时使用的课次，如 3 或 第3课")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="每批写入的行数")
+    bulk = parser.add_mutually_exclusive_group()
+    bulk.add_argument("--bulk", dest="bulk", action="store_true", default=None, help="删除二级索引，写完后重建")
+    bulk.add_argument("--no-bulk", dest="bulk", action="store_false", help="保留二级索引逐行维护")
+    parser.add_argument("--dry-run", action="store_true", help="只读取与校验，不写入数据库")
+    parser.add_argument("--skip-distractors", action="store_true", help="导入后不构建干扰项池")
+    parser.add_argument("--workers", type=int, default=None, help="构建干扰项池的子进程数，默认CPU核数")
+    args = parser.parse_args()
+
+    if args.lesson and not normalize_lesson(args.lesson):
+        parser.error(f"课次无效：{args.lesson}（需为 {MIN_LESSON}-{MAX_LESSON}）")
+    for path in args.files:
+        if not os.path.isfile(path):
+            parser.error(f"找不到文件：{path}")
+
+    conn = sqlite3.connect(args.db)
+    try:
+        migrate(conn)
+        report = import_vocabulary(
+            conn, args.files, fmt=args.format, default_lesson=args.lesson, encoding=args.encoding,
+            chunk_size=max(1, args.chunk_size), bulk=args.bulk, dry_run=args.dry_run,
+        )
+    except (ValueError, RuntimeError, UnicodeDecodeError, csv.Error) as e:
+        print(f"❌ 导入失败（已回滚）：{e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    print(report.format())
+    if args.dry_run or not report.imported:
+        return
+
+    if not args.skip_distractors:
+        start = time.perf_counter()
+        built = build_distractors(args.db, workers=args.workers, incremental=True)
+        print(f"✅ 干扰项池增量构建完成：重算 {built} 个单词，用时 {time.perf_counter() - start:.2f}s")
+    path = snapshot_path(args.db)
+    if os.path.exists(path):
+        conn = sqlite3.connect(args.db)
+        try:
+            meta = build_snapshot(conn, path)
+        except (OSError, sqlite3.Error) as e:
+            # 数据已经导入；快照与数据库指纹不一致，下次启动时 preload 会自动重建
+            print(f"⚠️ 词库快照未能更新（{e}），快照已过期，将在下次启动服务时自动重建")
+            return
+        finally:
+            conn.close()
+        print(f"✅ 词库快照已更新：{meta['rows']} 个单词")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""词库快照：把 vocabulary、课次区间、假名混淆组与可出题表写成一个带版本的二进制文件，启动时 mmap 直接使用。
+
+快照与数据库放在同一目录（japanese_learning.db → japanese_learning.snapshot），由 build_exe.py 打包时生成。
+启动时 preload() 比对快照中记录的指纹（格式版本、表结构版本、各来源表的 data_versions、单词数与最大 id），
+文件不存在、格式不对或指纹不一致时按当前数据库重新生成。快照打开后：
+    - VocabularyStore 的各列直接是映射内存上的 memoryview（不解析、不复制，取值时才解码字符串）
+    - 假名混淆组索引直接由快照构建，不再查询 japanese_kana
+    - 随机出题从快照中的可出题区间抽取，不再查询 quiz_eligible
+运行期间词库或可出题表被修改后，相应部分改从 SQLite 重新载入；快照在下次启动时重建。
+
+文件格式（小端）：
+    头部    magic(8) 格式版本(u32) 段数(u32)
+    段表    每段：名称(16) 偏移(u64) 长度(u64)；段数据按 8 字节对齐
+    段      meta（JSON）、整数列（array 原始字节）、字符串列（UTF-8 拼接 + u32 偏移 + NULL 标记）
+
+关闭方式：JAPANESE_LEARNING_SNAPSHOT=0
+手动生成 / 检查（在工程根目录执行）：
+    python -m src.core.vocabulary_snapshot --db 路径           # 重新生成
+    python -m src.core.vocabulary_snapshot --db 路径 --check   # 只检查是否与数据库一致
+"""
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from src.core.data_version import get_data_versions
+from src.core.random_kana import TABLE_KANA, KanaIndex, set_kana_index
+from src.core.vocabulary_store import (
+    LESSON_INDEX_TYPECODE,
+    NULL_LESSON_NO,
+    TABLE_QUIZ_ELIGIBLE,
+    TABLE_VOCABULARY,
+    EligibleIndex,
+    VocabularyStore,
+    install_vocabulary_store,
+    store_enabled,
+)
+from src.database.migrations import get_schema_version
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ENV = "JAPANESE_LEARNING_SNAPSHOT"
+SNAPSHOT_SUFFIX = ".snapshot"
+MAGIC = b"JLVOCAB\x00"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct("<8sII")
+_SECTION = struct.Struct("<16sQQ")
+_ALIGN = 8
+
+
+def snapshot_enabled() -> bool:
+    return os.environ.get(SNAPSHOT_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def snapshot_path(db_path: str) -> str:
+    return os.path.splitext(db_path)[0] + SNAPSHOT_SUFFIX
+
+
+def current_fingerprint(conn: sqlite3.Connection) -> Dict[str, Optional[int]]:
+    """快照与数据库是否一致的依据：任何一项变化都需要重建。"""
+    versions = get_data_versions(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*), MAX(id) FROM {TABLE_VOCABULARY};")
+        rows, max_id = cursor.fetchone()
+    finally:
+        cursor.close()
+    return {
+        "format": FORMAT_VERSION,
+        "schema": get_schema_version(conn),
+        "vocabulary": versions.get(TABLE_VOCABULARY),
+        "japanese_kana": versions.get(TABLE_KANA),
+        "quiz_eligible": versions.get(TABLE_QUIZ_ELIGIBLE),
+        "rows": rows,
+        "maxId": max_id,
+    }
+
+
+# ------------------- 生成 -------------------
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class _TextWriter:
+    """字符串列：UTF-8 拼接、字节偏移与 NULL 标记，对应读取端的 MappedTextColumn。"""
+
+    def __init__(self):
+        self.blob = bytearray()
+        self.offsets = array("I", [0])
+        self.nulls = bytearray()
+
+    def append(self, value: Optional[str]) -> None:
+        self.nulls.append(value is None)
+        if value:
+            self.blob += value.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+    def sections(self, prefix: str) -> Dict[str, bytes]:
+        return {
+            f"{prefix}.off": _little_endian(self.offsets),
+            f"{prefix}.null": bytes(self.nulls),
+            f"{prefix}.txt": bytes(self.blob),
+        }
+
+
+def _runs(keys: List[int]) -> array:
+    """把连续相同的 key 压缩为 (key, start, end) 三元组序列。"""
+    out = array("q")
+    start = 0
+    for i in range(1, len(keys) + 1):
+        if i == len(keys) or keys[i] != keys[start]:
+            out.extend((keys[start], start, i))
+            start = i
+    return out
+
+
+def _same_reading(column: _TextWriter, pos: int, hira: Optional[str]) -> bool:
+    """生成时核对可出题表的读音与 vocabulary 当前读音一致（构建干扰项池后词库被改过的行不收录）。"""
+    if column.nulls[pos]:
+        return hira is None
+    return bytes(column.blob[column.offsets[pos]:column.offsets[pos + 1]]).decode("utf-8") == hira
+
+
+def _collect_sections(conn: sqlite3.Connection) -> Tuple[Dict[str, bytes], Dict]:
+    fingerprint = current_fingerprint(conn)
+    ids, lesson_nos, lesson_idx = array("q"), array("q"), array(LESSON_INDEX_TYPECODE)
+    valid = bytearray()
+    words, hiraganas, meanings, labels = _TextWriter(), _TextWriter(), _TextWriter(), _TextWriter()
+    label_index: Dict[Optional[str], int] = {}
+    position_of: Dict[int, int] = {}
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT id, word, hiragana, meaning, lesson, lesson_no FROM {TABLE_VOCABULARY} "
+            f"ORDER BY lesson_no ASC, id ASC;"
+        )
+        for vocab_id, word, hira, meaning, lesson, lesson_no in cursor:
+            idx = label_index.get(lesson)
+            if idx is None:
+                idx = label_index[lesson] = len(label_index)
+                labels.append(lesson)
+            position_of[vocab_id] = len(ids)
+            ids.append(vocab_id)
+            lesson_nos.append(NULL_LESSON_NO if lesson_no is None else lesson_no)
+            lesson_idx.append(idx)
+            words.append(word)
+            hiraganas.append(hira)
+            meanings.append(meaning)
+            valid.append(1 if hira is not None and hira.strip() else 0)
+
+        # 可出题表按 seq 顺序（同一课次连续），只保留与当前词库读音一致的行
+        eligible_pos, eligible_lessons = array("I"), []
+        options = _TextWriter()
+        cursor.execute(f"SELECT vocab_id, hiragana, options FROM {TABLE_QUIZ_ELIGIBLE} ORDER BY seq;")
+        for vocab_id, hira, options_json in cursor:
+            pos = position_of.get(vocab_id)
+            if pos is None or not _same_reading(hiraganas, pos, hira):
+                continue
+            eligible_pos.append(pos)
+            eligible_lessons.append(lesson_idx[pos])
+            options.append(options_json)
+
+        cursor.execute(f"SELECT kana, confusion_group_id FROM {TABLE_KANA} ORDER BY id;")
+        kana_text = "".join(f"{kana}\t{gid}\n" for kana, gid in cursor.fetchall() if kana)
+    finally:
+        cursor.close()
+
+    sections = {
+        "ids": _little_endian(ids),
+        "lesson_no": _little_endian(lesson_nos),
+        "lesson_idx": _little_endian(lesson_idx),
+        "valid": bytes(valid),
+        "lesson.ranges": _little_endian(_runs(list(lesson_idx))),
+        "kana.txt": kana_text.encode("utf-8"),
+        "elig.pos": _little_endian(eligible_pos),
+        "elig.ranges": _little_endian(_runs(eligible_lessons)),
+    }
+    for prefix, column in (("word", words), ("hiragana", hiraganas), ("meaning", meanings),
+                           ("label", labels), ("elig.opt", options)):
+        sections.update(column.sections(prefix))
+    meta = {
+        "fingerprint": fingerprint,
+        "rows": len(ids),
+        "lessons": len(label_index),
+        "eligible": len(eligible_pos),
+        "kana": kana_text.count("\n"),
+        "builtAt": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    return sections, meta
+
+
+def build_snapshot(conn: sqlite3.Connection, path: str) -> Dict:
+    """按当前数据库生成快照文件（先写临时文件再替换），返回 meta。"""
+    start = time.perf_counter()
+    # 在同一个读事务中取指纹和数据，保证两者一致
+    in_transaction = conn.in_transaction
+    if not in_transaction:
+        conn.execute("BEGIN;")
+    try:
+        sections, meta = _collect_sections(conn)
+    finally:
+        if not in_transaction:
+            conn.rollback()
+    meta["buildMs"] = round((time.perf_counter() - start) * 1000, 1)
+    sections = {"meta": json.dumps(meta, ensure_ascii=False).encode("utf-8"), **sections}
+
+    names = list(sections)
+    offset = _HEADER.size + _SECTION.size * len(names)
+    table, body = [], bytearray()
+    for name in names:
+        pad = -(offset + len(body)) % _ALIGN
+        body += b"\x00" * pad
+        table.append(_SECTION.pack(name.encode("ascii"), offset + len(body), len(sections[name])))
+        body += sections[name]
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(names)))
+        f.writelines(table)
+        f.write(body)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Windows 上旧快照正被运行中的服务映射时无法替换；删掉临时文件，保留旧快照
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return meta
+
+
+# ------------------- 读取 -------------------
+class MappedTextColumn:
+    """映射内存上的字符串列，接口同 vocabulary_store 的 _TextColumn。"""
+
+    __slots__ = ("text", "offsets", "nulls")
+
+    def __init__(self, text: memoryview, offsets: memoryview, nulls: memoryview):
+        self.text = text
+        self.offsets = offsets
+        self.nulls = nulls
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self.nulls[i]:
+            return None
+        return str(self.text[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self) -> int:
+        return len(self.nulls)
+
+
+def _read_table(header: bytes, path: str) -> Dict[str, Tuple[int, int]]:
+    magic, version, count = _HEADER.unpack_from(header)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"不是当前格式的词库快照：{path}")
+    table = {}
+    for i in range(count):
+        name, offset, length = _SECTION.unpack_from(header, _HEADER.size + i * _SECTION.size)
+        table[name.rstrip(b"\x00").decode("ascii")] = (offset, length)
+    return table
+
+
+def read_meta(path: str) -> Optional[Dict]:
+    """只读取快照的 meta（普通文件读取，不建立映射）；文件不存在或损坏时返回 None。"""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_HEADER.size)
+            if len(head) < _HEADER.size:
+                return None
+            count = _HEADER.unpack(head)[2]
+            head += f.read(_SECTION.size * count)
+            offset, length = _read_table(head, path)["meta"]
+            f.seek(offset)
+            return json.loads(f.read(length).decode("utf-8"))
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+class VocabularySnapshot:
+    """已映射的快照文件。各段是映射内存上的 memoryview，生命周期与进程相同。"""
+
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise ValueError("词库快照按小端格式保存")
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        table = _read_table(view[:_HEADER.size + _SECTION.size * _HEADER.unpack_from(view)[2]], path)
+        self.sections = {name: view[offset:offset + length] for name, (offset, length) in table.items()}
+        self.meta = json.loads(str(self.sections["meta"], "utf-8"))
+
+    @property
+    def fingerprint(self) -> Dict:
+        return self.meta["fingerprint"]
+
+    def ints(self, name: str, typecode: str) -> memoryview:
+        return self.sections[name].cast(typecode)
+
+    def text(self, prefix: str) -> MappedTextColumn:
+        return MappedTextColumn(self.sections[f"{prefix}.txt"], self.ints(f"{prefix}.off", "I"),
+                                self.sections[f"{prefix}.null"])
+
+    def _ranges(self, name: str, labels: List[Optional[str]]) -> Dict[Optional[str], List[Tuple[int, int]]]:
+        runs = self.ints(name, "q")
+        ranges: Dict[Optional[str], List[Tuple[int, int]]] = {}
+        for i in range(0, len(runs), 3):
+            ranges.setdefault(labels[runs[i]], []).append((runs[i + 1], runs[i + 2]))
+        return ranges
+
+    def to_store(self) -> VocabularyStore:
+        store = VocabularyStore()
+        fingerprint = self.fingerprint
+        store.version = fingerprint["vocabulary"]
+        store.ids = self.ints("ids", "q")
+        store.lesson_nos = self.ints("lesson_no", "q")
+        store.lesson_idx = self.ints("lesson_idx", LESSON_INDEX_TYPECODE)
+        store.valid = self.sections["valid"]
+        store.words = self.text("word")
+        store.hiraganas = self.text("hiragana")
+        store.meanings = self.text("meaning")
+        label_column = self.text("label")
+        store.lesson_labels = [label_column[i] for i in range(len(label_column))]
+        store.lesson_ranges = self._ranges("lesson.ranges", store.lesson_labels)
+        store.eligible = EligibleIndex(
+            self.ints("elig.pos", "I"),
+            self.text("elig.opt"),
+            self._ranges("elig.ranges", store.lesson_labels),
+            fingerprint["quiz_eligible"],
+        )
+        return store
+
+    def kana_rows(self) -> List[Tuple[str, int]]:
+        rows = []
+        for line in str(self.sections["kana.txt"], "utf-8").splitlines():
+            kana, gid = line.split("\t")
+            rows.append((kana, None if gid == "None" else int(gid)))
+        return rows
+
+
+def preload(conn: sqlite3.Connection, db_path: str) -> Optional[VocabularySnapshot]:
+    """启动时调用：打开（必要时重建）快照，装入进程级词库与假名索引。失败时返回 None，运行期回退到 SQLite。"""
+    if not snapshot_enabled() or not store_enabled():
+        return None
+    path = snapshot_path(db_path)
+    try:
+        meta = read_meta(path)
+        if meta is None or meta.get("fingerprint") != current_fingerprint(conn):
+            start = time.perf_counter()
+            meta = build_snapshot(conn, path)
+            logger.info("词库快照已重建：%s（%d 个单词，%.0fms）", path, meta["rows"],
+                        (time.perf_counter() - start) * 1000)
+        snapshot = VocabularySnapshot(path)
+        store = snapshot.to_store()
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        logger.warning("词库快照不可用，回退到 SQLite：%s", e)
+        return None
+    store.load_favorites(conn, get_data_versions(conn).get("user_note"))
+    install_vocabulary_store(conn, store)
+    set_kana_index(conn, KanaIndex(snapshot.kana_rows()))
+    return snapshot
+
+
+def main():
+    import argparse
+
+    from src.core.random_kana import SQLiteDB
+    from src.database.migrations import migrate
+
+    parser = argparse.ArgumentParser(description="生成或检查词库快照")
+    parser.add_argument("--db", default=SQLiteDB().db_path, help="数据库文件路径")
+    parser.add_argument("--check", action="store_true", help="只检查快照是否与数据库一致，不重新生成")
+    args = parser.parse_args()
+
+    path = snapshot_path(args.db)
+    conn = sqlite3.connect(args.db)
+    try:
+        migrate(conn)
+        if args.check:
+            meta = read_meta(path)
+            current = meta is not None and meta.get("fingerprint") == current_fingerprint(conn)
+            print(f"{path}：{'与数据库一致' if current else '不存在或已过期'}")
+            sys.exit(0 if current else 1)
+        meta = build_snapshot(conn, path)
+    finally:
+        conn.close()
+    print(f"✓ 词库快照已生成：{path}（{os.path.getsize(path) / 1024:.0f} KiB，{meta['rows']} 个单词，"
+          f"{meta['eligible']} 个可出题单词，{meta['buildMs']}ms）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""进程内词库：把 vocabulary 表一次性载入紧凑的列式结构，课次列表、按课取词、收藏标记与随机抽词不再走 SQL。
+
+存储方式：
+    ids / lesson_nos        array('q')，按 (lesson_no, id) 排序
+    word / hiragana / meaning  每列拼成一个长字符串 + array('I') 偏移（取值时切片），
+                            省掉每个 str 对象约 60 字节的对象头
+    lesson                  课次名称表（sys.intern）+ array('H') 下标
+    课次偏移                每个课次名称在排序后数组中的 [start, end) 区间
+
+由词库快照（vocabulary_snapshot.py）提供时，上述各列直接是映射内存上的 memoryview，
+并额外带有可出题单词的索引（eligible）。
+
+一致性：每次取用前读一次 data_versions（一条主键查询），vocabulary 版本变化时整体重载，
+user_note 版本变化时只重载收藏集合。搜索仍走 SQLite FTS（见 search.py）。
+
+关闭方式（回退到原来的 SQLite 查询）：
+    JAPANESE_LEARNING_VOCAB_STORE=0 python web_app.py
+
+内存占用测量（在工程根目录执行）：
+    python -m src.core.vocabulary_store --db 路径
+"""
+import bisect
+import os
+import random
+import sqlite3
+import sys
+import threading
+from array import array
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple, Union
+
+from src.core.data_version import get_data_versions
+from src.core.user_note import TABLE_USER_NOTE
+from src.database.sqlite_pool import database_path
+
+TABLE_VOCABULARY = "vocabulary"
+TABLE_QUIZ_ELIGIBLE = "quiz_eligible"
+VOCAB_STORE_ENV = "JAPANESE_LEARNING_VOCAB_STORE"
+NULL_LESSON_NO = -(1 << 63)  # lesson_no 为 NULL 时的占位值：与 SQL 一样排在最前
+LESSON_INDEX_TYPECODE = "I"  # 课次标签下标（无符号32位，导入的课次标签可能超过 65535 种）
+MIN_LESSON, MAX_LESSON = 1, 48
+
+LessonInput = Union[str, List[str]]
+
+
+def store_enabled() -> bool:
+    return os.environ.get(VOCAB_STORE_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+class _TextColumn:
+    """只追加的字符串列：所有值拼接成一个 str，offsets[i]:offsets[i+1] 为第 i 个值；NULL 单独标记。"""
+
+    __slots__ = ("text", "offsets", "nulls", "_parts", "_length")
+
+    def __init__(self):
+        self.text = ""
+        self.offsets = array("I", [0])
+        self.nulls = bytearray()
+        self._parts: Optional[List[str]] = []
+        self._length = 0
+
+    def append(self, value: Optional[str]) -> None:
+        self.nulls.append(value is None)
+        if value:
+            self._parts.append(value)
+            self._length += len(value)
+        self.offsets.append(self._length)
+
+    def seal(self) -> None:
+        """载入结束后拼接成一个字符串。"""
+        self.text = "".join(self._parts)
+        self._parts = None
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self.nulls[i]:
+            return None
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    def __len__(self) -> int:
+        return len(self.nulls)
+
+
+def _lesson_label_number(label: str) -> Optional[int]:
+    """「第N课」且 1 <= N <= 48 时返回 N（与 get_lessons 的规则一致）。"""
+    s = label.strip()
+    if s.startswith("第") and s.endswith("课") and s[1:-1].isdigit():
+        num = int(s[1:-1])
+        if MIN_LESSON <= num <= MAX_LESSON:
+            return num
+    return None
+
+
+class EligibleIndex:
+    """可出题单词（quiz_eligible 的内存版本，来自词库快照）：词库中的位置 + 干扰项 JSON，按课次分段。"""
+
+    __slots__ = ("positions", "options", "ranges", "version")
+
+    def __init__(self, positions, options, ranges: Dict[Optional[str], List[Tuple[int, int]]],
+                 version: Optional[int]):
+        self.positions = positions
+        self.options = options
+        self.ranges = ranges
+        self.version = version      # 对应 data_versions 中 quiz_eligible 的版本号
+
+    def ranges_for(self, lesson_input: LessonInput) -> List[Tuple[int, int]]:
+        """课次参数对应的 [start, end) 区间列表。"""
+        if lesson_input == "all":
+            return [(0, len(self.positions))] if len(self.positions) else []
+        labels = lesson_input if isinstance(lesson_input, list) else [lesson_input]
+        out: List[Tuple[int, int]] = []
+        for label in set(labels):
+            out.extend(self.ranges.get(label, ()))
+        out.sort()
+        return out
+
+
+class VocabularyStore:
+    """vocabulary 表的只读列式副本。所有方法返回的行与 lesson_words 中对应 SQL 函数的行格式一致。"""
+
+    __slots__ = (
+        "version", "favorites_version", "ids", "lesson_nos", "lesson_idx", "lesson_labels",
+        "words", "hiraganas", "meanings", "valid", "lesson_ranges", "favorites", "eligible",
+    )
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.favorites_version: Optional[int] = None
+        self.ids = array("q")
+        self.lesson_nos = array("q")
+        self.lesson_idx = array(LESSON_INDEX_TYPECODE)
+        self.lesson_labels: List[Optional[str]] = []
+        self.words = _TextColumn()
+        self.hiraganas = _TextColumn()
+        self.meanings = _TextColumn()
+        self.valid = bytearray()       # hiragana 非空（可出题）
+        self.lesson_ranges: Dict[Optional[str], List[Tuple[int, int]]] = {}
+        self.favorites: FrozenSet[str] = frozenset()
+        self.eligible: Optional[EligibleIndex] = None     # 仅由词库快照提供
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection, version: Optional[int] = None) -> "VocabularyStore":
+        store = cls()
+        store.version = version
+        label_index: Dict[Optional[str], int] = {}
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"SELECT id, word, hiragana, meaning, lesson, lesson_no FROM {TABLE_VOCABULARY} "
+                f"ORDER BY lesson_no ASC, id ASC;"
+            )
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for vocab_id, word, hira, meaning, lesson, lesson_no in rows:
+                    idx = label_index.get(lesson)
+                    if idx is None:
+                        idx = label_index[lesson] = len(store.lesson_labels)
+                        store.lesson_labels.append(_intern(lesson))
+                    store.ids.append(vocab_id)
+                    store.lesson_nos.append(NULL_LESSON_NO if lesson_no is None else lesson_no)
+                    store.lesson_idx.append(idx)
+                    store.words.append(word)
+                    store.hiraganas.append(hira)
+                    store.meanings.append(meaning)
+                    store.valid.append(1 if hira is not None and hira.strip() else 0)
+        finally:
+            cursor.close()
+        for column in (store.words, store.hiraganas, store.meanings):
+            column.seal()
+        store._build_ranges()
+        return store
+
+    def _build_ranges(self) -> None:
+        """记录每个课次名称占据的连续区间（按 lesson_no 排序后同一课通常只有一段）。"""
+        ranges: Dict[Optional[str], List[Tuple[int, int]]] = {}
+        start = 0
+        n = len(self.ids)
+        for i in range(1, n + 1):
+            if i == n or self.lesson_idx[i] != self.lesson_idx[start]:
+                ranges.setdefault(self.lesson_labels[self.lesson_idx[start]], []).append((start, i))
+                start = i
+        self.lesson_ranges = ranges
+
+    def load_favorites(self, conn: sqlite3.Connection, version: Optional[int] = None) -> None:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT word FROM {TABLE_USER_NOTE};")
+            self.favorites = frozenset(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.close()
+        self.favorites_version = version
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---- 查询 ----
+
+    def lessons(self) -> List[str]:
+        """同 lesson_words.get_lessons：第1课到第48课中存在单词的课次，同一编号保留最后一个写法。"""
+        dedup: Dict[int, str] = {}
+        for label in self.lesson_labels:
+            if label is None:
+                continue
+            num = _lesson_label_number(label)
+            if num is not None:
+                dedup[num] = label
+        return [dedup[n] for n in sorted(dedup)]
+
+    def _ranges(self, lesson_input: LessonInput) -> List[Tuple[int, int]]:
+        """课次参数对应的区间，按起点排序（即按 lesson_no, id 的顺序）。"""
+        if lesson_input == "all":
+            return [(0, len(self.ids))] if self.ids else []
+        labels = lesson_input if isinstance(lesson_input, list) else [lesson_input]
+        out: List[Tuple[int, int]] = []
+        for label in set(labels):
+            out.extend(self.lesson_ranges.get(label, ()))
+        out.sort()
+        return out
+
+    def positions(self, lesson_input: LessonInput, start_at: int = 0) -> Iterator[int]:
+        for start, end in self._ranges(lesson_input):
+            if end <= start_at:
+                continue
+            yield from range(max(start, start_at), end)
+
+    def row(self, i: int, with_favorite: bool = False) -> Tuple:
+        word = self.words[i]
+        row = (word, self.hiraganas[i], self.meanings[i], self.lesson_labels[self.lesson_idx[i]])
+        return row + (int(word in self.favorites),) if with_favorite else row
+
+    def words_by_lessons(self, lesson_input: LessonInput, with_favorite: bool = False) -> List[Tuple]:
+        """同 get_words_by_lessons：(word, hiragana, meaning, lesson[, 是否收藏])。"""
+        return [self.row(i, with_favorite) for i in self.positions(lesson_input)]
+
+    def _first_after(self, after: Tuple[int, int]) -> int:
+        """第一个 (lesson_no, id) > after 的位置；lesson_no 为 NULL 的行与 SQL 一样永远不满足。"""
+        lesson_no, vocab_id = after
+        lo = bisect.bisect_left(self.lesson_nos, lesson_no)
+        hi = bisect.bisect_right(self.lesson_nos, lesson_no, lo)
+        pos = bisect.bisect_right(self.ids, vocab_id, lo, hi)   # 同一 lesson_no 内 id 递增
+        return max(pos, bisect.bisect_right(self.lesson_nos, NULL_LESSON_NO))
+
+    def iter_words_by_lessons(
+        self,
+        lesson_input: LessonInput,
+        after: Optional[Tuple[int, int]] = None,
+        limit: Optional[int] = None,
+        with_favorite: bool = False,
+    ) -> Iterator[Tuple]:
+        """同 iter_words_by_lessons：(word, hiragana, meaning, lesson, lesson_no, id[, 是否收藏])。"""
+        start_at = 0 if after is None else self._first_after(after)
+        remaining = -1 if limit is None else int(limit)
+        for i in self.positions(lesson_input, start_at):
+            if remaining == 0:
+                return
+            remaining -= 1
+            lesson_no = self.lesson_nos[i]
+            row = self.row(i) + (None if lesson_no == NULL_LESSON_NO else lesson_no, self.ids[i])
+            yield row + (int(row[0] in self.favorites),) if with_favorite else row
+
+    def valid_words(self, lesson_input: LessonInput) -> List[Tuple[str, str]]:
+        """同 SQLiteDB.query_valid_words：带平假名的 (word, hiragana)。"""
+        return [(self.words[i], self.hiraganas[i]) for i in self.positions(lesson_input) if self.valid[i]]
+
+    def iter_random_words(self, lesson_input: LessonInput) -> Iterator[Tuple[str, str]]:
+        """按随机顺序逐个产出带平假名的 (word, hiragana)，供实时出题时边抽边生成。"""
+        candidates = [i for i in self.positions(lesson_input) if self.valid[i]]
+        random.shuffle(candidates)
+        for i in candidates:
+            yield self.words[i], self.hiraganas[i]
+
+
+# ------------------- 进程级实例 -------------------
+_STORES: Dict[str, VocabularyStore] = {}     # 数据库文件路径 -> 词库
+_STORE_LOCK = threading.Lock()
+
+
+def get_vocabulary_store(conn: sqlite3.Connection) -> Optional[VocabularyStore]:
+    """获取 conn 所在数据库的词库；已关闭或 data_versions 不可用时返回 None（调用方回退到 SQL）。"""
+    if not store_enabled():
+        return None
+    try:
+        versions = get_data_versions(conn)
+    except sqlite3.Error:
+        return None
+    version, favorites_version = versions.get(TABLE_VOCABULARY), versions.get(TABLE_USER_NOTE)
+    eligible_version = versions.get(TABLE_QUIZ_ELIGIBLE)
+    key = database_path(conn)
+    store = _STORES.get(key)
+    if (store is None or store.version != version or store.favorites_version != favorites_version
+            or (store.eligible is not None and store.eligible.version != eligible_version)):
+        with _STORE_LOCK:
+            store = _STORES.get(key)
+            if store is None or store.version != version:
+                # 先读版本号再载入：载入期间有写入时版本号偏旧，下次取用会再重载一次
+                store = VocabularyStore.load(conn, version)
+                store.load_favorites(conn, favorites_version)
+                _STORES[key] = store
+            else:
+                if store.favorites_version != favorites_version:
+                    store.load_favorites(conn, favorites_version)
+                if store.eligible is not None and store.eligible.version != eligible_version:
+                    store.eligible = None       # 可出题表已重建，改回查询 quiz_eligible
+    return store
+
+
+def install_vocabulary_store(conn: sqlite3.Connection, store: VocabularyStore) -> None:
+    """为 conn 所在数据库直接使用已构建好的词库（如从词库快照载入）。"""
+    key = database_path(conn)
+    with _STORE_LOCK:
+        _STORES[key] = store
+
+
+def reset_vocabulary_store(conn: Optional[sqlite3.Connection] = None) -> None:
+    """丢弃 conn 所在数据库已载入的词库；不传 conn 时全部丢弃。"""
+    key = None if conn is None else database_path(conn)
+    with _STORE_LOCK:
+        if key is None:
+            _STORES.clear()
+        else:
+            _STORES.pop(key, None)
+
+
+# ------------------- 内存占用测量 -------------------
+def _measure(build) -> Tuple[object, int, float]:
+    import time
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = build()
+        elapsed = time.perf_counter() - start
+        size, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main():
+    import argparse
+
+    from src.core.random_kana import SQLiteDB
+
+    parser = argparse.ArgumentParser(description="测量进程内词库的载入耗时与内存占用")
+    parser.add_argument("--db", default=SQLiteDB().db_path, help="数据库文件路径")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        def fetch_rows():
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"SELECT id, word, hiragana, meaning, lesson, lesson_no FROM {TABLE_VOCABULARY} "
+                    f"ORDER BY lesson_no ASC, id ASC;"
+                )
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+        rows, rows_bytes, rows_time = _measure(fetch_rows)
+        count = len(rows)
+        del rows
+        store, store_bytes, store_time = _measure(lambda: VocabularyStore.load(conn))
+    finally:
+        conn.close()
+
+    per_10k = 10000 / count if count else 0.0
+    print(f"单词数：{count}，课次：{len(store.lesson_ranges)}")
+    print(f"fetchall 元组：{rows_bytes / 1024:.0f} KiB（每万词 {rows_bytes * per_10k / 1048576:.2f} MiB），{rows_time * 1000:.1f}ms")
+    print(f"VocabularyStore：{store_bytes / 1024:.0f} KiB（每万词 {store_bytes * per_10k / 1048576:.2f} MiB），{store_time * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
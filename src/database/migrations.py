@@ -0,0 +1,340 @@
+"""数据库结构迁移：版本号记录在 PRAGMA user_version 中，启动时执行一次。
+
+新增表/索引时在 MIGRATIONS 末尾追加一项（版本号递增），不要修改已发布的迁移。
+每一步可以是 SQL 字符串，也可以是接收连接的函数（用于回填数据）。
+"""
+import sqlite3
+import threading
+from typing import Callable, List, Tuple, Union
+
+MigrationStep = Union[str, Callable[[sqlite3.Connection], None]]
+
+GENERATED_COLUMNS_MIN_SQLITE = (3, 31, 0)   # 生成列（GENERATED ALWAYS AS）需要的最低 SQLite 版本
+# 课次编号：「第3课」→ 3；{0} 为课次列
+LESSON_NO_EXPR = "CAST(substr({0}, 2, length({0}) - 2) AS INTEGER)"
+# 旧版 SQLite 上 lesson_no 为普通列，由该触发器在插入后填写（批量导入删除触发器期间需自行补上）
+LESSON_NO_INSERT_TRIGGER = "vocabulary_lesson_no_ai"
+
+
+def _create_vocabulary_fts(conn: sqlite3.Connection) -> None:
+    """vocabulary 的 FTS5 trigram 全文索引（外部内容表），由触发器与 vocabulary 保持同步。
+
+    SQLite 未编译 FTS5 或版本低于 3.34（不支持 trigram）时跳过，搜索自动回退到 LIKE。
+    """
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS vocabulary_fts USING fts5(
+                word, hiragana, meaning,
+                content='vocabulary', content_rowid='id', tokenize='trigram'
+            );
+            """
+        )
+    except sqlite3.OperationalError:
+        return
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS vocabulary_fts_ai AFTER INSERT ON vocabulary BEGIN
+            INSERT INTO vocabulary_fts(rowid, word, hiragana, meaning)
+            VALUES (new.id, new.word, new.hiragana, new.meaning);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS vocabulary_fts_ad AFTER DELETE ON vocabulary BEGIN
+            INSERT INTO vocabulary_fts(vocabulary_fts, rowid, word, hiragana, meaning)
+            VALUES ('delete', old.id, old.word, old.hiragana, old.meaning);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS vocabulary_fts_au AFTER UPDATE OF word, hiragana, meaning ON vocabulary BEGIN
+            INSERT INTO vocabulary_fts(vocabulary_fts, rowid, word, hiragana, meaning)
+            VALUES ('delete', old.id, old.word, old.hiragana, old.meaning);
+            INSERT INTO vocabulary_fts(rowid, word, hiragana, meaning)
+            VALUES (new.id, new.word, new.hiragana, new.meaning);
+        END;
+        """
+    )
+    conn.execute("INSERT INTO vocabulary_fts(vocabulary_fts) VALUES ('rebuild');")
+
+
+def _add_reading_norm(conn: sqlite3.Connection) -> None:
+    """vocabulary.reading_norm：平假名归一化读音 + 索引，供假名/罗马字搜索走索引查找。"""
+    from src.core.kana_normalize import refresh_reading_norm
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(vocabulary);")}
+    if "reading_norm" not in columns:
+        conn.execute("ALTER TABLE vocabulary ADD COLUMN reading_norm TEXT;")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vocabulary_reading_norm ON vocabulary(reading_norm);")
+    refresh_reading_norm(conn)
+
+
+def _add_lesson_no(conn: sqlite3.Connection) -> None:
+    """vocabulary.lesson_no：由 lesson 派生的课次编号 + 分页索引。
+
+    SQLite 3.31 起用虚拟生成列；更早的版本不支持生成列，改为普通列，
+    迁移时回填，之后由插入 / 修改 lesson 的触发器维护，查询方式相同。
+    """
+    if sqlite3.sqlite_version_info >= GENERATED_COLUMNS_MIN_SQLITE:
+        conn.execute(
+            f"ALTER TABLE vocabulary ADD COLUMN lesson_no INTEGER "
+            f"GENERATED ALWAYS AS ({LESSON_NO_EXPR.format('lesson')}) VIRTUAL;"
+        )
+    else:
+        conn.execute("ALTER TABLE vocabulary ADD COLUMN lesson_no INTEGER;")
+        conn.execute(f"UPDATE vocabulary SET lesson_no = {LESSON_NO_EXPR.format('lesson')};")
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {LESSON_NO_INSERT_TRIGGER} AFTER INSERT ON vocabulary BEGIN
+                UPDATE vocabulary SET lesson_no = {LESSON_NO_EXPR.format('new.lesson')} WHERE id = new.id;
+            END;
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS vocabulary_lesson_no_au AFTER UPDATE OF lesson ON vocabulary BEGIN
+                UPDATE vocabulary SET lesson_no = {LESSON_NO_EXPR.format('new.lesson')} WHERE id = new.id;
+            END;
+            """
+        )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vocabulary_lesson_no ON vocabulary(lesson_no, id);")
+
+
+def _maintain_reading_norm(conn: sqlite3.Connection) -> None:
+    """其他程序（手工编辑、UPDATE 语句）改了单词或读音却没有同时写 reading_norm 时，由触发器置空，
+    搜索前按需回填（见 kana_normalize.ensure_reading_norm）；并重算一遍此前已过期的值。"""
+    from src.core.kana_normalize import refresh_reading_norm
+
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS vocabulary_reading_norm_au AFTER UPDATE OF word, hiragana ON vocabulary
+        WHEN new.reading_norm IS old.reading_norm BEGIN
+            UPDATE vocabulary SET reading_norm = NULL WHERE id = new.id;
+        END;
+        """
+    )
+    refresh_reading_norm(conn, only_missing=False)
+
+
+def _create_data_versions(conn: sqlite3.Connection) -> None:
+    """data_versions：每张被跟踪的表一个计数器，表内容每变化一行加1（用于 ETag 与结果缓存失效）。"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        """
+    )
+    for table in ("vocabulary", "user_note"):
+        conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, 1);", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+                END;
+                """
+            )
+
+
+def _track_snapshot_sources(conn: sqlite3.Connection) -> None:
+    """为词库快照依赖的另外两张表加版本号：japanese_kana 由触发器维护，
+    quiz_eligible 整表重建，由 refresh_quiz_eligible 每次加1（避免逐行触发）。"""
+    conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES ('quiz_eligible', 1);")
+    conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES ('japanese_kana', 1);")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS japanese_kana_version_{event.lower()} AFTER {event} ON japanese_kana BEGIN
+                UPDATE data_versions SET version = version + 1 WHERE name = 'japanese_kana';
+            END;
+            """
+        )
+
+
+def _create_word_schedule(conn: sqlite3.Connection) -> None:
+    """word_schedule：SM-2 间隔重复调度表，按已有学习记录重放回填。"""
+    from src.core.scheduler import rebuild_schedule
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS word_schedule (
+            word TEXT PRIMARY KEY,
+            repetitions INTEGER NOT NULL DEFAULT 0,
+            interval_days REAL NOT NULL DEFAULT 0,
+            ease REAL NOT NULL DEFAULT 2.5,
+            lapses INTEGER NOT NULL DEFAULT 0,
+            due_at TIMESTAMP NOT NULL,
+            last_reviewed_at TIMESTAMP
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_word_schedule_due ON word_schedule(due_at);")
+    rebuild_schedule(conn)
+
+
+def _create_quiz_eligible(conn: sqlite3.Connection) -> None:
+    """quiz_eligible：可出题单词表（含干扰项与中文意思），seq 连续，按课次分段，供随机抽题。"""
+    from src.core.quiz_distractors import refresh_quiz_eligible
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS quiz_eligible (
+            seq INTEGER PRIMARY KEY,
+            vocab_id INTEGER NOT NULL,
+            lesson TEXT,
+            lesson_no INTEGER,
+            word TEXT NOT NULL,
+            hiragana TEXT NOT NULL,
+            meaning TEXT,
+            needs_meaning INTEGER NOT NULL DEFAULT 0,
+            options TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quiz_eligible_lesson ON quiz_eligible(lesson, seq);")
+    refresh_quiz_eligible(conn)
+
+
+MIGRATIONS: List[Tuple[int, str, List[MigrationStep]]] = [
+    (1, "基础表：vocabulary / japanese_kana / user_note / study_records", [
+        """
+        CREATE TABLE IF NOT EXISTS vocabulary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            word TEXT NOT NULL,
+            hiragana TEXT,
+            meaning TEXT NOT NULL,
+            lesson TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS japanese_kana (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kana TEXT NOT NULL UNIQUE,
+            type TEXT NOT NULL CHECK (type IN ('hiragana', 'katakana')),
+            romaji TEXT NOT NULL,
+            row_group TEXT,
+            sound_type TEXT CHECK (sound_type IN ('normal', 'dakuon', 'handakuon')) DEFAULT 'normal',
+            confusion_group_id INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_note (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            word TEXT NOT NULL UNIQUE,
+            hiragana TEXT,
+            meaning TEXT,
+            lesson TEXT,
+            wrong_count INTEGER NOT NULL DEFAULT 1,
+            last_wrong_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS study_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            word TEXT NOT NULL,
+            is_correct INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_created_at ON study_records(created_at);",
+        "CREATE INDEX IF NOT EXISTS idx_word ON study_records(word);",
+    ]),
+    (2, "热点查询索引：按单词/课次查 vocabulary，按时间排序错题本", [
+        "CREATE INDEX IF NOT EXISTS idx_vocabulary_word ON vocabulary(word);",
+        "CREATE INDEX IF NOT EXISTS idx_vocabulary_lesson ON vocabulary(lesson);",
+        "CREATE INDEX IF NOT EXISTS idx_user_note_last_wrong_at ON user_note(last_wrong_at);",
+    ]),
+    (3, "预计算干扰项池 quiz_distractors", [
+        """
+        CREATE TABLE IF NOT EXISTS quiz_distractors (
+            vocab_id INTEGER PRIMARY KEY,
+            hiragana TEXT NOT NULL,
+            options TEXT NOT NULL,
+            option_count INTEGER NOT NULL
+        );
+        """,
+    ]),
+    (4, "全文检索 vocabulary_fts（trigram）", [
+        _create_vocabulary_fts,
+    ]),
+    (5, "归一化读音列 vocabulary.reading_norm", [
+        _add_reading_norm,
+    ]),
+    (6, "课次编号 vocabulary.lesson_no（由 lesson 派生的虚拟列）+ 分页索引", [
+        _add_lesson_no,
+    ]),
+    (7, "数据版本计数器 data_versions（vocabulary / user_note）", [
+        _create_data_versions,
+    ]),
+    (8, "按天汇总的学习统计 study_daily_stats（从 study_records 回填）", [
+        """
+        CREATE TABLE IF NOT EXISTS study_daily_stats (
+            day TEXT PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        """,
+        # created_at 为 UTC 时间，按本地日期归档，与 get_today_stats 的「今天」一致
+        """
+        INSERT OR REPLACE INTO study_daily_stats (day, total, correct)
+        SELECT DATE(created_at, 'localtime'), COUNT(*), SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END)
+        FROM study_records
+        GROUP BY DATE(created_at, 'localtime');
+        """,
+    ]),
+    (9, "间隔重复调度表 word_schedule（SM-2，按 due_at 取到期单词）", [
+        _create_word_schedule,
+    ]),
+    (10, "可出题单词表 quiz_eligible（由干扰项池生成）", [
+        _create_quiz_eligible,
+    ]),
+    (11, "词库快照的版本来源：data_versions 增加 quiz_eligible / japanese_kana", [
+        _track_snapshot_sources,
+    ]),
+    (12, "reading_norm 随单词/读音修改失效（触发器置空，搜索前回填）", [
+        _maintain_reading_norm,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+_MIGRATE_LOCK = threading.Lock()
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target_version: int = LATEST_VERSION) -> int:
+    """把数据库升级到 target_version（默认最新版本），返回执行的迁移数。已是最新时只读一次 user_version。"""
+    if get_schema_version(conn) >= target_version:
+        return 0
+
+    with _MIGRATE_LOCK:
+        applied = 0
+        # BEGIN IMMEDIATE 先拿写锁，避免多个进程同时迁移
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            current = get_schema_version(conn)
+            for version, _description, steps in MIGRATIONS:
+                if version <= current or version > target_version:
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {version};")
+                applied += 1
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return applied
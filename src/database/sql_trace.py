@@ -0,0 +1,172 @@
+"""SQL 跟踪（可选开启）：基于 set_trace_callback 把每条语句归到当前请求，统计条数与耗时，记录慢查询。
+
+开启方式：
+    JAPANESE_LEARNING_SQL_TRACE=1 python web_app.py
+    JAPANESE_LEARNING_SLOW_QUERY_MS=20      # 慢查询阈值（毫秒），默认 50
+
+开启后连接池为每个连接挂上 trace_statement 回调。回调在执行语句的线程中触发，
+只有调用过 start_trace() 的线程（即正在处理请求的线程）才会记录，写线程、命令行不受影响。
+语句文本来自回调（参数已代入），耗时由 TimedCursor 在 execute / fetch 时累加到对应语句上；
+单条语句累计耗时超过阈值时，立即在同一连接上取 EXPLAIN QUERY PLAN，请求结束时写入慢查询日志。
+"""
+import logging
+import os
+import sqlite3
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_ENV = "JAPANESE_LEARNING_SQL_TRACE"
+SLOW_QUERY_ENV = "JAPANESE_LEARNING_SLOW_QUERY_MS"
+DEFAULT_SLOW_QUERY_MS = 50
+TRACE_HEADER = "X-SQL-Trace"        # 响应头：statements=…; time-ms=…; slow=…
+MAX_RECORDS_PER_TRACE = 5000        # 单个请求最多保留的语句记录数，超出后只计数不计时
+SQL_LOG_MAX_CHARS = 500             # 日志中 SQL 文本的最大长度
+
+_local = threading.local()
+
+
+def tracing_enabled() -> bool:
+    return os.environ.get(TRACE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _slow_threshold_from_env() -> float:
+    try:
+        return max(0.0, float(os.environ.get(SLOW_QUERY_ENV, DEFAULT_SLOW_QUERY_MS))) / 1000
+    except ValueError:
+        return DEFAULT_SLOW_QUERY_MS / 1000
+
+
+class StatementRecord:
+    """一条被跟踪的语句：文本、累计耗时（执行 + 取结果）与慢查询时的查询计划。"""
+
+    __slots__ = ("sql", "elapsed", "plan")
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.elapsed = 0.0
+        self.plan: Optional[List[str]] = None
+
+
+class RequestTrace:
+    """一个请求内的语句记录。statements 包含触发器子语句与隐式 BEGIN/COMMIT。"""
+
+    def __init__(self, slow_threshold: float):
+        self.slow_threshold = slow_threshold
+        self.statements = 0
+        self.records: List[StatementRecord] = []
+        self.slow: List[StatementRecord] = []
+        self.explaining = False
+
+    @property
+    def elapsed(self) -> float:
+        return sum(record.elapsed for record in self.records)
+
+    def add_time(self, record: StatementRecord, elapsed: float, conn: sqlite3.Connection) -> None:
+        record.elapsed += elapsed
+        if record.plan is None and record.elapsed >= self.slow_threshold:
+            record.plan = self._explain(conn, record.sql)
+            self.slow.append(record)
+
+    def _explain(self, conn: sqlite3.Connection, sql: str) -> List[str]:
+        """在执行该语句的连接上取查询计划（BEGIN/COMMIT/PRAGMA 等没有计划，返回空列表）。"""
+        if sql.lstrip().startswith("--"):
+            return []
+        self.explaining = True
+        cursor = None
+        try:
+            cursor = sqlite3.Cursor(conn)   # 普通游标：EXPLAIN 本身不计入请求耗时
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return _format_plan(cursor.fetchall())
+        except sqlite3.Error as e:
+            return [f"（无法获取查询计划：{e}）"]
+        finally:
+            if cursor:
+                cursor.close()
+            self.explaining = False
+
+    def header_value(self) -> str:
+        return f"statements={self.statements}; time-ms={self.elapsed * 1000:.2f}; slow={len(self.slow)}"
+
+
+def _format_plan(rows) -> List[str]:
+    """把 EXPLAIN QUERY PLAN 的 (id, parent, notused, detail) 行按父子关系缩进。"""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _notused, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def trace_statement(sql: str) -> None:
+    """连接上的 trace 回调：把语句记到当前线程的请求上（没有请求时直接返回）。"""
+    trace = getattr(_local, "trace", None)
+    if trace is None or trace.explaining:
+        return
+    trace.statements += 1
+    if len(trace.records) < MAX_RECORDS_PER_TRACE:
+        trace.records.append(StatementRecord(sql))
+
+
+def install(conn: sqlite3.Connection) -> None:
+    """为新建的连接挂上跟踪回调（仅在开启跟踪时由连接池调用）。"""
+    conn.set_trace_callback(trace_statement)
+
+
+def chain_trace_callbacks(*callbacks: Optional[Callable[[str], None]]) -> Optional[Callable[[str], None]]:
+    """把多个 trace 回调合并为一个（sqlite3 每个连接只能设置一个回调）。"""
+    active = [cb for cb in callbacks if cb is not None]
+    if len(active) <= 1:
+        return active[0] if active else None
+
+    def chained(statement: str) -> None:
+        for cb in active:
+            cb(statement)
+    return chained
+
+
+def start_trace(slow_threshold: Optional[float] = None) -> RequestTrace:
+    trace = RequestTrace(_slow_threshold_from_env() if slow_threshold is None else slow_threshold)
+    _local.trace = trace
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return getattr(_local, "trace", None)
+
+
+def mark() -> Optional[int]:
+    """执行语句前调用：返回当前请求已记录的语句数，未在跟踪时返回 None。"""
+    trace = getattr(_local, "trace", None)
+    return None if trace is None or trace.explaining else len(trace.records)
+
+
+def attribute(start: int, elapsed: float, conn: sqlite3.Connection) -> Optional[StatementRecord]:
+    """把一次 execute 的耗时记到它触发的第一条语句上（其后是触发器子语句或 executemany 的重复执行）。"""
+    trace = getattr(_local, "trace", None)
+    if trace is None or start >= len(trace.records):
+        return None
+    record = trace.records[start]
+    trace.add_time(record, elapsed, conn)
+    return record
+
+
+def add_fetch_time(record: StatementRecord, elapsed: float, conn: sqlite3.Connection) -> None:
+    trace = getattr(_local, "trace", None)
+    if trace is not None and not trace.explaining:
+        trace.add_time(record, elapsed, conn)
+
+
+def finish_trace(label: str = "") -> Optional[RequestTrace]:
+    """结束当前线程的跟踪，把慢查询（含查询计划）写入日志并返回本次记录。"""
+    trace = getattr(_local, "trace", None)
+    _local.trace = None
+    if trace is None:
+        return None
+    for record in trace.slow:
+        sql = record.sql if len(record.sql) <= SQL_LOG_MAX_CHARS else record.sql[:SQL_LOG_MAX_CHARS] + "…"
+        plan = "\n".join("    " + line for line in record.plan) if record.plan else "    （无）"
+        logger.warning("慢查询 %.1fms %s\n  SQL：%s\n  查询计划：\n%s", record.elapsed * 1000, label, sql, plan)
+    return trace
@@ -0,0 +1,170 @@
+"""SQLite 连接池：统一的数据库连接入口。
+
+连接在创建时一次性设置 WAL、synchronous、busy_timeout、mmap 等参数，
+用完归还到池中复用（连同其语句缓存），避免每个请求都 connect/close。
+池创建第一个连接时执行结构迁移（见 migrations.py）。
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from src.database import sql_trace
+from src.database.migrations import migrate
+from src.database.timed_connection import TimedConnection
+
+DB_FILE_NAME = "japanese_learning.db"
+DB_PATH_ENV = "JAPANESE_LEARNING_DB"   # 设置后覆盖默认数据库路径（压测/基准测试用）
+
+POOL_MAX_IDLE = 8                      # 池中最多保留的空闲连接数
+BUSY_TIMEOUT_MS = 5000                 # 写锁被占用时的等待时间，避免 "database is locked"
+CACHED_STATEMENTS = 256                # 每个连接的预编译语句缓存（默认128）
+MMAP_SIZE = 256 * 1024 * 1024          # 内存映射读取的上限
+
+
+def resolve_db_path(db_name: str = DB_FILE_NAME, base_dir: Optional[str] = None) -> str:
+    """计算数据库文件路径。
+
+    优先使用环境变量 JAPANESE_LEARNING_DB；打包后放在可执行文件所在目录，
+    开发环境放在 base_dir（默认当前工作目录）。
+    """
+    env_path = os.environ.get(DB_PATH_ENV)
+    if env_path and db_name == DB_FILE_NAME:
+        return env_path
+    if getattr(sys, "frozen", False):
+        base_dir = os.path.dirname(sys.executable)
+    elif base_dir is None:
+        base_dir = os.getcwd()
+    return os.path.join(base_dir, db_name)
+
+
+def database_path(conn: sqlite3.Connection) -> str:
+    """连接所打开的数据库文件（绝对路径），用作进程级缓存的键，避免不同数据库的结果互相串用。
+
+    连接池创建的连接带有 db_path 属性；其他连接（命令行工具、基准测试）查询 PRAGMA database_list，
+    内存数据库按连接区分。
+    """
+    path = getattr(conn, "db_path", None)
+    if path is None:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("PRAGMA database_list;")
+            path = next((file for _seq, name, file in cursor.fetchall() if name == "main"), "")
+        finally:
+            cursor.close()
+        if not path:
+            return f":memory:{id(conn)}"
+    return os.path.normcase(os.path.abspath(path))
+
+
+def configure_connection(conn: sqlite3.Connection) -> None:
+    """为新连接设置性能相关的 PRAGMA（每个连接只执行一次）。"""
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS};")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE};")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+
+
+class SQLitePool:
+    """线程安全的连接池：acquire 取连接，release 归还；空闲连接按后进先出复用。"""
+
+    def __init__(self, db_path: str, max_idle: int = POOL_MAX_IDLE):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue()
+        self._migrated = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,  # 连接会在线程间流转，但同一时刻只归一个使用者
+            cached_statements=CACHED_STATEMENTS,
+            factory=TimedConnection,  # 累计请求内的数据库耗时（见 timed_connection.py）
+        )
+        conn.db_path = self.db_path   # 供 database_path() 直接读取
+        configure_connection(conn)
+        if sql_trace.tracing_enabled():
+            sql_trace.install(conn)
+        if not self._migrated:
+            # 每个数据库在进程内只做一次结构迁移，之后的业务函数不再执行 DDL
+            migrate(conn)
+            self._migrated = True
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        # 使用者未提交的事务一律回滚，保证归还的连接是干净的
+        if conn.in_transaction:
+            conn.rollback()
+        if self._idle.qsize() < self.max_idle:
+            self._idle.put_nowait(conn)
+        else:
+            conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """with pool.connection() as conn: ...（退出时自动归还）"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_POOLS: Dict[str, SQLitePool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(db_path: Optional[str] = None) -> SQLitePool:
+    """按数据库路径获取进程级连接池（同一路径共享一个池）。"""
+    db_path = os.path.abspath(db_path or resolve_db_path())
+    pool = _POOLS.get(db_path)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(db_path)
+            if pool is None:
+                pool = _POOLS[db_path] = SQLitePool(db_path)
+    return pool
+
+
+_INHERITED: list = []   # fork 前打开、子进程中不再使用也不关闭的连接
+
+
+def _reset_pools_after_fork() -> None:
+    """子进程中丢弃从父进程继承的连接：SQLite 连接不能跨 fork 使用，
+    也不能在子进程里关闭（会影响父进程持有的文件锁），只保留引用、改用新连接。"""
+    for pool in _POOLS.values():
+        while True:
+            try:
+                _INHERITED.append(pool._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+@atexit.register
+def close_all_pools() -> None:
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.close_all()
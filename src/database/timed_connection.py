@@ -0,0 +1,138 @@
+"""带计时的连接与游标：累计当前线程花在 SQLite 上的时间（执行语句 + 取结果）。
+
+连接池用 TimedConnection 作为 sqlite3.connect 的 factory；
+请求开始时 start_db_timer()，结束时 stop_db_timer() 取回本次请求的数据库耗时与语句数。
+未开始计时的线程（命令行、写线程等）只有一次 perf_counter 的开销。
+开启 SQL 跟踪（见 sql_trace.py）时，同样的耗时还会记到被跟踪的那条语句上。
+"""
+import sqlite3
+import threading
+import time
+from typing import Tuple
+
+from src.database import sql_trace
+
+_local = threading.local()
+
+
+def start_db_timer() -> None:
+    _local.elapsed = 0.0
+    _local.statements = 0
+
+
+def stop_db_timer() -> Tuple[float, int]:
+    """结束计时，返回 (累计秒数, 执行的语句数)。"""
+    elapsed = getattr(_local, "elapsed", None)
+    statements = getattr(_local, "statements", 0)
+    _local.elapsed = None
+    return elapsed or 0.0, statements
+
+
+def _record(started: float, statement: bool = False) -> None:
+    elapsed = getattr(_local, "elapsed", None)
+    if elapsed is not None:
+        _local.elapsed = elapsed + (time.perf_counter() - started)
+        if statement:
+            _local.statements += 1
+
+
+class TimedCursor(sqlite3.Cursor):
+    _trace_record = None   # 该游标当前语句的跟踪记录（未开启跟踪时为 None）
+
+    def _executed(self, started: float, start_mark) -> None:
+        _record(started, statement=True)
+        if start_mark is not None:
+            self._trace_record = sql_trace.attribute(start_mark, time.perf_counter() - started, self.connection)
+
+    def _fetched(self, started: float) -> None:
+        _record(started)
+        if self._trace_record is not None:
+            sql_trace.add_fetch_time(self._trace_record, time.perf_counter() - started, self.connection)
+
+    def execute(self, sql, parameters=()):
+        start_mark = sql_trace.mark()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._executed(started, start_mark)
+
+    def executemany(self, sql, seq_of_parameters):
+        start_mark = sql_trace.mark()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._executed(started, start_mark)
+
+    def executescript(self, sql_script):
+        start_mark = sql_trace.mark()
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._executed(started, start_mark)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._fetched(started)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._fetched(started)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._fetched(started)
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            return super().__next__()
+        finally:
+            self._fetched(started)
+
+
+class TimedConnection(sqlite3.Connection):
+    """游标默认为 TimedCursor；conn.execute 等快捷方法同样经过计时游标。
+
+    set_trace_callback 会记下当前回调（trace_callback），
+    count_queries 等临时替换回调的代码据此叠加并在结束后恢复，不会摘掉 SQL 跟踪。
+    """
+
+    trace_callback = None
+
+    def set_trace_callback(self, callback):
+        super().set_trace_callback(callback)
+        self.trace_callback = callback
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        start_mark = sql_trace.mark()
+        started = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            _record(started)
+            if start_mark is not None:
+                sql_trace.attribute(start_mark, time.perf_counter() - started, self)
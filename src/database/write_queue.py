@@ -0,0 +1,261 @@
+"""写入队列（write-behind）：请求线程只把写操作放进队列，由单个写线程批量提交。
+
+写线程从队列中取出第一项后，最多再等待 max_delay 收集后续写入
+（有调用方在 flush 等待时不再等，立即提交），
+然后在同一个事务里执行整批写操作、只提交一次（group commit），
+并发写入因此不再逐条排队等待 SQLite 写锁和 fsync。
+每项写操作在自己的 SAVEPOINT 中执行，单项失败只回滚该项。
+整批提交失败（如写锁长时间被占用）时，这批写入留在写线程中按退避间隔重试，不会丢弃，
+flush() 等到它们真正落盘或超时（请求线程应传入 timeout）；只有关闭队列时仍无法提交才放弃，并记入 lost。
+进程退出时（atexit）会先把队列中剩余的写入全部提交。
+"""
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.database.sqlite_pool import SQLitePool, get_pool
+
+logger = logging.getLogger(__name__)
+
+WRITE_DELAY_ENV = "JAPANESE_LEARNING_WRITE_DELAY_MS"  # 写入最长延迟（毫秒），0 表示有就立即提交
+DEFAULT_MAX_DELAY_MS = 20
+WRITE_BATCH_MAX = 500       # 每个事务最多包含的写操作数
+COMMIT_RETRIES = 3          # 提交失败（如写锁等待超时）时整批立即重试的次数
+RETRY_BACKOFF_START = 0.5   # 立即重试仍失败后，下一轮重试前的等待（秒），每轮翻倍
+RETRY_BACKOFF_MAX = 30.0
+
+# 写操作：func(conn, *args, commit=False)，由写线程统一提交
+WriteJob = Callable[..., Any]
+_STOP = object()
+_FLUSH = object()           # flush 放入的标记：写线程不再等 max_delay，立即提交已收集的写入
+
+
+def _max_delay_from_env() -> float:
+    try:
+        return max(0, int(os.environ.get(WRITE_DELAY_ENV, DEFAULT_MAX_DELAY_MS))) / 1000
+    except ValueError:
+        return DEFAULT_MAX_DELAY_MS / 1000
+
+
+class WriteQueue:
+    """单写线程的写入队列。submit 立即返回；flush 等待已提交的写入全部落盘。"""
+
+    def __init__(self, pool: SQLitePool, max_delay: Optional[float] = None, max_batch: int = WRITE_BATCH_MAX):
+        self.pool = pool
+        self.max_delay = _max_delay_from_env() if max_delay is None else max_delay
+        self.max_batch = max_batch
+        self._reset()
+
+    def _reset(self) -> None:
+        """初始化队列状态（fork 出的子进程中也用它重置）。"""
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._submitted = 0
+        self._finished = 0
+        self._closed = False
+        self._flush_requested = False       # 队列中已有 _FLUSH 标记
+        self._wakeup = threading.Event()    # 关闭时打断退避等待
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.commit_failures = 0            # 整批提交失败的轮数
+        self.retrying = 0                   # 正在等待重试的写操作数
+        self.lost = 0                       # 关闭时仍无法提交而放弃的写操作数
+        self.flush_timeouts = 0             # flush 超时（调用方降级处理）的次数
+
+    def submit(self, func: WriteJob, *args: Any) -> None:
+        """把写操作放入队列（func 需支持 commit=False 关键字参数）。"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("写入队列已关闭")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+            self._submitted += 1
+        self._jobs.put((func, args))
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._submitted - self._finished
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前提交的写入全部完成，返回是否在 timeout 内完成。
+
+        有未完成的写入时通知写线程立即提交，不必等满 max_delay。
+        提交持续失败时写线程会一直重试，请求线程应传入 timeout，超时后自行降级。
+        """
+        with self._lock:
+            target = self._submitted
+            if self._finished >= target:
+                return True
+            wake = not self._flush_requested
+            self._flush_requested = True
+        if wake:
+            self._jobs.put(_FLUSH)
+        with self._lock:
+            done = self._done.wait_for(lambda: self._finished >= target, timeout)
+            if not done:
+                self.flush_timeouts += 1
+            return done
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """提交剩余写入并停止写线程。"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        self._wakeup.set()
+        if thread is not None:
+            self._jobs.put(_STOP)
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._submitted - self._finished,
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "commitFailures": self.commit_failures,
+                "retrying": self.retrying,
+                "lost": self.lost,
+                "flushTimeouts": self.flush_timeouts,
+                "maxDelayMs": int(self.max_delay * 1000),
+            }
+
+    def _collect(self, first) -> tuple:
+        """以 first 开头收集一批写操作，返回 (batch, 是否收到停止信号)。"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._jobs.get(timeout=remaining) if remaining > 0 else self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return batch, True
+            if job is _FLUSH:
+                self._flush_consumed()
+                break
+            batch.append(job)
+        return batch, False
+
+    def _flush_consumed(self) -> None:
+        with self._lock:
+            self._flush_requested = False
+
+    def _run(self) -> None:
+        conn = self.pool.acquire()
+        try:
+            stop = False
+            while not stop:
+                job = self._jobs.get()
+                if job is _STOP:
+                    break
+                if job is _FLUSH:
+                    # 对应的写入已经提交（或正在重试），无需处理
+                    self._flush_consumed()
+                    continue
+                batch, stop = self._collect(job)
+                ok, failed = self._write_until_committed(conn, batch)
+                with self._lock:
+                    self.written += ok
+                    self.failed += failed
+                    self.batches += 1
+                    self._finished += len(batch)
+                    self._done.notify_all()
+        finally:
+            self.pool.release(conn)
+
+    def _write_until_committed(self, conn: sqlite3.Connection, batch: list) -> tuple:
+        """提交一批写操作，失败时按退避间隔重试直到成功；队列关闭后仍失败则放弃并记入 lost。"""
+        delay = RETRY_BACKOFF_START
+        while True:
+            result = self._write_batch(conn, batch)
+            if result is not None:
+                with self._lock:
+                    self.retrying = 0
+                return result
+            with self._lock:
+                self.commit_failures += 1
+                closing = self._closed
+                if closing:
+                    self.lost += len(batch)
+                    self.retrying = 0
+                else:
+                    self.retrying = len(batch)
+            if closing:
+                logger.error("队列关闭时仍无法提交，%d 项写入未能保存：%s", len(batch),
+                             ", ".join(f"{getattr(func, '__name__', func)}{args!r}" for func, args in batch))
+                return 0, len(batch)
+            logger.error("批量写入提交失败，%d 项写入保留在队列中，%.1f 秒后重试", len(batch), delay)
+            self._wakeup.wait(delay)
+            delay = min(delay * 2, RETRY_BACKOFF_MAX)
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list) -> Optional[tuple]:
+        """在一个事务中执行整批写操作，返回 (成功数, 失败数)；连续 COMMIT_RETRIES 次提交失败时返回 None。"""
+        for attempt in range(COMMIT_RETRIES):
+            ok = failed = 0
+            try:
+                conn.execute("BEGIN IMMEDIATE;")
+                for func, args in batch:
+                    conn.execute("SAVEPOINT write_job;")
+                    try:
+                        func(conn, *args, commit=False)
+                        ok += 1
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write_job;")
+                        failed += 1
+                        logger.error("写入失败，已跳过：%s%r: %s", getattr(func, "__name__", func), args, e)
+                    conn.execute("RELEASE write_job;")
+                conn.commit()
+                return ok, failed
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                logger.warning("批量写入提交失败（第%d次）：%s", attempt + 1, e)
+        return None
+
+
+_QUEUES: Dict[str, WriteQueue] = {}
+_QUEUES_LOCK = threading.Lock()
+
+
+def get_write_queue(pool: Optional[SQLitePool] = None) -> WriteQueue:
+    """按连接池获取进程级写入队列（同一数据库共享一个写线程）。"""
+    pool = pool or get_pool()
+    write_queue = _QUEUES.get(pool.db_path)
+    if write_queue is None:
+        with _QUEUES_LOCK:
+            write_queue = _QUEUES.get(pool.db_path)
+            if write_queue is None:
+                write_queue = _QUEUES[pool.db_path] = WriteQueue(pool)
+    return write_queue
+
+
+def _reset_queues_after_fork() -> None:
+    """子进程中写线程不存在了：清空从父进程继承的队列状态，下次 submit 时重新启动写线程。"""
+    for write_queue in _QUEUES.values():
+        write_queue._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_queues_after_fork)
+
+
+@atexit.register
+def close_all_write_queues() -> None:
+    """退出前提交所有队列中的写入（在关闭连接池之前执行）。"""
+    with _QUEUES_LOCK:
+        queues = list(_QUEUES.values())
+    for write_queue in queues:
+        write_queue.close()
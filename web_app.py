@@ -1,8 +1,19 @@
-from flask import Flask, render_template, request, jsonify
+import sys
+
+# 最先导入：记录启动各阶段耗时；带 --profile-startup 时在导入 Flask 之前挂上模块导入计时
+from src.core import startup_profile
+startup_profile.install_from_args(sys.argv)
+
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
+import datetime
+import hashlib
+import json
 import sqlite3
-from typing import List, Tuple, Union
+from functools import wraps
+from typing import List, Union
+import logging
 import os
-import sys
+import time
 
 # 计算工程根目录并修正模块搜索路径，防止导入失败
 # 支持PyInstaller打包后的路径处理
@@ -19,21 +30,39 @@ if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
 # 复用现有核心逻辑
-from src.core.random_kana import SQLiteDB, generate_question
-from src.core.lesson_words import get_lessons, get_words_by_lessons
+from src.database.sqlite_pool import get_pool, resolve_db_path
+from src.database.write_queue import get_write_queue
+from src.database.timed_connection import start_db_timer, stop_db_timer
+from src.database import sql_trace
+from src.core.app_logging import configure_logging
+from src.core.metrics import METRICS
+from src.core import vocabulary_snapshot
+from src.core.random_kana import count_queries
+from src.core.lesson_words import (
+    get_lessons,
+    get_words_by_lessons,
+    iter_words_by_lessons,
+    encode_cursor,
+    parse_cursor,
+)
+from src.core.quiz_distractors import questions_for_words, random_questions
+from src.core.question_prefetch import QuestionPrefetcher
+from src.core.scheduler import select_quiz_words
+from src.core.search import search_words, SEARCH_DEFAULT_LIMIT
+from src.core.data_version import get_data_versions
+from src.core.query_cache import QUERY_CACHE
 from src.core.user_note import (
-    ensure_user_note_table,
     fetch_user_notes,
     delete_user_note,
-    record_wrong_word,
-    get_favorited_words,
+    record_wrong_answers_batch,
 )
 from src.core.study_record import (
-    ensure_study_records_table,
     record_study,
     record_study_batch,
     get_today_stats,
+    get_daily_stats,
 )
+startup_profile.mark("imports")
 
 
 # Flask应用初始化：打包后从临时目录加载模板和静态文件
@@ -47,11 +76,143 @@ app = Flask(
 # 中文 JSON 直出，不转义
 app.config["JSON_AS_ASCII"] = False
 
+# 日志默认只输出警告及以上，调试时设置 JAPANESE_LEARNING_LOG_LEVEL=DEBUG
+configure_logging()
+logger = logging.getLogger("web_app")
+
+
+# 数据库文件放在可执行文件所在目录，方便用户数据持久化
+DB_POOL = get_pool(resolve_db_path(base_dir=BASE_DIR))
+# 学习记录/错题本的写入交给单个写线程批量提交，请求只负责入队
+WRITE_QUEUE = get_write_queue(DB_POOL)
+# 经写入队列修改、且被 data_versions 跟踪的表：读取依赖这些表的结果前先 flush
+QUEUED_WRITE_TABLES = ("user_note",)
+# 读请求等待写入队列落盘的上限（秒）；数据库无法提交时写线程会一直重试，请求不能跟着一直等
+WRITE_FLUSH_TIMEOUT = 0.5
+# 随机出题的预取池：后台按课次范围预生成题目，请求只取用
+QUIZ_PREFETCH = QuestionPrefetcher(DB_POOL, random_questions)
+# 未指定 --production/--dev 时按该环境变量选择运行模式（production / dev）
+SERVE_MODE_ENV = "JAPANESE_LEARNING_SERVE"
+# SQL 跟踪（JAPANESE_LEARNING_SQL_TRACE=1）：每个响应带 X-SQL-Trace 头，慢查询连同查询计划写入日志
+SQL_TRACE_ENABLED = sql_trace.tracing_enabled()
+
+METRICS.register_callback("write_queue_pending", "gauge", "写入队列中尚未提交的写操作数",
+                          lambda: WRITE_QUEUE.stats()["pending"])
+METRICS.register_callback("write_queue_commit_failures_total", "counter", "写入队列整批提交失败（之后会重试）的次数",
+                          lambda: WRITE_QUEUE.stats()["commitFailures"])
+METRICS.register_callback("write_queue_flush_timeouts_total", "counter", "读请求等待写入队列落盘超时的次数",
+                          lambda: WRITE_QUEUE.stats()["flushTimeouts"])
+METRICS.register_callback("write_queue_lost_total", "counter", "关闭时仍无法提交而丢失的写操作数",
+                          lambda: WRITE_QUEUE.stats()["lost"])
+METRICS.register_callback("query_cache_hits_total", "counter", "查询结果缓存命中次数",
+                          lambda: QUERY_CACHE.stats()["hits"])
+METRICS.register_callback("query_cache_misses_total", "counter", "查询结果缓存未命中次数",
+                          lambda: QUERY_CACHE.stats()["misses"])
+METRICS.register_callback("quiz_prefetch_hits_total", "counter", "从预取池取到的题目数",
+                          lambda: QUIZ_PREFETCH.stats()["hits"])
+METRICS.register_callback("quiz_prefetch_misses_total", "counter", "预取池不足、同步生成的题目数",
+                          lambda: QUIZ_PREFETCH.stats()["misses"])
+METRICS.register_callback("quiz_prefetch_refill_lag_seconds", "gauge", "最近一次预取池从请求补充到补满的耗时（秒）",
+                          lambda: QUIZ_PREFETCH.stats()["refillLagMs"]["last"] / 1000)
+METRICS.register_callback("quiz_prefetch_refill_lag_max_seconds", "gauge", "预取池补充耗时的最大值（秒）",
+                          lambda: QUIZ_PREFETCH.stats()["refillLagMs"]["max"] / 1000)
+
 
 def get_sqlite_connection() -> sqlite3.Connection:
-    # 数据库文件放在可执行文件所在目录，方便用户数据持久化
-    db_path = os.path.join(BASE_DIR, "japanese_learning.db")
-    return sqlite3.connect(db_path)
+    """获取当前请求的数据库连接：同一请求内复用，请求结束时自动归还连接池。"""
+    conn = g.get("db_conn")
+    if conn is None:
+        conn = g.db_conn = DB_POOL.acquire()
+    return conn
+
+
+@app.teardown_appcontext
+def release_sqlite_connection(_exc) -> None:
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        DB_POOL.release(conn)
+
+
+@app.before_request
+def start_request_metrics() -> None:
+    g.request_started = time.perf_counter()
+    METRICS.request_started()
+    start_db_timer()
+    if SQL_TRACE_ENABLED:
+        sql_trace.start_trace()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """记录本次请求的耗时、状态码与数据库耗时（流式响应只计到开始输出为止）。"""
+    started = g.pop("request_started", None)
+    if started is not None:
+        duration = time.perf_counter() - started
+        db_time, db_statements = stop_db_timer()
+        route = request.url_rule.rule if request.url_rule else None
+        METRICS.request_finished(route, request.method, response.status_code, duration, db_time, db_statements)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s %s %d %.1fms（SQL %d 条 %.1fms）", request.method, request.path,
+                         response.status_code, duration * 1000, db_statements, db_time * 1000)
+    if SQL_TRACE_ENABLED:
+        trace = sql_trace.finish_trace(f"{request.method} {request.path}")
+        if trace is not None:
+            response.headers[sql_trace.TRACE_HEADER] = trace.header_value()
+    startup_profile.request_finished()
+    return response
+
+
+def request_data():
+    """统一读取请求参数：JSON / 表单 / 查询字符串（GET）。"""
+    return request.get_json(silent=True) or request.form or request.args
+
+
+def wait_for_queued_writes() -> bool:
+    """等待写入队列中已提交的写入落盘（最多 WRITE_FLUSH_TIMEOUT 秒），返回是否已全部落盘。"""
+    if WRITE_QUEUE.flush(WRITE_FLUSH_TIMEOUT):
+        return True
+    logger.warning("写入队列 %.1f 秒内未能落盘（待提交 %d 项），本次读取可能不含最新写入",
+                   WRITE_FLUSH_TIMEOUT, WRITE_QUEUE.pending())
+    return False
+
+
+def conditional_on(*tables: str):
+    """条件请求（ETag / If-None-Match）装饰器。
+
+    ETag 由请求路径、参数和相关表的内容版本号计算，版本号不变则返回 304，
+    视图函数及其查询都不会执行（只读取一次 data_versions）。
+    依赖经写入队列修改的表（如收藏）时先等队列落盘，否则刚提交的修改还没反映到版本号上，
+    会返回旧的 304 或命中旧的结果缓存；等待超时时直接执行视图，不带 ETag 也不返回 304。
+    """
+    wait_for_writes = any(t in QUEUED_WRITE_TABLES for t in tables)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if wait_for_writes and not wait_for_queued_writes():
+                return view(*args, **kwargs)
+            try:
+                versions = get_data_versions(get_sqlite_connection())
+            except sqlite3.Error:
+                return view(*args, **kwargs)
+            params = sorted((k, str(v)) for k, v in request_data().items())
+            key = json.dumps(
+                [request.path, params, request.headers.get("Accept", ""), [versions.get(t) for t in tables]],
+                ensure_ascii=False,
+            )
+            etag = hashlib.sha1(key.encode("utf-8")).hexdigest()[:24]
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # 允许浏览器缓存，但每次使用前都要带 If-None-Match 重新验证
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        return wrapper
+    return decorator
 
 
 def parse_lesson_param(inp: str) -> Union[str, List[str]]:
@@ -78,12 +239,33 @@ def parse_lesson_param(inp: str) -> Union[str, List[str]]:
 def healthz():
     try:
         # 仅检查数据库文件是否存在；不强制连接
-        db_path = os.path.join(BASE_DIR, "japanese_learning.db")
-        return jsonify({"ok": True, "dbExists": os.path.exists(db_path)})
+        return jsonify({
+            "ok": True,
+            "dbExists": os.path.exists(DB_POOL.db_path),
+            "queryCache": QUERY_CACHE.stats(),
+            "writeQueue": WRITE_QUEUE.stats(),
+            "quizPrefetch": QUIZ_PREFETCH.stats(),
+        })
     except Exception as e:
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
+@app.route("/metrics")
+def metrics():
+    """Prometheus 文本格式的运行指标。"""
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def debug_startup():
+    """启动各阶段耗时（进程启动 → 第一个请求完成）及最慢的导入模块。"""
+    return jsonify(startup_profile.PROFILE.report())
+
+
+# 只在开启启动分析（--profile-startup 或环境变量）时提供，平时不暴露内部模块信息
+if startup_profile.requested():
+    app.add_url_rule("/debug/startup", view_func=debug_startup)
+
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -109,39 +291,31 @@ def notes_page():
     return render_template("user_notes.html")
 
 
-@app.route("/api/search", methods=["POST"]) 
+@app.route("/api/search", methods=["GET", "POST"])
+@conditional_on("vocabulary", "user_note")
 def api_search():
-    data = request.get_json(silent=True) or request.form
+    data = request_data()
     query_type = (data.get("type") or "jp").strip()
     keyword = (data.get("keyword") or "").strip()
 
     if not keyword:
         return jsonify({"ok": False, "message": "关键词不能为空"}), 400
 
+    try:
+        limit = int(data.get("limit") or SEARCH_DEFAULT_LIMIT)
+    except (TypeError, ValueError):
+        limit = SEARCH_DEFAULT_LIMIT
+
     try:
         conn = get_sqlite_connection()
-        cur = conn.cursor()
-        if query_type == "jp":
-            cur.execute(
-                "SELECT word, hiragana, meaning, lesson FROM vocabulary WHERE word LIKE ?",
-                (f"%{keyword}%",),
-            )
-        else:
-            cur.execute(
-                "SELECT word, hiragana, meaning, lesson FROM vocabulary WHERE meaning LIKE ?",
-                (f"%{keyword}%",),
-            )
-        rows = cur.fetchall()
-        favorited_words = get_favorited_words(conn)
-        cur.close()
-        conn.close()
+        rows = search_words(conn, keyword, query_type, limit, with_favorite=True)
         results = [
             {
                 "word": r[0],
                 "hiragana": r[1],
                 "meaning": r[2],
                 "lesson": r[3],
-                "favorited": r[0] in favorited_words
+                "favorited": bool(r[4])
             }
             for r in rows
         ]
@@ -163,25 +337,32 @@ def api_quiz():
         count = 10
 
     lesson_pattern = parse_lesson_param(lesson_raw)
+    # random（默认）：在范围内随机抽题；review：按间隔重复调度选词（到期复习词 + 新词）
+    mode = (data.get("mode") or "random").strip()
 
     questions = []
     try:
-        db = SQLiteDB()
-        with db as conn:
-            all_valid_words: List[Tuple[str, str]] = SQLiteDB.query_valid_words(conn, lesson_pattern)
-            if not all_valid_words:
-                return jsonify({"ok": False, "message": "未找到可用单词"}), 200
-
-            # 打乱并尽力生成指定数量的题目
-            import random
-            random.shuffle(all_valid_words)
-
-            for word, hira in all_valid_words:
-                if len(questions) >= count:
-                    break
-                q = generate_question(conn, word, hira)
-                if not q:
-                    continue
+        conn = get_sqlite_connection()
+        with count_queries(conn) as query_counter:
+            if mode == "review":
+                # 到期复习词 + 新词，按索引取前 N 个候选，不载入整个范围
+                candidates = select_quiz_words(conn, lesson_pattern, count)
+                generated = questions_for_words(conn, candidates, count)
+                if not generated:
+                    return jsonify({"ok": False, "message": "未找到可用单词"}), 200
+            else:
+                # 随机抽题：先取后台预生成的题目，不足的部分同步生成
+                generated = QUIZ_PREFETCH.take(conn, lesson_pattern, count)
+                if len(generated) < count:
+                    seen = {q["word"] for q in generated}
+                    generated += [
+                        q for q in random_questions(conn, lesson_pattern, count - len(generated))
+                        if q["word"] not in seen
+                    ]
+                if not generated:
+                    return jsonify({"ok": False, "message": "未找到可用单词"}), 200
+
+            for q in generated:
                 # 将正确答案隐藏为索引，避免明文传输
                 opts = q["options"]
                 correct_index = opts.index(q["correct"]) if q["correct"] in opts else 0
@@ -193,48 +374,67 @@ def api_quiz():
                     "meaning": q.get("meaning", "")
                 })
 
-        return jsonify({"ok": True, "questions": questions})
+        # queryCount：本次出题执行的SQL条数，便于观察出题路径的查询开销
+        return jsonify({"ok": True, "questions": questions, "queryCount": query_counter.count})
     except Exception as e:
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
+WRONG_WORDS_MAX_BATCH = 500  # 单次请求最多提交的单词数
+
+
+def request_words(data) -> list:
+    """读取请求中的单词列表：words（列表）或单个 word，去掉空白项。"""
+    if hasattr(data, "getlist"):
+        # 表单提交：words 可以重复出现多次
+        words = data.getlist("words") or [data.get("word")]
+    else:
+        words = data.get("words")
+        if words is None:
+            words = [data.get("word")]
+        elif isinstance(words, str):
+            words = [words]
+    return [str(w).strip() for w in words if w and str(w).strip()]
+
+
 @app.route("/api/quiz/wrong", methods=["POST"])
 def api_quiz_wrong():
+    """记录错题：支持 {"word": ...} 或 {"words": [...]}，整批一次写入。"""
     data = request.get_json(silent=True) or request.form
-    word = (data.get("word") or "").strip()
-    if not word:
+    words = request_words(data)
+    if not words:
         return jsonify({"ok": False, "message": "单词不能为空"}), 400
+    if len(words) > WRONG_WORDS_MAX_BATCH:
+        return jsonify({"ok": False, "message": f"单次最多提交{WRONG_WORDS_MAX_BATCH}个单词"}), 400
     try:
-        conn = get_sqlite_connection()
-        record_wrong_word(conn, word)
-        conn.close()
-        return jsonify({"ok": True})
+        WRITE_QUEUE.submit(record_wrong_answers_batch, words)
+        return jsonify({"ok": True, "count": len(words)})
     except Exception as e:
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
 @app.route("/api/user_notes/add", methods=["POST"])
 def api_user_notes_add():
-    """收藏单词接口。"""
+    """收藏单词接口：支持 {"word": ...} 或 {"words": [...]}。"""
     data = request.get_json(silent=True) or request.form
-    word = (data.get("word") or "").strip()
-    if not word:
+    words = request_words(data)
+    if not words:
         return jsonify({"ok": False, "message": "单词不能为空"}), 400
+    if len(words) > WRONG_WORDS_MAX_BATCH:
+        return jsonify({"ok": False, "message": f"单次最多提交{WRONG_WORDS_MAX_BATCH}个单词"}), 400
     try:
-        conn = get_sqlite_connection()
-        record_wrong_word(conn, word)
-        conn.close()
-        return jsonify({"ok": True, "message": "收藏成功"})
+        WRITE_QUEUE.submit(record_wrong_answers_batch, words)
+        return jsonify({"ok": True, "message": "收藏成功", "count": len(words)})
     except Exception as e:
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
-@app.route("/api/lessons", methods=["GET"]) 
+@app.route("/api/lessons", methods=["GET"])
+@conditional_on("vocabulary")
 def api_lessons():
     try:
         conn = get_sqlite_connection()
         lessons = get_lessons(conn)
-        conn.close()
         return jsonify({"ok": True, "lessons": lessons})
     except Exception as e:
         return jsonify({"ok": False, "message": str(e)}), 500
@@ -243,10 +443,10 @@ def api_lessons():
 @app.route("/api/user_notes", methods=["GET"])
 def api_user_notes():
     try:
+        # 先等队列中的写入落盘，保证刚加入的错题能立即看到
+        wait_for_queued_writes()
         conn = get_sqlite_connection()
-        ensure_user_note_table(conn)
         rows = fetch_user_notes(conn)
-        conn.close()
         notes = [
             {
                 "word": r[0],
@@ -270,9 +470,11 @@ def api_user_notes_delete():
     if not word:
         return jsonify({"ok": False, "message": "单词不能为空"}), 400
     try:
+        # 删除前先提交排队中的收藏，避免删除后又被写回
+        if not wait_for_queued_writes():
+            return jsonify({"ok": False, "message": "数据库繁忙，请稍后重试"}), 503
         conn = get_sqlite_connection()
         deleted = delete_user_note(conn, word)
-        conn.close()
         if not deleted:
             return jsonify({"ok": False, "message": "未找到记录"}), 404
         return jsonify({"ok": True})
@@ -280,26 +482,88 @@ def api_user_notes_delete():
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
-@app.route("/api/lesson_words", methods=["POST"]) 
+LESSON_WORDS_MAX_LIMIT = 1000
+NDJSON_MIMETYPE = "application/x-ndjson"
+NDJSON_FLUSH_ROWS = 100  # 流式输出时每攒够多少行发送一次
+
+
+def _lesson_word_item(row) -> dict:
+    """row 的最后一列为查询中计算的「是否已收藏」。"""
+    return {
+        "word": row[0],
+        "hiragana": row[1],
+        "meaning": row[2],
+        "lesson": row[3],
+        "favorited": bool(row[-1])
+    }
+
+
+def _stream_lesson_words(conn, lesson, after, limit):
+    """NDJSON 逐行输出单词，最后一行为 {"done": true, "nextCursor": ...}。"""
+    buffer = []
+    sent = 0
+    last = None
+    next_cursor = None
+    try:
+        # 多取一行用来判断是否还有下一页
+        rows = iter_words_by_lessons(conn, lesson, after, None if limit is None else limit + 1, with_favorite=True)
+        for row in rows:
+            if limit is not None and sent >= limit:
+                next_cursor = encode_cursor(last[4], last[5])
+                break
+            buffer.append(json.dumps(_lesson_word_item(row), ensure_ascii=False) + "\n")
+            sent += 1
+            last = row
+            if len(buffer) >= NDJSON_FLUSH_ROWS:
+                yield "".join(buffer)
+                buffer = []
+        buffer.append(json.dumps({"done": True, "nextCursor": next_cursor}) + "\n")
+        yield "".join(buffer)
+    except Exception as e:
+        # 响应头已发出，错误只能作为最后一行告知客户端
+        yield json.dumps({"ok": False, "message": str(e)}, ensure_ascii=False) + "\n"
+
+
+@app.route("/api/lesson_words", methods=["GET", "POST"])
+@conditional_on("vocabulary", "user_note")
 def api_lesson_words():
-    data = request.get_json(silent=True) or request.form
+    """按课次列出单词。
+
+    可选参数：limit + after（keyset 游标，来自上一页的 nextCursor）分页；
+    format=ndjson 或 Accept: application/x-ndjson 时以 NDJSON 流式返回。
+    """
+    data = request_data()
     lesson = (data.get("lesson") or "all").strip()
+    after = parse_cursor(data.get("after"))
+    try:
+        limit = int(data["limit"]) if data.get("limit") else None
+        if limit is not None:
+            limit = max(1, min(limit, LESSON_WORDS_MAX_LIMIT))
+    except (TypeError, ValueError):
+        limit = None
+    stream = data.get("format") == "ndjson" or NDJSON_MIMETYPE in request.headers.get("Accept", "")
+
     try:
         conn = get_sqlite_connection()
-        rows = get_words_by_lessons(conn, lesson)
-        favorited_words = get_favorited_words(conn)
-        conn.close()
-        results = [
-            {
-                "word": r[0], 
-                "hiragana": r[1], 
-                "meaning": r[2], 
-                "lesson": r[3],
-                "favorited": r[0] in favorited_words
-            }
-            for r in rows
-        ]
-        return jsonify({"ok": True, "results": results})
+        if stream:
+            return Response(
+                stream_with_context(_stream_lesson_words(conn, lesson, after, limit)),
+                mimetype=NDJSON_MIMETYPE,
+            )
+
+        next_cursor = None
+        if limit is None and after is None:
+            # 整课/全部列表走结果缓存
+            rows = get_words_by_lessons(conn, lesson, with_favorite=True)
+        else:
+            rows = list(iter_words_by_lessons(
+                conn, lesson, after, limit + 1 if limit is not None else None, with_favorite=True
+            ))
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][4], rows[-1][5])
+        results = [_lesson_word_item(r) for r in rows]
+        return jsonify({"ok": True, "results": results, "nextCursor": next_cursor})
     except Exception as e:
         return jsonify({"ok": False, "message": str(e)}), 500
 
@@ -308,10 +572,9 @@ def api_lesson_words():
 def api_today_stats():
     """获取今日学习统计。"""
     try:
+        wait_for_queued_writes()
         conn = get_sqlite_connection()
-        ensure_study_records_table(conn)
         total, accuracy = get_today_stats(conn)
-        conn.close()
         return jsonify({
             "ok": True,
             "total": total,
@@ -322,6 +585,41 @@ def api_today_stats():
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
+HISTORY_DEFAULT_DAYS = 30
+
+
+@app.route("/api/stats/history", methods=["GET"])
+def api_stats_history():
+    """按天的学习统计：?from=YYYY-MM-DD&to=YYYY-MM-DD（本地日期，默认最近30天）。"""
+    try:
+        date_to = datetime.date.fromisoformat(request.args["to"]) if request.args.get("to") else datetime.date.today()
+        date_from = (
+            datetime.date.fromisoformat(request.args["from"]) if request.args.get("from")
+            else date_to - datetime.timedelta(days=HISTORY_DEFAULT_DAYS - 1)
+        )
+    except ValueError:
+        return jsonify({"ok": False, "message": "日期格式应为 YYYY-MM-DD"}), 400
+    if date_from > date_to:
+        return jsonify({"ok": False, "message": "开始日期不能晚于结束日期"}), 400
+
+    try:
+        wait_for_queued_writes()
+        conn = get_sqlite_connection()
+        rows = get_daily_stats(conn, date_from.isoformat(), date_to.isoformat())
+        days = [
+            {
+                "day": day,
+                "total": total,
+                "correct": correct,
+                "accuracy": round(correct / total * 100, 1) if total > 0 else 0.0,
+            }
+            for day, total, correct in rows
+        ]
+        return jsonify({"ok": True, "from": date_from.isoformat(), "to": date_to.isoformat(), "days": days})
+    except Exception as e:
+        return jsonify({"ok": False, "message": str(e)}), 500
+
+
 @app.route("/api/study/record", methods=["POST"])
 def api_study_record():
     """记录学习记录。"""
@@ -336,9 +634,6 @@ def api_study_record():
         return jsonify({"ok": False, "message": "单词或记录列表不能为空"}), 400
     
     try:
-        conn = get_sqlite_connection()
-        ensure_study_records_table(conn)
-        
         if records:
             # 批量记录
             record_list = [
@@ -346,12 +641,11 @@ def api_study_record():
                 for r in records
                 if r.get("word")
             ]
-            record_study_batch(conn, record_list)
+            WRITE_QUEUE.submit(record_study_batch, record_list)
         else:
             # 单条记录
-            record_study(conn, word, is_correct)
+            WRITE_QUEUE.submit(record_study, word, is_correct)
         
-        conn.close()
         return jsonify({"ok": True})
     except Exception as e:
         return jsonify({"ok": False, "message": str(e)}), 500
@@ -367,13 +661,59 @@ def handle_500(e):
     return jsonify({"ok": False, "message": f"服务器错误: {e}"}), 500
 
 
+def shutdown_app() -> None:
+    """生产模式退出时调用：停止预取线程，提交写入队列中剩余的写入，再关闭连接池。"""
+    QUIZ_PREFETCH.close()
+    WRITE_QUEUE.close()
+    DB_POOL.close_all()
+
+
+def production_by_default() -> bool:
+    """未指定 --production/--dev 时的模式：环境变量优先，其次打包后的可执行文件默认生产模式。"""
+    mode = os.environ.get(SERVE_MODE_ENV, "").strip().lower()
+    if mode in ("production", "prod"):
+        return True
+    if mode in ("dev", "development", "debug"):
+        return False
+    return bool(getattr(sys, "frozen", False))
+
+
+def parse_serve_args(argv=None):
+    """解析启动参数。只解析不导入 serving：开发模式不需要加载生产服务器相关模块。"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="日语学习系统 Web 服务")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--production", dest="production", action="store_true", default=None,
+                      help="生产模式：多线程 WSGI 服务器（打包后的程序默认）")
+    mode.add_argument("--dev", dest="production", action="store_false",
+                      help="开发模式：Flask 开发服务器 + debug")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "5000")), help="端口（默认 5000 或 $PORT）")
+    parser.add_argument("--threads", type=int, help="每个进程的工作线程数（未指定时读取 $JAPANESE_LEARNING_THREADS，默认 8）")
+    parser.add_argument("--workers", type=int, help="进程数，仅 POSIX（未指定时读取 $JAPANESE_LEARNING_WORKERS，默认 1）")
+    parser.add_argument(startup_profile.PROFILE_FLAG, action="store_true",
+                        help="统计启动各阶段与各模块的导入耗时，第一个请求完成后打印（亦见 /debug/startup）")
+    args = parser.parse_args(argv)
+    if args.production is None:
+        args.production = production_by_default()
+    return args
+
+
+# 路由与指标注册完毕
+startup_profile.mark("app")
+
+
 if __name__ == "__main__":
-    # 启动：python web_app.py
-    port = int(os.environ.get("PORT", "5000"))
+    # 启动：python web_app.py [--production] [--threads N] [--workers N]
+    args = parse_serve_args()
+    # 先借还一次连接：在接收请求前完成数据库结构迁移，并载入（必要时重建）词库快照
+    with DB_POOL.connection() as conn:
+        vocabulary_snapshot.preload(conn, DB_POOL.db_path)
+    startup_profile.mark("database")
+    port = args.port
     # 判断是否为打包后的可执行文件
     is_frozen = getattr(sys, 'frozen', False)
-    # 打包后不使用debug模式，开发环境使用debug模式
-    debug_mode = not is_frozen
     # 为避免用户复制 0.0.0.0 导致无法直接在浏览器访问，改为本机 127.0.0.1
     if is_frozen:
         print("="*60)
@@ -382,6 +722,12 @@ if __name__ == "__main__":
         print(f"服务器地址: http://127.0.0.1:{port}")
         print("按Ctrl+C退出程序")
         print("="*60 + "\n")
-    app.run(host="127.0.0.1", port=port, debug=debug_mode)
-
-
+    if args.production:
+        # 打包后的程序与生产部署：多线程服务器，退出时提交剩余写入
+        from src.core import serving
+        serving.serve(app, host=args.host, port=port, threads=args.threads, workers=args.workers,
+                      on_shutdown=shutdown_app)
+    else:
+        # 开发环境使用debug模式
+        startup_profile.mark("listening")
+        app.run(host=args.host, port=port, debug=True)